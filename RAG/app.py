@@ -1,27 +1,43 @@
 import os
 from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 
+# smart_agent/core의 공용 모듈 사용 (임베딩 캐시 등, pip install -e ../smart_agent로 설치)
+from core.embedding_cache import CachedEmbeddings
+from core.gemini_governor import CLIENT_MAX_RETRIES, govern_chat_model
+from core.rerank import RerankingRetriever
+from ingest import CHROMA_DIR, COLLECTION_NAME, EMBEDDING_CACHE_PATH, SEMANTIC_CACHE_PATH, ingest_documents
+from semantic_cache import SemanticCache
+
 # 1. API 키 설정 (환경 변수 사용)
 gemini_api_key = os.getenv("GEMINI_API_KEY")
 if not gemini_api_key:
     raise ValueError("GEMINI_API_KEY 환경 변수가 설정되지 않았습니다.")
 
+# 캐시 적중으로 볼 질문 간 최소 코사인 유사도
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+# 프롬프트에 넣을 검색 컨텍스트의 최대 토큰 수
+RAG_CONTEXT_TOKENS = int(os.getenv("RAG_CONTEXT_TOKENS", "2000"))
+
 def run_lcel_rag():
-    llm = ChatGoogleGenerativeAI(
+    # 요청·토큰 속도 제한과 동시 실행 제한, 재시도는 smart_agent의 Gemini 관문(governor)이 담당
+    llm = govern_chat_model(ChatGoogleGenerativeAI(
         model="gemini-2.5-flash",
         google_api_key=gemini_api_key,
-        temperature=0
-    )
+        temperature=0,
+        max_retries=CLIENT_MAX_RETRIES
+    ))
     
-    embeddings = GoogleGenerativeAIEmbeddings(
-        model="models/embedding-001",
-        google_api_key=gemini_api_key
+    embeddings = CachedEmbeddings(
+        GoogleGenerativeAIEmbeddings(
+            model="models/embedding-001",
+            google_api_key=gemini_api_key
+        ),
+        db_path=EMBEDDING_CACHE_PATH
     )
 
     # 3. 문서 로드 및 분할
@@ -30,15 +46,28 @@ def run_lcel_rag():
         print(f"'{file_path}' 파일이 없습니다.")
         return
 
-    loader = PyPDFLoader(file_path)
-    docs = loader.load()
-    
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    splits = text_splitter.split_documents(docs)
 
-    # 4. 벡터 스토어 및 리트리버 설정
-    vectorstore = Chroma.from_documents(documents=splits, embedding=embeddings)
-    retriever = vectorstore.as_retriever()
+    # 4. 벡터 스토어 및 리트리버 설정 (디스크에 저장된 컬렉션을 불러옴)
+    vectorstore = Chroma(
+        collection_name=COLLECTION_NAME,
+        persist_directory=CHROMA_DIR,
+        embedding_function=embeddings
+    )
+    
+    # 새로 생기거나 바뀐 페이지만 분할·임베딩하여 반영 (바뀐 것이 없으면 PDF를 읽지 않음)
+    ingest_stats = ingest_documents([file_path], vectorstore, text_splitter)
+    print(f"문서 적재 결과: {ingest_stats}")
+    
+    # 후보를 넉넉히 가져온 뒤 겹치는 청크를 MMR로 걸러내고 토큰 예산 안에서 컨텍스트를 구성
+    retriever = RerankingRetriever(
+        vectorstore=vectorstore,
+        embeddings=embeddings,
+        k=4,
+        fetch_k=20,
+        lexical_weight=0.2,
+        max_tokens=RAG_CONTEXT_TOKENS
+    )
 
     # 5. 프롬프트 템플릿 정의
     template = """다음 제공된 컨텍스트를 사용하여 질문에 답하세요. 
@@ -63,13 +92,23 @@ def run_lcel_rag():
         | StrOutputParser()
     )
 
-    # 7. 실행
+    # 7. 의미 기반 답변 캐시 (비슷한 질문은 검색·생성 없이 저장된 답변 사용)
+    # 문서가 다시 적재되어 버전이 바뀌면 이전 버전의 답변은 무효화됨
+    semantic_cache = SemanticCache(
+        embeddings,
+        threshold=SEMANTIC_CACHE_THRESHOLD,
+        path=SEMANTIC_CACHE_PATH
+    )
+    semantic_cache.invalidate(ingest_stats["version"])
+
+    # 8. 실행
     query = "이 문서의 주요 내용을 요약해줘."
     print(f"\n질문: {query}")
     
     # LCEL 방식에서는 딕셔너리가 아닌 질문 문자열만 넘겨도 작동합니다.
-    response = rag_chain.invoke(query)
-    print(f"\n답변:\n{response}")
+    result = semantic_cache.get_or_generate(query, ingest_stats["version"], rag_chain.invoke)
+    source = f"캐시 (유사도 {result['score']:.3f})" if result["cached"] else "새로 생성"
+    print(f"\n답변 ({source}, 문서 버전 {result['version']}):\n{result['answer']}")
 
 if __name__ == "__main__":
     run_lcel_rag()
\ No newline at end of file
@@ -0,0 +1,262 @@
+"""
+RAG 검색 벤치마크 (오프라인)
+
+원격 API 없이 결정적인 로컬 임베딩(토큰 해싱)과 document.pdf만으로
+적재 단계 시간(load/split/index), k별 검색 지연(p50/p95/p99), recall@k를 측정하여 JSON으로 저장합니다.
+기준 결과(--baseline)를 주면 지연 증가나 recall 하락을 회귀로 보고합니다.
+
+사용 예:
+    python benchmark.py --output bench.json
+    python benchmark.py --retriever hybrid --baseline bench.json
+"""
+import argparse
+import hashlib
+import json
+import math
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# smart_agent/core의 공용 모듈 (pip install -e ../smart_agent로 설치)
+from core.bm25 import BM25Index, tokenize
+from core.flat_index import FlatVectorStore
+from core.rerank import RerankingRetriever
+from core.retriever import HybridRetriever
+
+BASE_DIR = Path(__file__).resolve().parent
+
+DEFAULT_QUERIES_PATH = BASE_DIR / "benchmark_queries.json"
+DEFAULT_K_VALUES = [1, 3, 5, 10]
+
+class HashingEmbeddings(Embeddings):
+    """
+    토큰 해싱 기반의 결정적 로컬 임베딩 (벤치마크 전용)
+
+    같은 텍스트는 항상 같은 벡터가 되고, 공유하는 토큰이 많을수록 코사인 유사도가 높아지므로
+    원격 임베딩 없이도 검색 품질 변화를 비교할 수 있습니다.
+    """
+
+    def __init__(self, size: int = 256):
+        self.size = size
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.size
+        for token in tokenize(text):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.size
+            vector[index] += 1.0 if digest[4] % 2 == 0 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+def percentile(values: List[float], q: float) -> float:
+    """선형 보간 백분위수 (q: 0~100)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def latency_summary(samples_s: List[float]) -> Dict[str, float]:
+    samples_ms = [s * 1000 for s in samples_s]
+    return {
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+        "mean_ms": round(statistics.fmean(samples_ms), 3),
+    }
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+def build_vectorstore(backend: str, splits, embeddings):
+    """벤치마크용 벡터스토어를 새로 만듭니다. (매 실행마다 비어 있는 컬렉션)"""
+    if backend == "chroma":
+        from langchain_chroma import Chroma
+        return Chroma.from_documents(
+            documents=splits,
+            embedding=embeddings,
+            collection_name=f"bench_{uuid.uuid4().hex[:8]}"
+        )
+    if backend == "flat":
+        return FlatVectorStore.from_texts(
+            [doc.page_content for doc in splits],
+            embeddings,
+            metadatas=[doc.metadata for doc in splits],
+            persist_directory=tempfile.mkdtemp(prefix="bench_flat_")
+        )
+    raise ValueError(f"알 수 없는 벡터스토어: {backend}")
+
+def build_retriever(mode: str, vectorstore, splits, k: int, embeddings=None):
+    if mode == "dense":
+        return vectorstore.as_retriever(search_kwargs={"k": k})
+    if mode == "hybrid":
+        return HybridRetriever(vectorstore=vectorstore, bm25=BM25Index(splits), k=k)
+    if mode == "mmr":
+        return RerankingRetriever(vectorstore=vectorstore, embeddings=embeddings, k=k, lexical_weight=0.2)
+    raise ValueError(f"알 수 없는 검색 모드: {mode}")
+
+def recall_at_k(retrieved_pages: List[int], relevant_pages: List[int]) -> float:
+    """관련 페이지 중 검색 결과에 포함된 비율"""
+    relevant = set(relevant_pages)
+    return len(relevant & set(retrieved_pages)) / len(relevant) if relevant else 0.0
+
+def run_benchmark(
+    document: str,
+    queries_path: str,
+    k_values: List[int],
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100,
+    backend: str = "chroma",
+    retriever_mode: str = "dense",
+    repeats: int = 5,
+    embedding_size: int = 256,
+) -> dict:
+    """
+    벤치마크를 실행하고 결과 딕셔너리를 반환합니다.
+
+    Args:
+        document: 적재할 PDF 경로
+        queries_path: 질의 세트 JSON 경로 ({"queries": [{"query", "relevant_pages"}]})
+        k_values: 측정할 k 목록
+        chunk_size, chunk_overlap: 분할기 설정
+        backend: 벡터스토어 종류
+        retriever_mode: "dense", "hybrid" 또는 "mmr"
+        repeats: 질의당 반복 측정 횟수 (지연 측정용)
+        embedding_size: 로컬 임베딩 차원
+    """
+    from langchain_community.document_loaders import PyPDFLoader
+
+    with open(queries_path, "r", encoding="utf-8") as f:
+        queries = json.load(f)["queries"]
+
+    embeddings = HashingEmbeddings(size=embedding_size)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    docs, load_s = timed(PyPDFLoader(document).load)
+    splits, split_s = timed(splitter.split_documents, docs)
+    vectorstore, index_s = timed(build_vectorstore, backend, splits, embeddings)
+
+    latency = {}
+    recall = {}
+    for k in k_values:
+        retriever = build_retriever(retriever_mode, vectorstore, splits, k, embeddings)
+        retriever.invoke(queries[0]["query"])  # 워밍업
+
+        samples = []
+        recalls = []
+        for item in queries:
+            for _ in range(repeats):
+                results, elapsed = timed(retriever.invoke, item["query"])
+                samples.append(elapsed)
+            pages = [doc.metadata.get("page") for doc in results]
+            recalls.append(recall_at_k(pages, item["relevant_pages"]))
+
+        latency[str(k)] = latency_summary(samples)
+        recall[str(k)] = round(statistics.fmean(recalls), 4)
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "config": {
+            "document": Path(document).name,
+            "queries": len(queries),
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "backend": backend,
+            "retriever": retriever_mode,
+            "repeats": repeats,
+            "embedding_size": embedding_size,
+        },
+        "ingest": {
+            "pages": len(docs),
+            "chunks": len(splits),
+            "load_ms": round(load_s * 1000, 3),
+            "split_ms": round(split_s * 1000, 3),
+            "index_ms": round(index_s * 1000, 3),
+        },
+        "latency": latency,
+        "recall": recall,
+    }
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    기준 결과와 비교하여 회귀 목록을 반환합니다.
+
+    p95 지연과 적재 시간은 (1 + tolerance)배를 넘으면, recall은 조금이라도 떨어지면 회귀로 봅니다.
+    """
+    regressions = []
+    for stage in ("load_ms", "split_ms", "index_ms"):
+        old, new = baseline["ingest"].get(stage), result["ingest"][stage]
+        if old and new > old * (1 + tolerance):
+            regressions.append(f"{stage}: {old} -> {new}")
+    for k, summary in result["latency"].items():
+        old = baseline["latency"].get(k, {}).get("p95_ms")
+        if old and summary["p95_ms"] > old * (1 + tolerance):
+            regressions.append(f"p95@{k}: {old}ms -> {summary['p95_ms']}ms")
+    for k, value in result["recall"].items():
+        old = baseline["recall"].get(k)
+        if old is not None and value < old:
+            regressions.append(f"recall@{k}: {old} -> {value}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RAG 검색 오프라인 벤치마크")
+    parser.add_argument("--document", default=str(BASE_DIR / "document.pdf"))
+    parser.add_argument("--queries", default=str(DEFAULT_QUERIES_PATH))
+    parser.add_argument("--k", type=int, nargs="+", default=DEFAULT_K_VALUES, help="측정할 k 값들")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--backend", default="chroma", help="벡터스토어 (chroma, flat)")
+    parser.add_argument("--retriever", default="dense", help="검색 모드 (dense, hybrid, mmr)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", default=None, help="비교할 기준 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="허용 지연 증가율 (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    result = run_benchmark(
+        document=args.document,
+        queries_path=args.queries,
+        k_values=args.k,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        backend=args.backend,
+        retriever_mode=args.retriever,
+        repeats=args.repeats,
+    )
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print("\n성능 회귀 발견:")
+            for line in regressions:
+                print(f"- {line}")
+            sys.exit(1)
+        print("\n기준 결과 대비 회귀 없음")
@@ -0,0 +1,212 @@
+"""
+증분 문서 적재(ingestion) 모듈
+
+원본 파일과 페이지별 텍스트 해시를 매니페스트(JSON)에 기록해 두고,
+다음 실행에서는 새로 생기거나 바뀐 페이지만 다시 분할·임베딩하여 벡터 DB에 반영합니다.
+매니페스트는 페이지 하나를 반영할 때마다 저장되므로 중간에 중단되어도 이어서 진행할 수 있습니다.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from langchain_core.documents import Document
+
+BASE_DIR = Path(__file__).resolve().parent
+CACHE_DIR = BASE_DIR / ".cache"
+CHROMA_DIR = str(CACHE_DIR / "chroma")
+MANIFEST_PATH = str(CACHE_DIR / "manifest.json")
+# 임베딩 캐시 경로 (내용이 바뀌지 않은 청크는 다시 임베딩하지 않음)
+EMBEDDING_CACHE_PATH = str(CACHE_DIR / "embeddings.sqlite3")
+# 의미 기반 답변 캐시 경로 (확장자 없이, .npy/.json으로 저장)
+SEMANTIC_CACHE_PATH = str(CACHE_DIR / "semantic_cache")
+COLLECTION_NAME = "rag_documents"
+
+def page_hash(text: str) -> str:
+    """페이지 텍스트의 SHA-256 해시"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def chunk_id(source: str, page: int, index: int) -> str:
+    """청크의 고정 ID (같은 페이지를 다시 적재하면 같은 ID로 덮어씀)"""
+    return hashlib.sha1(f"{source}:{page}:{index}".encode("utf-8")).hexdigest()
+
+def iter_pdf_pages(file_path: str) -> Iterator[Tuple[int, Document]]:
+    """PDF를 한 페이지씩 읽어 (페이지 번호, 문서)로 반환합니다."""
+    from langchain_community.document_loaders import PyPDFLoader
+
+    for doc in PyPDFLoader(file_path).lazy_load():
+        yield doc.metadata.get("page", 0), doc
+
+class IngestManifest:
+    """
+    적재 상태 매니페스트
+
+    {
+        "version": 컬렉션 버전 (내용이 바뀔 때마다 1씩 증가),
+        "files": {
+            원본 경로: {
+                "size": 파일 크기, "mtime": 수정 시각, "complete": 모든 페이지 반영 여부,
+                "pages": {페이지 번호: {"hash": 텍스트 해시, "chunk_ids": [...]}}
+            }
+        }
+    }
+    """
+
+    def __init__(self, path: str = MANIFEST_PATH):
+        self.path = path
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+        else:
+            self.data = {"version": 0, "files": {}}
+
+    @property
+    def version(self) -> int:
+        return self.data["version"]
+
+    @property
+    def files(self) -> Dict[str, dict]:
+        return self.data["files"]
+
+    def mark_dirty(self):
+        """내용이 바뀌었음을 기록합니다. (중단 후 재개해도 버전이 올라가도록 매니페스트에 저장됨)"""
+        self.data["dirty"] = True
+
+    def commit_version(self) -> bool:
+        """바뀐 내용이 있으면 버전을 올립니다. 버전이 올라갔으면 True를 반환합니다."""
+        if not self.data.get("dirty"):
+            return False
+        self.data["version"] += 1
+        self.data["dirty"] = False
+        return True
+
+    def save(self):
+        """임시 파일에 쓴 뒤 교체하여 중단되어도 매니페스트가 깨지지 않도록 저장합니다."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+def file_signature(file_path: str) -> dict:
+    stat = os.stat(file_path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+def is_unchanged(manifest: IngestManifest, source: str) -> bool:
+    """파일이 마지막 적재 이후 바뀌지 않았고, 적재가 끝까지 완료되었는지 확인합니다."""
+    entry = manifest.files.get(source)
+    if not entry or not entry.get("complete"):
+        return False
+    return file_signature(source) == {"size": entry["size"], "mtime": entry["mtime"]}
+
+def upsert_page(vectorstore, text_splitter, manifest: IngestManifest, source: str, page: int, doc: Document) -> bool:
+    """
+    페이지 하나를 벡터 DB에 반영합니다. (텍스트가 바뀌지 않았으면 건너뜀)
+
+    Returns:
+        실제로 반영했으면 True
+    """
+    entry = manifest.files.setdefault(source, {"pages": {}, "complete": False})
+    pages = entry["pages"]
+    key = str(page)
+    digest = page_hash(doc.page_content)
+    if key in pages and pages[key]["hash"] == digest:
+        return False
+
+    old_ids = pages.get(key, {}).get("chunk_ids", [])
+    if old_ids:
+        vectorstore.delete(ids=old_ids)
+
+    chunks = text_splitter.split_documents([doc])
+    ids = [chunk_id(source, page, i) for i in range(len(chunks))]
+    if chunks:
+        vectorstore.add_documents(chunks, ids=ids)
+
+    pages[key] = {"hash": digest, "chunk_ids": ids}
+    manifest.mark_dirty()
+    manifest.save()
+    return True
+
+def finish_file(vectorstore, manifest: IngestManifest, source: str, seen_pages: Iterable[int]) -> int:
+    """
+    파일의 모든 페이지를 반영한 뒤, 더 이상 없는 페이지의 벡터를 지우고 완료로 표시합니다.
+
+    Returns:
+        삭제한 페이지 수
+    """
+    entry = manifest.files.setdefault(source, {"pages": {}, "complete": False})
+    seen = {str(p) for p in seen_pages}
+    removed = [key for key in entry["pages"] if key not in seen]
+    for key in removed:
+        ids = entry["pages"].pop(key)["chunk_ids"]
+        if ids:
+            vectorstore.delete(ids=ids)
+    if removed:
+        manifest.mark_dirty()
+    entry.update(file_signature(source))
+    entry["complete"] = True
+    manifest.save()
+    return len(removed)
+
+def remove_missing_sources(vectorstore, manifest: IngestManifest, sources: List[str], root: str = None) -> int:
+    """
+    적재 대상에서 빠진 파일의 벡터를 지웁니다. 지운 파일 수를 반환합니다.
+
+    매니페스트와 컬렉션은 app.py(단일 파일)와 pipeline.py(폴더)가 함께 쓰므로 다른 적재가 넣은 파일은 건드리지 않습니다.
+    root가 있으면 그 폴더 아래의 파일 중 sources에 없는 것을, 없으면 sources 중 디스크에서 사라진 파일만 지웁니다.
+    """
+    if root is not None:
+        prefix = os.path.join(os.path.abspath(root), "")
+        keep = set(sources)
+        removed = [source for source in manifest.files if source.startswith(prefix) and source not in keep]
+    else:
+        removed = [source for source in sources if source in manifest.files and not os.path.exists(source)]
+    for source in removed:
+        ids = [cid for page in manifest.files[source]["pages"].values() for cid in page["chunk_ids"]]
+        if ids:
+            vectorstore.delete(ids=ids)
+        del manifest.files[source]
+        manifest.mark_dirty()
+        manifest.save()
+    return len(removed)
+
+def ingest_documents(file_paths: List[str], vectorstore, text_splitter, manifest_path: str = MANIFEST_PATH) -> dict:
+    """
+    파일 목록을 벡터 DB에 증분 적재합니다.
+
+    Args:
+        file_paths: 적재할 PDF 경로 목록 (이 중 디스크에서 사라진 파일은 벡터 DB에서 삭제)
+        vectorstore: 영구 저장되는 벡터스토어 (add_documents/delete 지원)
+        text_splitter: 페이지를 청크로 나눌 분할기
+        manifest_path: 매니페스트 경로
+
+    Returns:
+        {"skipped_files", "upserted_pages", "removed_pages", "removed_files", "version"} 통계
+    """
+    manifest = IngestManifest(manifest_path)
+    sources = [os.path.abspath(p) for p in file_paths]
+    stats = {"skipped_files": 0, "upserted_pages": 0, "removed_pages": 0, "removed_files": 0}
+
+    stats["removed_files"] = remove_missing_sources(vectorstore, manifest, sources)
+
+    for source in sources:
+        if not os.path.exists(source):
+            continue
+        if is_unchanged(manifest, source):
+            # 바뀌지 않은 파일은 PDF를 열지도 않음
+            stats["skipped_files"] += 1
+            continue
+
+        seen_pages = []
+        for page, doc in iter_pdf_pages(source):
+            seen_pages.append(page)
+            if upsert_page(vectorstore, text_splitter, manifest, source, page, doc):
+                stats["upserted_pages"] += 1
+        stats["removed_pages"] += finish_file(vectorstore, manifest, source, seen_pages)
+
+    if manifest.commit_version():
+        manifest.save()
+
+    stats["version"] = manifest.version
+    return stats
@@ -0,0 +1,360 @@
+"""
+대용량 문서 병렬 적재 파이프라인
+
+폴더 안의 PDF 전체를 다음 단계로 흘려보냅니다.
+1. 추출: 프로세스 풀에서 파일별로 페이지 텍스트 추출 (동시에 처리 중인 파일 수 제한)
+2. 분할: 바뀐 페이지만 제너레이터로 하나씩 청크 분할
+3. 임베딩: 크기 제한이 있는 배치를 스레드 풀에서 동시에 요청 (진행 중인 배치 수 제한)
+4. 저장: 단일 writer 스레드가 제한된 크기의 큐에서 꺼내 벡터 DB에 기록
+
+각 단계 사이가 모두 제한된 크기로 연결되어 있어(backpressure) 말뭉치 크기와 관계없이 메모리 사용량이 일정합니다.
+증분 적재 매니페스트(ingest.py)를 함께 갱신하므로 app.py와 같은 컬렉션/버전을 공유합니다.
+"""
+import argparse
+import os
+import queue
+import threading
+import time
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from langchain_core.documents import Document
+
+from ingest import (
+    IngestManifest,
+    MANIFEST_PATH,
+    chunk_id,
+    finish_file,
+    is_unchanged,
+    iter_pdf_pages,
+    page_hash,
+    remove_missing_sources,
+)
+
+_STOP = object()
+
+def extract_file(source: str) -> Tuple[str, List[Tuple[int, Document]], float]:
+    """(프로세스 풀 작업) PDF 한 개의 모든 페이지를 추출합니다. (경로, 페이지 목록, 소요 시간)을 반환합니다."""
+    started = time.perf_counter()
+    pages = list(iter_pdf_pages(source))
+    return source, pages, time.perf_counter() - started
+
+def write_vectors(vectorstore, ids: List[str], texts: List[str], metadatas: List[dict], vectors: List[List[float]]):
+    """
+    미리 계산한 임베딩을 벡터 DB에 기록합니다.
+
+    Chroma는 컬렉션 upsert를 직접 사용하고, 그 외 벡터스토어는 add_embeddings가 있으면 사용합니다.
+    """
+    collection = getattr(vectorstore, "_collection", None)
+    if collection is not None:
+        collection.upsert(ids=ids, embeddings=vectors, documents=texts, metadatas=metadatas)
+    elif hasattr(vectorstore, "add_embeddings"):
+        vectorstore.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+    else:
+        vectorstore.add_texts(texts, metadatas=metadatas, ids=ids)
+
+class StageStats:
+    """단계별 처리량 통계 (처리 개수와 실제 작업 시간)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"pages": 0, "chunks": 0, "vectors": 0}
+        self.busy = {"extract": 0.0, "split": 0.0, "embed": 0.0, "write": 0.0}
+        self.started = time.perf_counter()
+
+    def add(self, stage: str, seconds: float, counter: str = None, n: int = 0):
+        with self._lock:
+            self.busy[stage] += seconds
+            if counter:
+                self.counts[counter] += n
+
+    def report(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+
+        def rate(n):
+            return round(n / elapsed, 2) if elapsed > 0 else 0.0
+
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "pages": self.counts["pages"],
+            "chunks": self.counts["chunks"],
+            "vectors": self.counts["vectors"],
+            "pages_per_s": rate(self.counts["pages"]),
+            "chunks_per_s": rate(self.counts["chunks"]),
+            "vectors_per_s": rate(self.counts["vectors"]),
+            "busy_s": {stage: round(seconds, 3) for stage, seconds in self.busy.items()},
+        }
+
+class IngestionPipeline:
+    """PDF 폴더 병렬 적재 파이프라인"""
+
+    def __init__(
+        self,
+        vectorstore,
+        embeddings,
+        text_splitter,
+        manifest_path: str = MANIFEST_PATH,
+        extract_workers: int = None,
+        batch_size: int = 64,
+        max_batch_chars: int = 60000,
+        embed_concurrency: int = 4,
+        write_queue_size: int = 8,
+    ):
+        """
+        Args:
+            vectorstore: 기록할 벡터스토어
+            embeddings: 임베딩 객체 (CachedEmbeddings 권장)
+            text_splitter: 청크 분할기
+            manifest_path: 증분 적재 매니페스트 경로
+            extract_workers: 페이지 추출 프로세스 수 (기본: CPU 수)
+            batch_size: 임베딩 배치 당 최대 청크 수
+            max_batch_chars: 임베딩 배치 당 최대 글자 수
+            embed_concurrency: 동시에 진행할 임베딩 요청 수
+            write_queue_size: writer 대기열 크기 (가득 차면 임베딩 단계가 대기)
+        """
+        self.vectorstore = vectorstore
+        self.embeddings = embeddings
+        self.text_splitter = text_splitter
+        self.manifest = IngestManifest(manifest_path)
+        self.extract_workers = extract_workers or os.cpu_count() or 2
+        self.batch_size = batch_size
+        self.max_batch_chars = max_batch_chars
+        self.embed_concurrency = embed_concurrency
+        self.write_queue_size = write_queue_size
+
+        self.stats = StageStats()
+        self._manifest_lock = threading.Lock()
+        # {(source, page): {"remaining": 남은 청크 수, "ids": [...], "hash": ...}}
+        self._pending_pages = {}
+        # {source: {"remaining": 남은 페이지 수, "seen": [...], "registered": 추출 완료 여부}}
+        self._pending_files = {}
+        self._error = None
+
+    # --- 1. 추출 ---------------------------------------------------------
+
+    def _extract(self, sources: List[str]) -> Iterator[Tuple[str, List[Tuple[int, Document]]]]:
+        """프로세스 풀에서 파일을 추출하되, 동시에 메모리에 올라가는 파일 수를 제한합니다."""
+        max_inflight = self.extract_workers * 2
+        pool = ProcessPoolExecutor(max_workers=self.extract_workers)
+        try:
+            futures = []
+            pending = iter(sources)
+            for source in pending:
+                futures.append(pool.submit(extract_file, source))
+                if len(futures) >= max_inflight:
+                    break
+            while futures:
+                source, pages, elapsed = futures.pop(0).result()
+                self.stats.add("extract", elapsed, "pages", len(pages))
+                next_source = next(pending, None)
+                if next_source is not None:
+                    futures.append(pool.submit(extract_file, next_source))
+                yield source, pages
+        finally:
+            # 오류로 중간에 멈추면(close) 아직 시작하지 않은 추출은 취소하고 프로세스를 정리
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    # --- 2. 분할 ---------------------------------------------------------
+
+    def _iter_chunks(self, sources: List[str]) -> Iterator[Tuple[str, Document, Tuple[str, int]]]:
+        """바뀐 페이지만 청크로 분할하여 (청크 ID, 청크, (원본 경로, 페이지 번호))를 하나씩 반환합니다."""
+        with closing(self._extract(sources)) as extracted:
+            for source, pages in extracted:
+                with self._manifest_lock:
+                    entry = self.manifest.files.setdefault(source, {"pages": {}, "complete": False})
+                    self._pending_files[source] = {"remaining": 0, "seen": [p for p, _ in pages], "registered": False}
+
+                for page, doc in pages:
+                    digest = page_hash(doc.page_content)
+                    previous = entry["pages"].get(str(page))
+                    if previous and previous["hash"] == digest:
+                        continue
+
+                    started = time.perf_counter()
+                    chunks = self.text_splitter.split_documents([doc])
+                    self.stats.add("split", time.perf_counter() - started, "chunks", len(chunks))
+                    ids = [chunk_id(source, page, i) for i in range(len(chunks))]
+
+                    with self._manifest_lock:
+                        self._pending_files[source]["remaining"] += 1
+                        self._pending_pages[(source, page)] = {"remaining": len(chunks), "ids": ids, "hash": digest}
+                    if not chunks:
+                        self._complete_page(source, page)
+                    for cid, chunk in zip(ids, chunks):
+                        yield cid, chunk, (source, page)
+
+                with self._manifest_lock:
+                    self._pending_files[source]["registered"] = True
+                self._maybe_finish_file(source)
+
+    def _iter_batches(self, sources: List[str]) -> Iterator[list]:
+        """청크를 개수와 글자 수 제한에 맞춘 배치로 묶습니다."""
+        batch, chars = [], 0
+        with closing(self._iter_chunks(sources)) as chunks:
+            for item in chunks:
+                chunk = item[1]
+                if batch and (len(batch) >= self.batch_size or chars + len(chunk.page_content) > self.max_batch_chars):
+                    yield batch
+                    batch, chars = [], 0
+                batch.append(item)
+                chars += len(chunk.page_content)
+        if batch:
+            yield batch
+
+    # --- 3. 임베딩 / 4. 저장 ---------------------------------------------
+
+    def _embed_batch(self, batch, write_queue: queue.Queue, inflight: threading.BoundedSemaphore):
+        try:
+            if self._error is None:
+                started = time.perf_counter()
+                vectors = self.embeddings.embed_documents([chunk.page_content for _, chunk, _ in batch])
+                self.stats.add("embed", time.perf_counter() - started)
+                # writer가 밀려 있으면 여기서 대기 (backpressure)
+                write_queue.put((batch, vectors))
+        except BaseException as e:
+            self._error = e
+        finally:
+            inflight.release()
+
+    def _writer(self, write_queue: queue.Queue):
+        while True:
+            item = write_queue.get()
+            if item is _STOP:
+                return
+            if self._error is not None:
+                continue
+            batch, vectors = item
+            try:
+                started = time.perf_counter()
+                write_vectors(
+                    self.vectorstore,
+                    ids=[cid for cid, _, _ in batch],
+                    texts=[chunk.page_content for _, chunk, _ in batch],
+                    metadatas=[chunk.metadata for _, chunk, _ in batch],
+                    vectors=vectors,
+                )
+                self.stats.add("write", time.perf_counter() - started, "vectors", len(batch))
+                for _, _, (source, page) in batch:
+                    self._chunk_written(source, page)
+            except BaseException as e:
+                self._error = e
+
+    # --- 매니페스트 갱신 -------------------------------------------------
+
+    def _chunk_written(self, source: str, page: int):
+        with self._manifest_lock:
+            state = self._pending_pages[(source, page)]
+            state["remaining"] -= 1
+            done = state["remaining"] == 0
+        if done:
+            self._complete_page(source, page)
+
+    def _complete_page(self, source: str, page: int):
+        """페이지의 모든 청크가 기록되면 예전 청크 중 남는 것을 지우고 매니페스트에 반영합니다."""
+        with self._manifest_lock:
+            state = self._pending_pages.pop((source, page))
+            pages = self.manifest.files[source]["pages"]
+            stale_ids = set(pages.get(str(page), {}).get("chunk_ids", [])) - set(state["ids"])
+            if stale_ids:
+                self.vectorstore.delete(ids=list(stale_ids))
+            pages[str(page)] = {"hash": state["hash"], "chunk_ids": state["ids"]}
+            self.manifest.mark_dirty()
+            self.manifest.save()
+            self._pending_files[source]["remaining"] -= 1
+        self._maybe_finish_file(source)
+
+    def _maybe_finish_file(self, source: str):
+        with self._manifest_lock:
+            state = self._pending_files.get(source)
+            if state is None or not state["registered"] or state["remaining"] > 0:
+                return
+            del self._pending_files[source]
+            finish_file(self.vectorstore, self.manifest, source, state["seen"])
+
+    # --- 실행 ------------------------------------------------------------
+
+    def run(self, directory: str) -> dict:
+        """
+        폴더 안의 모든 PDF(하위 폴더 포함)를 적재합니다.
+
+        Returns:
+            단계별 처리량과 매니페스트 버전이 담긴 통계
+        """
+        root = Path(directory).resolve()
+        all_sources = sorted(str(p.resolve()) for p in root.rglob("*.pdf"))
+        with self._manifest_lock:
+            # 이 폴더 아래에서 사라진 파일만 정리 (app.py 등 다른 적재가 넣은 파일은 유지)
+            removed_files = remove_missing_sources(self.vectorstore, self.manifest, all_sources, root=str(root))
+            sources = [s for s in all_sources if not is_unchanged(self.manifest, s)]
+
+        write_queue = queue.Queue(maxsize=self.write_queue_size)
+        writer = threading.Thread(target=self._writer, args=(write_queue,), name="ingest-writer", daemon=True)
+        writer.start()
+
+        inflight = threading.BoundedSemaphore(self.embed_concurrency * 2)
+        # 오류로 멈추면 분할·추출 제너레이터를 닫아 프로세스 풀까지 정리
+        with closing(self._iter_batches(sources)) as batches, \
+                ThreadPoolExecutor(max_workers=self.embed_concurrency, thread_name_prefix="ingest-embed") as pool:
+            for batch in batches:
+                if self._error is not None:
+                    break
+                # 진행 중인 배치가 가득 차면 새 배치를 만들지 않고 대기
+                inflight.acquire()
+                pool.submit(self._embed_batch, batch, write_queue, inflight)
+
+        write_queue.put(_STOP)
+        writer.join()
+        if self._error is not None:
+            raise self._error
+
+        with self._manifest_lock:
+            if self.manifest.commit_version():
+                self.manifest.save()
+
+        report = self.stats.report()
+        report.update({
+            "files": len(all_sources),
+            "skipped_files": len(all_sources) - len(sources),
+            "removed_files": removed_files,
+            "version": self.manifest.version,
+        })
+        return report
+
+if __name__ == "__main__":
+    from langchain_chroma import Chroma
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from core.embedding_cache import CachedEmbeddings
+    from ingest import CHROMA_DIR, COLLECTION_NAME, EMBEDDING_CACHE_PATH
+
+    parser = argparse.ArgumentParser(description="PDF 폴더를 벡터 DB에 병렬로 적재합니다.")
+    parser.add_argument("directory", help="PDF 파일이 들어 있는 폴더")
+    parser.add_argument("--workers", type=int, default=None, help="페이지 추출 프로세스 수")
+    parser.add_argument("--batch-size", type=int, default=64, help="임베딩 배치 당 최대 청크 수")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시에 진행할 임베딩 요청 수")
+    args = parser.parse_args()
+
+    embeddings = CachedEmbeddings(
+        GoogleGenerativeAIEmbeddings(
+            model="models/embedding-001",
+            google_api_key=os.getenv("GEMINI_API_KEY")
+        ),
+        db_path=EMBEDDING_CACHE_PATH
+    )
+    vectorstore = Chroma(
+        collection_name=COLLECTION_NAME,
+        persist_directory=CHROMA_DIR,
+        embedding_function=embeddings
+    )
+    pipeline = IngestionPipeline(
+        vectorstore,
+        embeddings,
+        RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100),
+        extract_workers=args.workers,
+        batch_size=args.batch_size,
+        embed_concurrency=args.concurrency,
+    )
+    print(pipeline.run(args.directory))
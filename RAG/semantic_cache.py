@@ -0,0 +1,191 @@
+"""
+의미 기반 답변 캐시 모듈
+
+질문을 임베딩하여 이전 질문들과의 코사인 유사도를 한 번의 행렬 곱으로 계산하고,
+임계값 이상으로 비슷한 질문이 있으면 저장해 둔 답변을 바로 반환합니다.
+모든 항목에는 답변을 만들 때의 컬렉션 버전(매니페스트 version)이 함께 저장되며,
+문서가 다시 적재되어 버전이 바뀌면 이전 버전의 항목은 자동으로 무효화됩니다.
+"""
+import json
+import os
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+class SemanticCache:
+    """
+    질문 임베딩 행렬 기반의 답변 캐시
+
+    벡터는 L2 정규화된 float32 행렬에 행 단위로 저장되므로 조회는 `matrix @ query` 한 번이면 됩니다.
+    가득 차면 가장 오래 사용되지 않은 항목부터 교체합니다.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        threshold: float = 0.92,
+        max_entries: int = 1024,
+        path: Optional[str] = None,
+    ):
+        """
+        Args:
+            embeddings: 질문 임베딩에 사용할 객체 (검색기와 같은 임베딩을 쓰면 질의 임베딩 캐시를 공유)
+            threshold: 캐시 적중으로 볼 최소 코사인 유사도
+            max_entries: 최대 항목 수
+            path: 저장 경로 (확장자 없이, .npy/.json 두 파일로 저장. 없으면 메모리에만 유지)
+        """
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = path
+        self.stats = {"hits": 0, "misses": 0, "invalidated": 0, "evictions": 0}
+
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None  # (용량, 차원)
+        self._entries: List[dict] = []  # 행 번호와 같은 순서 ({"question", "answer", "version", "last_used"})
+
+        if path:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _ensure_capacity(self, dim: int):
+        """행렬 용량이 부족하면 두 배로 늘립니다. (추가할 때마다 전체를 복사하지 않도록)"""
+        if self._matrix is None:
+            self._matrix = np.zeros((min(16, self.max_entries), dim), dtype=np.float32)
+        elif len(self._entries) >= self._matrix.shape[0]:
+            grown = np.zeros((min(self._matrix.shape[0] * 2, self.max_entries), dim), dtype=np.float32)
+            grown[:self._matrix.shape[0]] = self._matrix
+            self._matrix = grown
+
+    def _compact(self, keep: List[int]):
+        """keep에 있는 행만 남깁니다."""
+        self._entries = [self._entries[i] for i in keep]
+        if self._matrix is not None:
+            rows = self._matrix[keep]
+            self._matrix = np.zeros((max(len(keep), min(16, self.max_entries)), self._matrix.shape[1]), dtype=np.float32)
+            self._matrix[:len(keep)] = rows
+
+    def invalidate(self, version: Optional[int] = None) -> int:
+        """
+        다른 버전에서 만들어진 항목을 지웁니다. (version이 없으면 전부 삭제)
+
+        Returns:
+            삭제한 항목 수
+        """
+        with self._lock:
+            keep = [i for i, e in enumerate(self._entries) if version is not None and e["version"] == version]
+            removed = len(self._entries) - len(keep)
+            if removed:
+                self._compact(keep)
+                self.stats["invalidated"] += removed
+                self._save()
+            return removed
+
+    def lookup(self, question: str, version: int, vector: Optional[np.ndarray] = None) -> Optional[dict]:
+        """
+        비슷한 이전 질문의 답변을 찾습니다.
+
+        Args:
+            question: 질문
+            version: 현재 컬렉션 버전 (다른 버전의 답변은 사용하지 않음)
+            vector: 이미 계산한 질문 임베딩 (없으면 새로 임베딩)
+
+        Returns:
+            {"answer", "question", "version", "score"} 또는 None
+        """
+        query = self._embed(question) if vector is None else vector
+        with self._lock:
+            count = len(self._entries)
+            if count:
+                scores = self._matrix[:count] @ query
+                # 다른 버전의 항목은 후보에서 제외
+                stale = np.fromiter((e["version"] != version for e in self._entries), dtype=bool, count=count)
+                scores[stale] = -1.0
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    entry = self._entries[best]
+                    entry["last_used"] = time.time()
+                    self.stats["hits"] += 1
+                    return {
+                        "answer": entry["answer"],
+                        "question": entry["question"],
+                        "version": entry["version"],
+                        "score": float(scores[best]),
+                    }
+            self.stats["misses"] += 1
+            return None
+
+    def add(self, question: str, answer: str, version: int, vector: Optional[np.ndarray] = None):
+        """질문과 답변을 컬렉션 버전과 함께 저장합니다."""
+        vector = self._embed(question) if vector is None else vector
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # 가장 오래 사용되지 않은 항목을 교체
+                row = min(range(len(self._entries)), key=lambda i: self._entries[i]["last_used"])
+                self.stats["evictions"] += 1
+            else:
+                self._ensure_capacity(len(vector))
+                row = len(self._entries)
+                self._entries.append(None)
+            self._matrix[row] = vector
+            self._entries[row] = {
+                "question": question,
+                "answer": answer,
+                "version": version,
+                "last_used": time.time(),
+            }
+            self._save()
+
+    def get_or_generate(self, question: str, version: int, generate) -> dict:
+        """
+        캐시에서 답변을 찾고, 없으면 generate(question)으로 만들어 저장합니다.
+
+        Returns:
+            {"answer", "version", "cached", "score"}
+        """
+        vector = self._embed(question)
+        hit = self.lookup(question, version, vector=vector)
+        if hit:
+            return {"answer": hit["answer"], "version": hit["version"], "cached": True, "score": hit["score"]}
+
+        answer = generate(question)
+        self.add(question, answer, version, vector=vector)
+        return {"answer": answer, "version": version, "cached": False, "score": None}
+
+    def _save(self):
+        """임시 파일에 쓴 뒤 교체합니다. (호출자가 잠금을 잡은 상태)"""
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        count = len(self._entries)
+        matrix = self._matrix[:count] if self._matrix is not None else np.zeros((0, 0), dtype=np.float32)
+        with open(f"{self.path}.npy.tmp", "wb") as f:
+            np.save(f, matrix)
+        with open(f"{self.path}.json.tmp", "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(f"{self.path}.npy.tmp", f"{self.path}.npy")
+        os.replace(f"{self.path}.json.tmp", f"{self.path}.json")
+
+    def _load(self):
+        try:
+            with open(f"{self.path}.json", "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            matrix = np.load(f"{self.path}.npy")
+        except (OSError, ValueError):
+            return
+        if len(entries) != len(matrix) or not entries:
+            return
+        entries, matrix = entries[-self.max_entries:], matrix[-self.max_entries:]
+        self._entries = entries
+        self._matrix = np.zeros((max(len(entries), min(16, self.max_entries)), matrix.shape[1]), dtype=np.float32)
+        self._matrix[:len(entries)] = matrix
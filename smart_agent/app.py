@@ -2,18 +2,50 @@ import streamlit as st
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage, AIMessage
 from core.agent_factory import AgentFactory, AgentType
-import uuid
-from datetime import datetime
+from core.streaming import stream_agent_events, content_to_text
+from core.history import ConversationWindow
+from core.chat_store import ChatBusyError, get_chat_store
+from core.tracing import tracer, load_turns, summarize_turns
+from core.gemini_governor import governor
 from pathlib import Path
 import re
+import os
+import uuid
 
 load_dotenv()
 
 st.set_page_config(page_title="Smart AI Agent", page_icon="🤖", layout="wide")
 
-# 채팅 히스토리 관리 초기화
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = {}  # {chat_id: {"messages": [...], "title": "...", "created_at": "...", "agent_type": "..."}}
+@st.cache_resource(show_spinner="에이전트를 준비하는 중...")
+def warm_up_agents():
+    """프로세스 시작 시 한 번만 모든 에이전트를 미리 생성합니다. (AGENT_WARMUP=1)"""
+    return AgentFactory.warm_up()
+
+if os.getenv("AGENT_WARMUP", "0") == "1":
+    warm_up_agents()
+
+# 채팅 기록 저장소 (SQLite, 프로세스 전역 공유)
+chat_store = get_chat_store()
+
+def get_chat_owner() -> str:
+    """
+    사이드바 채팅 목록의 소유자를 정합니다.
+
+    Streamlit 로그인(st.login, OIDC)을 사용하면 로그인한 사용자별로 채팅을 저장하여 다른 세션에서도 이어서 볼 수 있고,
+    로그인하지 않은 세션은 세션마다 만든 임의 id를 사용하여 그 세션에서만 보입니다.
+    (URL 파라미터처럼 사용자가 바꿀 수 있는 값은 소유자로 받지 않음)
+    """
+    if st.user.get("is_logged_in"):
+        return f"user:{st.user.get('email') or st.user.get('sub')}"
+    if "session_owner" not in st.session_state:
+        st.session_state.session_owner = f"session:{uuid.uuid4().hex}"
+    return st.session_state.session_owner
+
+# 채팅 소유자
+CHAT_OWNER = get_chat_owner()
+
+# 사이드바에 한 번에 불러올 채팅 수
+CHAT_PAGE_SIZE = 20
 
 if "current_chat_id" not in st.session_state:
     st.session_state.current_chat_id = None
@@ -21,61 +53,95 @@ if "current_chat_id" not in st.session_state:
 if "show_agent_selection" not in st.session_state:
     st.session_state.show_agent_selection = False
 
-# 에이전트 캐시 (타입별로 에이전트 인스턴스 저장)
-if "agent_cache" not in st.session_state:
-    st.session_state.agent_cache = {}
+if "chat_list_limit" not in st.session_state:
+    st.session_state.chat_list_limit = CHAT_PAGE_SIZE
+
+# 현재 열려 있는 채팅의 메시지 (채팅을 열 때 한 번만 DB에서 불러옴)
+if "loaded_chat" not in st.session_state:
+    st.session_state.loaded_chat = {"chat_id": None, "messages": []}
+
+def get_current_chat():
+    """현재 채팅의 메타데이터를 가져옵니다. (메시지 제외)"""
+    if not st.session_state.current_chat_id:
+        return None
+    return chat_store.get_chat(st.session_state.current_chat_id)
 
 # 현재 채팅의 메시지 가져오기
 def get_current_messages():
-    if st.session_state.current_chat_id and st.session_state.current_chat_id in st.session_state.chat_history:
-        return st.session_state.chat_history[st.session_state.current_chat_id]["messages"]
-    return []
+    chat_id = st.session_state.current_chat_id
+    if not chat_id:
+        return []
+    if st.session_state.loaded_chat["chat_id"] != chat_id:
+        st.session_state.loaded_chat = {"chat_id": chat_id, "messages": chat_store.load_messages(chat_id)}
+    return st.session_state.loaded_chat["messages"]
 
-def set_current_messages(messages):
-    if st.session_state.current_chat_id:
-        if st.session_state.current_chat_id not in st.session_state.chat_history:
-            st.session_state.chat_history[st.session_state.current_chat_id] = {
-                "messages": [],
-                "title": "새 채팅",
-                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                "agent_type": None
-            }
-        st.session_state.chat_history[st.session_state.current_chat_id]["messages"] = messages
+def append_current_messages(messages, lease=None):
+    """현재 채팅에 메시지를 추가하고 DB에 저장합니다. (lease: 이 세션이 잡은 답변 생성 임대)"""
+    chat_id = st.session_state.current_chat_id
+    if chat_id:
+        current_messages = get_current_messages()
+        chat_store.append_messages(chat_id, messages, lease=lease)
+        current_messages.extend(messages)
 
 def get_current_agent():
     """현재 채팅의 에이전트를 가져옵니다."""
-    if not st.session_state.current_chat_id:
-        return None
-    
-    chat_data = st.session_state.chat_history.get(st.session_state.current_chat_id)
+    chat_data = get_current_chat()
     if not chat_data or not chat_data.get("agent_type"):
         return None
     
     agent_type = AgentType(chat_data["agent_type"])
     
-    # 에이전트 캐시에서 가져오거나 생성
-    if agent_type not in st.session_state.agent_cache:
-        try:
-            st.session_state.agent_cache[agent_type] = AgentFactory.create_agent(agent_type)
-        except NotImplementedError as e:
-            st.error(str(e))
-            return None
-    
-    return st.session_state.agent_cache[agent_type]
+    # 프로세스 전역 레지스트리에서 가져오거나 생성 (모든 세션이 공유)
+    try:
+        return AgentFactory.create_agent(agent_type)
+    except NotImplementedError as e:
+        st.error(str(e))
+        return None
 
 def create_new_chat(agent_type: AgentType):
     """새 채팅을 생성합니다."""
-    new_chat_id = str(uuid.uuid4())
-    st.session_state.current_chat_id = new_chat_id
-    st.session_state.chat_history[new_chat_id] = {
-        "messages": [],
-        "title": "새 채팅",
-        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M"),
-        "agent_type": agent_type.value
-    }
+    new_chat = chat_store.create_chat(agent_type.value, owner=CHAT_OWNER)
+    st.session_state.current_chat_id = new_chat["id"]
     st.session_state.show_agent_selection = False
     st.rerun()
 
+def run_agent_streaming(agent, inputs, placeholder, config=None):
+    """
+    에이전트를 스트리밍 모드로 실행하며 토큰과 도구 진행 상황을 즉시 표시합니다.
+    
+    Args:
+        config: 그래프 실행 설정 (추적 콜백 등)
+    
+    Returns:
+        invoke 결과와 같은 형태의 최종 상태 ({"messages": [...]})
+    """
+    streamed_text = ""
+    tool_status = None
+    final_state = {"messages": list(inputs["messages"])}
+    
+    for event in stream_agent_events(agent, inputs, config):
+        if event["type"] == "token":
+            streamed_text += event["text"]
+            placeholder.markdown(streamed_text + "▌")
+        elif event["type"] == "tool_start":
+            # 도구 호출 전 생성된 텍스트는 중간 출력이므로 비움
+            streamed_text = ""
+            placeholder.empty()
+            if tool_status is None:
+                tool_status = st.status("🔧 도구를 사용하는 중...", expanded=False)
+            tool_status.update(label=f"🔧 {event['name']} 실행 중...", state="running")
+            tool_status.write(f"▶️ {event['name']} 호출")
+        elif event["type"] == "tool_end":
+            if tool_status is not None:
+                tool_status.write(f"✅ {event['name']} 완료")
+        elif event["type"] == "final":
+            final_state = {"messages": event["messages"]}
+    
+    if tool_status is not None:
+        tool_status.update(label="🔧 도구 실행 완료", state="complete")
+    
+    return final_state
+
 # 사이드바 - 채팅 관리
 with st.sidebar:
     st.header("💬 채팅 관리")
@@ -88,25 +154,14 @@ with st.sidebar:
     st.markdown("---")
     st.subheader("📋 채팅 목록")
     
-    # 채팅 목록 표시
-    if st.session_state.chat_history:
-        # 최신순으로 정렬
-        sorted_chats = sorted(
-            st.session_state.chat_history.items(),
-            key=lambda x: x[1]["created_at"],
-            reverse=True
-        )
+    # 채팅 목록 표시 (최신순, 페이지 단위로 불러옴)
+    total_chats = chat_store.count_chats(CHAT_OWNER)
+    if total_chats:
+        chats = chat_store.list_chats(CHAT_OWNER, limit=st.session_state.chat_list_limit)
         
-        for chat_id, chat_data in sorted_chats:
-            # 채팅 제목 생성 (첫 번째 메시지 기반)
-            if not chat_data["messages"]:
-                title = "새 채팅"
-            else:
-                first_user_msg = next(
-                    (msg.content for msg in chat_data["messages"] if isinstance(msg, HumanMessage)),
-                    "새 채팅"
-                )
-                title = first_user_msg[:25] + "..." if len(first_user_msg) > 25 else first_user_msg
+        for chat_data in chats:
+            chat_id = chat_data["id"]
+            title = chat_data["title"]
             
             # AI 타입 아이콘 추가
             agent_type_icon = ""
@@ -117,11 +172,11 @@ with st.sidebar:
                     agent_type_icon = agent_info["icon"] + " "
                 except:
                     pass
-            
+                
             # 현재 채팅인지 표시
             is_active = chat_id == st.session_state.current_chat_id
             button_label = f"{agent_type_icon}{title}" if not is_active else f"✅ {agent_type_icon}{title}"
-            
+                
             # 채팅 버튼과 삭제 버튼을 같은 행에 배치
             col1, col2 = st.columns([4, 1])
             with col1:
@@ -133,36 +188,105 @@ with st.sidebar:
                 ):
                     st.session_state.current_chat_id = chat_id
                     st.rerun()
-            
+                
             with col2:
                 if st.button("🗑️", key=f"delete_{chat_id}", help="채팅 삭제"):
-                    if chat_id in st.session_state.chat_history:
-                        del st.session_state.chat_history[chat_id]
+                    chat_store.delete_chat(chat_id)
                     if st.session_state.current_chat_id == chat_id:
-                        # 삭제된 채팅이 현재 채팅이면 새 채팅 생성
-                        if st.session_state.chat_history:
-                            st.session_state.current_chat_id = list(st.session_state.chat_history.keys())[0]
-                        else:
-                            st.session_state.current_chat_id = None
+                        # 삭제된 채팅이 현재 채팅이면 가장 최근 채팅으로 이동
+                        latest = chat_store.list_chats(CHAT_OWNER, limit=1)
+                        st.session_state.current_chat_id = latest[0]["id"] if latest else None
                     st.rerun()
+            
+        # 나머지 채팅은 필요할 때만 더 불러옴
+        if total_chats > len(chats):
+            if st.button(f"⬇️ 더 보기 ({total_chats - len(chats)}개 남음)", use_container_width=True):
+                st.session_state.chat_list_limit += CHAT_PAGE_SIZE
+                st.rerun()
     else:
         st.caption("채팅 기록이 없습니다. 새 채팅을 시작하세요.")
-    
+        
     st.markdown("---")
-    
+        
     # 현재 채팅의 AI 타입 표시
-    if st.session_state.current_chat_id:
-        chat_data = st.session_state.chat_history.get(st.session_state.current_chat_id)
-        if chat_data and chat_data.get("agent_type"):
-            agent_type = AgentType(chat_data["agent_type"])
-            agent_info = AgentFactory.get_agent_info(agent_type)
-            st.caption(f"현재 AI: {agent_info['icon']} {agent_info['name']}")
+    chat_data = get_current_chat()
+    if chat_data and chat_data.get("agent_type"):
+        agent_type = AgentType(chat_data["agent_type"])
+        agent_info = AgentFactory.get_agent_info(agent_type)
+        st.caption(f"현재 AI: {agent_info['icon']} {agent_info['name']}")
+        
+    # 응답 스트리밍 여부 (끄면 전체 실행이 끝난 뒤 한 번에 표시)
+    st.toggle("⚡ 실시간 스트리밍", value=True, key="streaming_enabled")
+        
+    # 실행 추적 결과(느린 턴, 구간별 지연 시간) 보기
+    st.toggle("📊 진단", value=False, key="show_diagnostics")
+
+def render_diagnostics(limit: int = 200):
+    """최근 턴의 추적 기록으로 느린 턴과 노드·LLM·도구별 p50/p95 지연 시간을 표시합니다."""
+    st.title("📊 진단")
+        
+    # Gemini 호출 관문 상태 (이 프로세스 기준)
+    governor_stats = governor.stats()
+    cols = st.columns(5)
+    cols[0].metric("Gemini 대기", governor_stats["queued"], help=f"최대 {governor_stats['max_queued']}")
+    cols[1].metric("실행 중", f"{governor_stats['in_flight']}/{governor.max_concurrency}")
+    cols[2].metric("호출", governor_stats["calls"])
+    cols[3].metric("재시도", governor_stats["retries"])
+    cols[4].metric("평균 대기(초)", f"{governor_stats['avg_wait_seconds']:.2f}")
+        
+    turns = load_turns(tracer.sink_path, limit=limit)
+    if not turns:
+        st.info("아직 기록된 실행 추적이 없습니다. 대화를 진행한 뒤 다시 확인하세요.")
+        return
+    st.caption(f"최근 {len(turns)}개 턴 기준 (추적 파일: {tracer.sink_path})")
+        
+    st.subheader("🐢 가장 느린 턴")
+    slowest = sorted(turns, key=lambda turn: turn["duration_ms"], reverse=True)[:10]
+    st.dataframe(
+        [
+            {
+                "에이전트": turn["name"],
+                "소요(ms)": round(turn["duration_ms"], 1),
+                "반복": turn.get("iterations", 0),
+                "입력 토큰": turn.get("tokens", {}).get("input", 0),
+                "출력 토큰": turn.get("tokens", {}).get("output", 0),
+                "span 수": len(turn.get("spans", [])),
+                "오류": turn.get("error", ""),
+            }
+            for turn in slowest
+        ],
+        use_container_width=True,
+    )
+    for turn in slowest[:3]:
+        with st.expander(f"{turn['name']} · {turn['duration_ms']:.0f}ms · {turn['trace_id'][:8]}"):
+            st.dataframe(
+                [
+                    {
+                        "시작(ms)": span["offset_ms"],
+                        "종류": span["kind"],
+                        "이름": span["name"],
+                        "소요(ms)": span["duration_ms"],
+                        "반복": span.get("iteration"),
+                        "토큰(입/출)": f"{span.get('input_tokens', '')}/{span.get('output_tokens', '')}",
+                        "오류": span.get("error", ""),
+                    }
+                    for span in turn.get("spans", [])
+                ],
+                use_container_width=True,
+            )
+        
+    st.subheader("⏱️ 구간별 지연 시간")
+    st.dataframe(summarize_turns(turns), use_container_width=True)
+
+if st.session_state.get("show_diagnostics"):
+    render_diagnostics()
+    st.stop()
 
 # AI 타입 선택 화면
 if st.session_state.show_agent_selection or st.session_state.current_chat_id is None:
     st.title("🤖 AI 에이전트 선택")
     st.markdown("사용할 AI 에이전트를 선택하세요.")
-    
+        
     # 사용 가능한 AI 타입들
     available_agents = [
         AgentType.WEB_SEARCH,
@@ -170,14 +294,14 @@ if st.session_state.show_agent_selection or st.session_state.current_chat_id is
         AgentType.VIDEO_QA,
         AgentType.PERSONA_CHATBOT
     ]
-    
+        
     # AI 타입별 카드 표시
     cols = st.columns(len(available_agents))
-    
+        
     for idx, agent_type in enumerate(available_agents):
         with cols[idx]:
             agent_info = AgentFactory.get_agent_info(agent_type)
-            
+                
             # 카드 스타일
             st.markdown(f"""
             <div style="
@@ -197,40 +321,38 @@ if st.session_state.show_agent_selection or st.session_state.current_chat_id is
                 <p style="color: #666; font-size: 14px;">{agent_info['description']}</p>
             </div>
             """, unsafe_allow_html=True)
-            
+                
             # 선택 버튼
             if st.button(f"{agent_info['name']} 선택", key=f"select_{agent_type.value}", use_container_width=True):
                 try:
                     create_new_chat(agent_type)
                 except NotImplementedError as e:
                     st.error(str(e))
-    
+        
     st.markdown("---")
     st.caption("💡 각 AI 에이전트는 특정 작업에 최적화되어 있습니다.")
 
 # 현재 채팅이 있고 AI가 선택된 경우
 elif st.session_state.current_chat_id:
-    chat_data = st.session_state.chat_history.get(st.session_state.current_chat_id)
-    
+    chat_data = get_current_chat()
+        
     if chat_data and chat_data.get("agent_type"):
         # 현재 채팅의 AI 정보 표시
         agent_type = AgentType(chat_data["agent_type"])
         agent_info = AgentFactory.get_agent_info(agent_type)
-        
+            
         st.title(f"{agent_info['icon']} {agent_info['name']}")
         st.caption(agent_info['description'])
-        
+            
         # 영상 Q&A 에이전트인 경우 유튜브 링크 입력 섹션 추가
         if agent_type == AgentType.VIDEO_QA:
             st.markdown("---")
             st.subheader("📹 유튜브 영상 링크")
-            
+                
             # 세션 상태 초기화
             if "youtube_url" not in st.session_state:
                 st.session_state.youtube_url = {}
-            if "youtube_summary" not in st.session_state:
-                st.session_state.youtube_summary = {}
-            
+                
             # 유튜브 링크 입력
             youtube_link = st.text_input(
                 "유튜브 영상 URL을 입력하세요",
@@ -238,31 +360,31 @@ elif st.session_state.current_chat_id:
                 key=f"youtube_input_{st.session_state.current_chat_id}",
                 placeholder="예: https://www.youtube.com/watch?v=VIDEO_ID 또는 https://youtu.be/VIDEO_ID"
             )
-            
+                
             if youtube_link:
                 st.session_state.youtube_url[st.session_state.current_chat_id] = youtube_link
-                
+                    
                 # URL 검증
                 youtube_pattern = r'(?:https?://)?(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/)([a-zA-Z0-9_-]{11})'
                 if re.search(youtube_pattern, youtube_link):
                     st.success(f"✅ 유튜브 링크가 입력되었습니다")
-                    
+                        
                     # 영상 요약 버튼
                     if st.button("📝 영상 요약 생성", key=f"summarize_{st.session_state.current_chat_id}", use_container_width=True):
                         with st.spinner("영상을 다운로드하고 분석 중... (시간이 걸릴 수 있습니다)"):
                             from core.video_tools import summarize_youtube_video
+                            # 이미 요약한 영상이면 요약 캐시에서 바로 반환됨
                             summary = summarize_youtube_video.invoke({"youtube_url": youtube_link})
-                            
+                                
                             if "오류" in summary or "실패" in summary or "너무 큽니다" in summary:
                                 st.error(summary)
                             else:
                                 st.markdown("### 📝 영상 요약")
                                 st.markdown(summary)
-                                st.session_state.youtube_summary[st.session_state.current_chat_id] = summary
                                 st.success("✅ 영상 요약이 완료되었습니다. 이제 질문을 할 수 있습니다!")
                 else:
                     st.error("❌ 유효하지 않은 유튜브 URL입니다. 올바른 형식의 URL을 입력해주세요.")
-            
+                
             # 현재 입력된 유튜브 링크 표시
             if st.session_state.current_chat_id in st.session_state.youtube_url:
                 youtube_link = st.session_state.youtube_url[st.session_state.current_chat_id]
@@ -273,15 +395,20 @@ elif st.session_state.current_chat_id:
                     if match:
                         video_id = match.group(1)
                         st.info(f"📹 현재 영상: https://www.youtube.com/watch?v={video_id}")
-                        
-                        if st.session_state.current_chat_id in st.session_state.youtube_summary:
+                            
+                        # 요약 여부는 영상 요약 캐시에서 확인 (세션·프로세스가 바뀌어도 유지됨)
+                        from core.video_tools import get_cached_summary
+                        cached_summary = get_cached_summary(youtube_link)
+                        if cached_summary:
                             st.success("✅ 요약 완료 - 질문을 입력하세요!")
-            
+                            with st.expander("📝 영상 요약 보기"):
+                                st.markdown(cached_summary)
+                
             st.markdown("---")
-        
+            
         # 현재 채팅의 메시지 표시
         current_messages = get_current_messages()
-        
+            
         for message in current_messages:
             role = "user" if isinstance(message, HumanMessage) else "assistant"
             with st.chat_message(role):
@@ -289,49 +416,58 @@ elif st.session_state.current_chat_id:
 
 # 사용자 입력 처리
 if st.session_state.current_chat_id and not st.session_state.show_agent_selection:
-    chat_data = st.session_state.chat_history.get(st.session_state.current_chat_id)
-    
+    chat_data = get_current_chat()
+        
     if chat_data and chat_data.get("agent_type"):
         agent = get_current_agent()
-        
+            
         if agent:
             current_messages = get_current_messages()
             agent_info = AgentFactory.get_agent_info(AgentType(chat_data["agent_type"]))
-            
+                
             placeholder_text = {
                 AgentType.WEB_SEARCH: "무엇이든 물어보세요 (예: 오늘 삼성전자 주가는?, 최신 AI 트렌드는?)",
                 AgentType.CODE_GENERATOR: "코드 생성 요청을 입력하세요 (예: Python으로 웹 크롤러 만들어줘)",
                 AgentType.VIDEO_QA: "유튜브 영상에 대한 질문을 입력하세요 (예: 이 영상의 주요 내용은?, 핵심 메시지는?)",
                 AgentType.PERSONA_CHATBOT: "트럼프 대통령 말투로 대화해보세요!"
             }.get(AgentType(chat_data["agent_type"]), "무엇이든 물어보세요")
-            
-            if prompt := st.chat_input(placeholder_text):
-                # 메시지 추가
-                current_messages.append(HumanMessage(content=prompt))
-                set_current_messages(current_messages)
                 
-                with st.chat_message("user"):
-                    st.markdown(prompt)
+            if prompt := st.chat_input(placeholder_text):
+                # 같은 채팅에 다른 세션이나 HTTP 서비스가 답변을 생성 중이면 기다리도록 안내 (임대는 SQLite에 기록)
+                lease = chat_store.acquire_generation(chat_data["id"])
+                if lease is None:
+                    st.warning("이 채팅은 다른 곳에서 답변을 생성 중입니다. 답변이 끝난 뒤 다시 보내주세요.")
+                    st.stop()
+                    
+                try:
+                    # 메시지 추가
+                    append_current_messages([HumanMessage(content=prompt)], lease=lease)
+                    
+                    with st.chat_message("user"):
+                        st.markdown(prompt)
 
-                with st.chat_message("assistant"):
-                    with st.spinner(f"🤔 {agent_info['name']}가 생각 중..."):
-                        inputs = {"messages": current_messages}
-                        final_state = agent.app.invoke(inputs)
+                    with st.chat_message("assistant"):
+                        # 답변 영역 (스트리밍 중에는 토큰이 이 자리에 누적되어 표시됨)
+                        response_placeholder = st.empty()
+                        # 토큰 예산에 맞춰 오래된 턴은 요약으로 접어서 전달
+                        window = ConversationWindow(**AgentFactory.get_history_policy(AgentType(chat_data["agent_type"])))
+                        windowed_messages, history_state = window.prepare(current_messages, chat_data.get("history_state"))
+                        chat_store.update_history_state(chat_data["id"], history_state)
+                        inputs = {"messages": windowed_messages}
+                        
+                        # 노드·LLM 호출·도구 실행별 소요 시간을 추적 (진단 페이지에서 확인)
+                        with tracer.trace_turn(chat_data["agent_type"], {"chat_id": chat_data["id"]}) as turn:
+                            config = {"callbacks": [turn.handler]}
+                            if st.session_state.get("streaming_enabled", True):
+                                final_state = run_agent_streaming(agent, inputs, response_placeholder, config)
+                            else:
+                                with st.spinner(f"🤔 {agent_info['name']}가 생각 중..."):
+                                    final_state = agent.app.invoke(inputs, config=config)
                         
                         last_message = final_state["messages"][-1]
-                        response_content = last_message.content
                         
                         # 응답 파싱
-                        if isinstance(response_content, list):
-                            text_parts = []
-                            for item in response_content:
-                                if isinstance(item, dict) and "text" in item:
-                                    text_parts.append(item["text"])
-                                elif isinstance(item, str):
-                                    text_parts.append(item)
-                            response_content = "\n".join(text_parts) if text_parts else str(response_content)
-                        elif isinstance(response_content, dict):
-                            response_content = response_content.get("text", str(response_content))
+                        response_content = content_to_text(last_message.content) or str(last_message.content)
                         
                         # 웹 검색 사용 여부 확인 (웹 검색 에이전트인 경우)
                         if AgentType(chat_data["agent_type"]) == AgentType.WEB_SEARCH:
@@ -431,8 +567,11 @@ if st.session_state.current_chat_id and not st.session_state.show_agent_selectio
                                                 result = save_code.invoke({"code": js_code, "filename": "generated_js", "language": "javascript"})
                                                 st.success(result)
                         
-                        st.markdown(response_content)
+                        response_placeholder.markdown(response_content)
                         
                         # 응답 메시지 저장
-                        current_messages.append(AIMessage(content=response_content))
-                        set_current_messages(current_messages)
\ No newline at end of file
+                        append_current_messages([AIMessage(content=response_content)], lease=lease)
+                except ChatBusyError:
+                    st.error("답변을 생성하는 동안 다른 요청이 이 채팅을 사용하기 시작하여 답변을 저장하지 못했습니다.")
+                finally:
+                    chat_store.release_generation(chat_data["id"], lease)
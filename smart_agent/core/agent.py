@@ -4,31 +4,40 @@ from typing import Annotated, TypedDict, List
 
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 from langgraph.graph.message import add_messages
 
-from core.tools import tools
+from core.tools import tools as web_tools
 from core.code_tools import code_tools
 from core.video_tools import video_tools
+from core.history import SUMMARY_PREFIX
+from core.gemini_governor import CLIENT_MAX_RETRIES, govern_chat_model
 
 class AgentState(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
 
 class SmartRAGAgent:
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
+    def __init__(self, cache=None, llm=None, tools=None):
+        # llm·tools를 넘기면 Gemini와 실제 도구 대신 사용 (부하 테스트용 가짜 모델·도구 등)
+        self.llm = llm or ChatGoogleGenerativeAI(
             model="gemini-2.5-flash",
             temperature=0,
-            google_api_key=os.getenv("GEMINI_API_KEY")
+            google_api_key=os.getenv("GEMINI_API_KEY"),
+            max_retries=CLIENT_MAX_RETRIES,  # 재시도는 관문(governor)이 담당
+            cache=cache  # 같은 메시지 목록이면 저장된 응답 사용 (None이면 캐시 안 함)
         )
-        self.llm_with_tools = self.llm.bind_tools(tools)
+        # 원격 호출만 관문(governor)을 거치도록 함 (응답 캐시 적중은 속도·동시 실행 제한에 포함하지 않음)
+        self.llm = govern_chat_model(self.llm)
+        self.tools = tools if tools is not None else web_tools
+        self.llm_with_tools = self.llm.bind_tools(self.tools)
         self.workflow = StateGraph(AgentState)
         self._build_graph()
 
     def _build_graph(self):
-        self.workflow.add_node("agent", self.agent_node)
-        self.workflow.add_node("tools", ToolNode(tools))
+        self.workflow.add_node("agent", RunnableLambda(self.agent_node, afunc=self.aagent_node))
+        self.workflow.add_node("tools", ToolNode(self.tools))
         self.workflow.set_entry_point("agent")
         self.workflow.add_conditional_edges(
             "agent",
@@ -46,6 +55,11 @@ class SmartRAGAgent:
         response = self.llm_with_tools.invoke(messages)
         return {"messages": [response]}
 
+    async def aagent_node(self, state: AgentState):
+        messages = state["messages"]
+        response = await self.llm_with_tools.ainvoke(messages)
+        return {"messages": [response]}
+
     def should_continue(self, state: AgentState) -> str:
         last_message = state["messages"][-1]
         if hasattr(last_message, "tool_calls") and last_message.tool_calls:
@@ -53,19 +67,25 @@ class SmartRAGAgent:
         return "end"
 
 class CodeGeneratorAgent:
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
+    def __init__(self, cache=None, llm=None, tools=None):
+        # llm·tools를 넘기면 Gemini와 실제 도구 대신 사용 (부하 테스트용 가짜 모델·도구 등)
+        self.llm = llm or ChatGoogleGenerativeAI(
             model="gemini-2.5-flash",
             temperature=0.3,  # 코드 생성에는 약간의 창의성 허용
-            google_api_key=os.getenv("GEMINI_API_KEY")
+            google_api_key=os.getenv("GEMINI_API_KEY"),
+            max_retries=CLIENT_MAX_RETRIES,
+            cache=cache
         )
-        self.llm_with_tools = self.llm.bind_tools(code_tools)
+        # 원격 호출만 관문(governor)을 거치도록 함 (응답 캐시 적중은 속도·동시 실행 제한에 포함하지 않음)
+        self.llm = govern_chat_model(self.llm)
+        self.tools = tools if tools is not None else code_tools
+        self.llm_with_tools = self.llm.bind_tools(self.tools)
         self.workflow = StateGraph(AgentState)
         self._build_graph()
 
     def _build_graph(self):
-        self.workflow.add_node("agent", self.agent_node)
-        self.workflow.add_node("tools", ToolNode(code_tools))
+        self.workflow.add_node("agent", RunnableLambda(self.agent_node, afunc=self.aagent_node))
+        self.workflow.add_node("tools", ToolNode(self.tools))
         self.workflow.set_entry_point("agent")
         self.workflow.add_conditional_edges(
             "agent",
@@ -83,6 +103,11 @@ class CodeGeneratorAgent:
         response = self.llm_with_tools.invoke(messages)
         return {"messages": [response]}
 
+    async def aagent_node(self, state: AgentState):
+        messages = state["messages"]
+        response = await self.llm_with_tools.ainvoke(messages)
+        return {"messages": [response]}
+
     def should_continue(self, state: AgentState) -> str:
         last_message = state["messages"][-1]
         if hasattr(last_message, "tool_calls") and last_message.tool_calls:
@@ -90,19 +115,25 @@ class CodeGeneratorAgent:
         return "end"
 
 class VideoQAAgent:
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
+    def __init__(self, cache=None, llm=None, tools=None):
+        # llm·tools를 넘기면 Gemini와 실제 도구 대신 사용 (부하 테스트용 가짜 모델·도구 등)
+        self.llm = llm or ChatGoogleGenerativeAI(
             model="gemini-2.5-flash",
             temperature=0,
-            google_api_key=os.getenv("GEMINI_API_KEY")
+            google_api_key=os.getenv("GEMINI_API_KEY"),
+            max_retries=CLIENT_MAX_RETRIES,
+            cache=cache  # 같은 메시지 목록이면 저장된 응답 사용 (None이면 캐시 안 함)
         )
-        self.llm_with_tools = self.llm.bind_tools(video_tools)
+        # 원격 호출만 관문(governor)을 거치도록 함 (응답 캐시 적중은 속도·동시 실행 제한에 포함하지 않음)
+        self.llm = govern_chat_model(self.llm)
+        self.tools = tools if tools is not None else video_tools
+        self.llm_with_tools = self.llm.bind_tools(self.tools)
         self.workflow = StateGraph(AgentState)
         self._build_graph()
 
     def _build_graph(self):
-        self.workflow.add_node("agent", self.agent_node)
-        self.workflow.add_node("tools", ToolNode(video_tools))
+        self.workflow.add_node("agent", RunnableLambda(self.agent_node, afunc=self.aagent_node))
+        self.workflow.add_node("tools", ToolNode(self.tools))
         self.workflow.set_entry_point("agent")
         self.workflow.add_conditional_edges(
             "agent",
@@ -120,6 +151,11 @@ class VideoQAAgent:
         response = self.llm_with_tools.invoke(messages)
         return {"messages": [response]}
 
+    async def aagent_node(self, state: AgentState):
+        messages = state["messages"]
+        response = await self.llm_with_tools.ainvoke(messages)
+        return {"messages": [response]}
+
     def should_continue(self, state: AgentState) -> str:
         last_message = state["messages"][-1]
         if hasattr(last_message, "tool_calls") and last_message.tool_calls:
@@ -129,12 +165,15 @@ class VideoQAAgent:
 class PersonaAgent:
     """페르소나 기반 챗봇 에이전트 (트럼프 대통령 말투)"""
     
-    def __init__(self, persona_name: str = "트럼프"):
-        self.llm = ChatGoogleGenerativeAI(
+    def __init__(self, persona_name: str = "트럼프", llm=None):
+        self.llm = llm or ChatGoogleGenerativeAI(
             model="gemini-2.5-flash",
             temperature=0.8,  # 창의성 높여서 말투 표현
-            google_api_key=os.getenv("GEMINI_API_KEY")
+            google_api_key=os.getenv("GEMINI_API_KEY"),
+            max_retries=CLIENT_MAX_RETRIES
         )
+        # 원격 호출만 관문(governor)을 거치도록 함 (응답 캐시 적중은 속도·동시 실행 제한에 포함하지 않음)
+        self.llm = govern_chat_model(self.llm)
         self.persona_name = persona_name
         self.workflow = StateGraph(AgentState)
         self._build_graph()
@@ -161,27 +200,32 @@ class PersonaAgent:
         return ""
     
     def _build_graph(self):
-        self.workflow.add_node("agent", self.agent_node)
+        self.workflow.add_node("agent", RunnableLambda(self.agent_node, afunc=self.aagent_node))
         self.workflow.set_entry_point("agent")
         self.workflow.add_edge("agent", END)
         self.app = self.workflow.compile()
     
-    def agent_node(self, state: AgentState):
-        messages = state["messages"]
-        
-        # 시스템 프롬프트를 첫 메시지에 추가
+    def _with_system_prompt(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """시스템 프롬프트를 첫 메시지에 추가"""
         system_prompt = self._get_system_prompt()
         if system_prompt:
             # 첫 메시지가 시스템 프롬프트가 아니면 추가
             if not messages or not isinstance(messages[0], SystemMessage):
-                messages_with_system = [SystemMessage(content=system_prompt)] + messages
-            else:
-                messages_with_system = messages
-        else:
-            messages_with_system = messages
-        
+                return [SystemMessage(content=system_prompt)] + messages
+            # 첫 메시지가 이전 대화 요약이면 페르소나 프롬프트와 합쳐서 하나의 시스템 메시지로 전달
+            if messages[0].content.startswith(SUMMARY_PREFIX):
+                return [SystemMessage(content=f"{system_prompt}\n\n{messages[0].content}")] + messages[1:]
+        return messages
+    
+    def agent_node(self, state: AgentState):
+        messages_with_system = self._with_system_prompt(state["messages"])
         response = self.llm.invoke(messages_with_system)
         return {"messages": [response]}
+    
+    async def aagent_node(self, state: AgentState):
+        messages_with_system = self._with_system_prompt(state["messages"])
+        response = await self.llm.ainvoke(messages_with_system)
+        return {"messages": [response]}
 
 if __name__ == "__main__":
     from dotenv import load_dotenv
@@ -191,4 +235,9 @@ if __name__ == "__main__":
     inputs = {"messages": [HumanMessage(content="삼성전자의 2024년 주가 전망에 대해 알려줘")]}
     
     for output in agent.app.stream(inputs):
-        print(f"단계: {list(output.keys())[0]}")
\ No newline at end of file
+        print(f"단계: {list(output.keys())[0]}")
+    
+    # 비동기 실행 (같은 턴의 여러 도구 호출이 동시에 실행됨)
+    import asyncio
+    final_state = asyncio.run(agent.app.ainvoke(inputs))
+    print(final_state["messages"][-1].content)
\ No newline at end of file
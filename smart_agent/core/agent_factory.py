@@ -4,6 +4,8 @@ AI 에이전트 팩토리 모듈
 """
 from enum import Enum
 from core.agent import SmartRAGAgent, CodeGeneratorAgent, VideoQAAgent, PersonaAgent
+from core.agent_registry import AgentRegistry
+from core.llm_cache import get_response_cache
 
 class AgentType(str, Enum):
     """사용 가능한 AI 에이전트 타입"""
@@ -17,28 +19,116 @@ class AgentFactory:
     """AI 에이전트를 생성하는 팩토리 클래스"""
     
     @staticmethod
-    def create_agent(agent_type: AgentType):
+    def create_agent(agent_type: AgentType, fresh: bool = False, llm=None, tools=None):
         """
-        AI 타입에 맞는 에이전트를 생성합니다.
+        AI 타입에 맞는 에이전트를 반환합니다.
+        
+        컴파일된 에이전트는 프로세스 단위 레지스트리에 보관되어
+        모든 세션과 스레드가 같은 인스턴스를 공유합니다.
         
         Args:
             agent_type: 생성할 에이전트 타입
+            fresh: True이면 레지스트리를 거치지 않고 새 인스턴스를 생성
+            llm: Gemini 대신 사용할 채팅 모델 (부하 테스트용 가짜 모델 등, 지정하면 항상 새 인스턴스)
+            tools: 기본 도구 대신 사용할 도구 목록 (지정하면 항상 새 인스턴스)
+            
+        Returns:
+            에이전트 인스턴스
+        """
+        agent_type = AgentType(agent_type)
+        if fresh or llm is not None or tools is not None:
+            # 교체한 모델·도구로 만든 에이전트는 레지스트리에 넣지 않음
+            return AgentFactory._build_agent(agent_type, llm=llm, tools=tools)
+        return _registry.get(agent_type)
+    
+    @staticmethod
+    def warm_up(agent_types=None) -> dict:
+        """
+        에이전트를 미리 생성하여 첫 메시지의 지연을 없앱니다.
+        
+        Args:
+            agent_types: 미리 생성할 타입 목록 (없으면 전체)
             
         Returns:
-            생성된 에이전트 인스턴스
+            {에이전트 타입: 오류 메시지 또는 None} 딕셔너리
         """
+        if agent_types is None:
+            agent_types = list(AgentType)
+        return _registry.warm_up(AgentType(t) for t in agent_types)
+    
+    @staticmethod
+    def get_registry_stats() -> dict:
+        """레지스트리 적중/미스 횟수와 타입별 생성 시간을 반환합니다."""
+        return _registry.stats()
+    
+    @staticmethod
+    def _build_agent(agent_type: AgentType, llm=None, tools=None):
+        """AI 타입에 맞는 에이전트를 새로 생성합니다. (llm·tools를 넘기면 기본 모델·도구 대신 사용)"""
+        # 모델을 교체하면 응답 캐시는 사용하지 않음 (캐시는 Gemini 클라이언트에 연결됨)
+        cache = AgentFactory.get_response_cache(agent_type) if llm is None else None
         match agent_type:
             case AgentType.WEB_SEARCH:
-                return SmartRAGAgent()
+                return SmartRAGAgent(cache=cache, llm=llm, tools=tools)
             case AgentType.CODE_GENERATOR:
-                return CodeGeneratorAgent()
+                return CodeGeneratorAgent(cache=cache, llm=llm, tools=tools)
             case AgentType.VIDEO_QA:
-                return VideoQAAgent()
+                return VideoQAAgent(cache=cache, llm=llm, tools=tools)
             case AgentType.PERSONA_CHATBOT:
-                return PersonaAgent(persona_name="트럼프")
+                return PersonaAgent(persona_name="트럼프", llm=llm)
             case _:
                 raise ValueError(f"알 수 없는 에이전트 타입: {agent_type}")
     
+    @staticmethod
+    def get_cache_policy(agent_type: AgentType) -> dict:
+        """
+        AI 타입별 LLM 응답 캐시 정책을 반환합니다.
+        
+        Args:
+            agent_type: 에이전트 타입
+            
+        Returns:
+            {"enabled": 캐시 사용 여부, "ttl_seconds": 응답 유효 시간(초)}
+        """
+        cache_policies = {
+            # 검색할 내용을 정하는 응답은 같은 대화면 같지만, 최신 정보가 중요하므로 짧게 유지
+            AgentType.WEB_SEARCH: {"enabled": True, "ttl_seconds": 600},
+            # temperature > 0이라 같은 요청에도 다른 답을 기대하므로 캐시하지 않음
+            AgentType.CODE_GENERATOR: {"enabled": False, "ttl_seconds": 0},
+            # 영상 내용은 바뀌지 않으므로 길게 유지
+            AgentType.VIDEO_QA: {"enabled": True, "ttl_seconds": 7 * 86400},
+            AgentType.PERSONA_CHATBOT: {"enabled": False, "ttl_seconds": 0},
+        }
+        return cache_policies.get(agent_type, {"enabled": False, "ttl_seconds": 0})
+    
+    @staticmethod
+    def get_response_cache(agent_type: AgentType):
+        """AI 타입의 캐시 정책에 맞는 LLM 응답 캐시를 반환합니다. (캐시하지 않으면 None)"""
+        policy = AgentFactory.get_cache_policy(agent_type)
+        if not policy["enabled"]:
+            return None
+        return get_response_cache(agent_type.value, policy["ttl_seconds"])
+    
+    @staticmethod
+    def get_history_policy(agent_type: AgentType) -> dict:
+        """
+        AI 타입별 대화 히스토리 토큰 예산을 반환합니다.
+        
+        Args:
+            agent_type: 에이전트 타입
+            
+        Returns:
+            ConversationWindow 설정 딕셔너리 (max_tokens, keep_turns)
+        """
+        history_policies = {
+            # 검색 결과가 프롬프트에 들어가므로 대화 히스토리는 작게 유지
+            AgentType.WEB_SEARCH: {"max_tokens": 6000, "keep_turns": 4},
+            # 이전에 생성한 코드를 수정하는 요청이 많아 원문을 넉넉히 유지
+            AgentType.CODE_GENERATOR: {"max_tokens": 16000, "keep_turns": 6},
+            AgentType.VIDEO_QA: {"max_tokens": 8000, "keep_turns": 4},
+            AgentType.PERSONA_CHATBOT: {"max_tokens": 4000, "keep_turns": 8},
+        }
+        return history_policies.get(agent_type, {"max_tokens": 8000, "keep_turns": 6})
+    
     @staticmethod
     def get_agent_info(agent_type: AgentType) -> dict:
         """
@@ -78,3 +168,5 @@ class AgentFactory:
             "icon": "❓"
         })
 
+# 프로세스 전역 에이전트 레지스트리
+_registry = AgentRegistry(AgentFactory._build_agent)
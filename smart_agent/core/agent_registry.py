@@ -0,0 +1,105 @@
+"""
+프로세스 단위 에이전트 레지스트리 모듈
+컴파일된 에이전트 그래프를 한 번만 생성하여 모든 세션/스레드가 공유하도록 합니다.
+"""
+import threading
+import time
+from typing import Callable, Dict, Hashable, Iterable, Optional
+
+
+class AgentRegistry:
+    """
+    에이전트 인스턴스를 키별로 한 번만 생성하여 보관하는 스레드 안전 레지스트리
+
+    LLM 클라이언트 생성, bind_tools, StateGraph 컴파일은 비용이 크지만
+    결과물(컴파일된 그래프)은 대화 상태를 갖지 않으므로 여러 세션이 공유해도 안전합니다.
+    """
+
+    def __init__(self, builder: Callable[[Hashable], object]):
+        """
+        Args:
+            builder: 키를 받아 새 에이전트 인스턴스를 생성하는 함수
+        """
+        self._builder = builder
+        self._agents: Dict[Hashable, object] = {}
+        self._lock = threading.Lock()
+        # 키별 생성 잠금 (서로 다른 타입은 동시에 생성 가능)
+        self._build_locks: Dict[Hashable, threading.Lock] = {}
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "build_time": {},  # {key: 생성 소요 시간(초)}
+        }
+
+    def get(self, key: Hashable):
+        """
+        키에 해당하는 에이전트를 반환합니다. 없으면 생성 후 보관합니다.
+
+        같은 키로 동시에 요청이 들어와도 생성은 한 번만 수행되고,
+        나머지 요청은 생성이 끝날 때까지 기다린 뒤 같은 인스턴스를 받습니다.
+        """
+        agent = self._agents.get(key)
+        if agent is not None:
+            with self._lock:
+                self._stats["hits"] += 1
+            return agent
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            # 잠금을 기다리는 동안 다른 스레드가 이미 생성했을 수 있음
+            agent = self._agents.get(key)
+            if agent is not None:
+                with self._lock:
+                    self._stats["hits"] += 1
+                return agent
+
+            started = time.perf_counter()
+            agent = self._builder(key)
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                self._agents[key] = agent
+                self._stats["misses"] += 1
+                self._stats["build_time"][key] = elapsed
+            return agent
+
+    def warm_up(self, keys: Iterable[Hashable]) -> Dict[Hashable, Optional[str]]:
+        """
+        주어진 키들의 에이전트를 미리 생성합니다.
+
+        Args:
+            keys: 미리 생성할 키 목록
+
+        Returns:
+            {키: 오류 메시지 또는 None} 딕셔너리 (하나가 실패해도 나머지는 계속 생성)
+        """
+        results = {}
+        for key in keys:
+            try:
+                self.get(key)
+                results[key] = None
+            except Exception as e:
+                results[key] = str(e)
+        return results
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """보관 중인 에이전트를 제거합니다. key가 없으면 전체를 제거합니다."""
+        with self._lock:
+            if key is None:
+                self._agents.clear()
+            else:
+                self._agents.pop(key, None)
+
+    def stats(self) -> dict:
+        """적중/미스 횟수와 키별 생성 시간을 반환합니다."""
+        with self._lock:
+            total = self._stats["hits"] + self._stats["misses"]
+            return {
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "hit_rate": self._stats["hits"] / total if total else 0.0,
+                "build_time": dict(self._stats["build_time"]),
+                "cached": list(self._agents.keys()),
+            }
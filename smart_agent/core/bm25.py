@@ -0,0 +1,71 @@
+"""
+BM25 어휘 검색 모듈
+임베딩 호출 없이 프로세스 안에서 동작하는 가벼운 키워드 검색 인덱스입니다.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from typing import List, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*|[가-힣]+")
+
+def tokenize(text: str) -> List[str]:
+    """
+    검색용 토큰 목록을 만듭니다.
+
+    영문/숫자는 소문자 단어 단위로, 한글은 조사가 붙어도 매칭되도록 단어와 글자 2-gram을 함께 사용합니다.
+    (예: "삼성전자의" -> ["삼성전자의", "삼성", "성전", "전자", "자의"])
+    """
+    tokens = []
+    for word in _TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(word)
+        if "가" <= word[0] <= "힣" and len(word) > 2:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+class BM25Index:
+    """Okapi BM25 역색인"""
+
+    def __init__(self, documents: Sequence[Document], k1: float = 1.5, b: float = 0.75):
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+
+        self._postings = defaultdict(list)  # {토큰: [(문서 인덱스, 빈도), ...]}
+        self._doc_lengths = []
+        for idx, doc in enumerate(self.documents):
+            counts = Counter(tokenize(doc.page_content))
+            self._doc_lengths.append(sum(counts.values()))
+            for token, freq in counts.items():
+                self._postings[token].append((idx, freq))
+
+        n_docs = len(self.documents)
+        self._avg_length = (sum(self._doc_lengths) / n_docs) if n_docs else 0.0
+        self._idf = {
+            token: math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for token, postings in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[Document, float]]:
+        """
+        질의와 관련된 문서를 BM25 점수 순으로 반환합니다.
+
+        Returns:
+            [(문서, 점수), ...] (점수가 0인 문서는 제외)
+        """
+        scores = defaultdict(float)
+        for token in set(tokenize(query)):
+            idf = self._idf.get(token)
+            if idf is None:
+                continue
+            for idx, freq in self._postings[token]:
+                length_norm = 1 - self.b + self.b * self._doc_lengths[idx] / (self._avg_length or 1)
+                scores[idx] += idf * freq * (self.k1 + 1) / (freq + self.k1 * length_norm)
+
+        top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.documents[idx], score) for idx, score in top]
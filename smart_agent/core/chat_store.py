@@ -0,0 +1,291 @@
+"""
+채팅 기록 저장소 모듈
+SQLite(WAL)에 채팅 목록과 메시지를 저장합니다. 제목과 생성 시각은 메시지 추가 시점에 미리 계산해 두므로
+사이드바는 메시지를 읽지 않고 인덱스만으로 페이지 단위 목록을 가져올 수 있습니다.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional
+
+from langchain_core.messages import BaseMessage, HumanMessage, messages_from_dict, messages_to_dict
+
+DEFAULT_TITLE = "새 채팅"
+TITLE_MAX_LENGTH = 25
+# 답변 생성 임대(lease) 유효 시간(초), 워커가 중간에 죽어도 이 시간이 지나면 다른 요청이 다시 잡을 수 있음
+GENERATION_LEASE_SECONDS = float(os.getenv("CHAT_GENERATION_LEASE_SECONDS", "600"))
+
+class ChatBusyError(RuntimeError):
+    """다른 요청이 답변 생성 임대를 가진 채팅에 쓰려고 할 때 발생합니다."""
+
+def make_title(text: str) -> str:
+    """첫 번째 사용자 메시지로 사이드바에 표시할 제목을 만듭니다."""
+    text = " ".join(str(text).split())
+    return text[:TITLE_MAX_LENGTH] + "..." if len(text) > TITLE_MAX_LENGTH else text
+
+class ChatStore:
+    """
+    SQLite 기반 채팅 저장소
+
+    - chats: 채팅 메타데이터 (제목, 생성 시각, 에이전트 타입, 히스토리 윈도우 상태)
+    - messages: 채팅별 메시지 (추가만 가능, seq 순서로 저장)
+
+    같은 채팅에는 한 번에 한 요청만 답변을 생성하도록 chats.generating_lease에 임대를 기록합니다.
+    (DB에 있으므로 여러 워커 프로세스 사이에서도 유효)
+    """
+
+    def __init__(self, db_path: str = "data/chats.sqlite3"):
+        self.db_path = db_path
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        # 스레드마다 별도 연결 사용 (WAL 모드에서 읽기와 쓰기가 서로 막지 않음)
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chats (
+                id TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                title TEXT NOT NULL,
+                agent_type TEXT,
+                created_at TEXT NOT NULL,
+                created_ts REAL NOT NULL,
+                message_count INTEGER NOT NULL DEFAULT 0,
+                history_state TEXT,
+                generating_lease TEXT,
+                generating_until REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_chats_owner_created ON chats(owner, created_ts DESC);
+
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chat_id TEXT NOT NULL REFERENCES chats(id) ON DELETE CASCADE,
+                seq INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                UNIQUE (chat_id, seq)
+            );
+            """
+        )
+        # 임대 컬럼이 없던 기존 DB에 컬럼 추가
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(chats)")}
+        for column, column_type in (("generating_lease", "TEXT"), ("generating_until", "REAL")):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE chats ADD COLUMN {column} {column_type}")
+        conn.commit()
+
+    @contextmanager
+    def _write_transaction(self):
+        """
+        BEGIN IMMEDIATE로 쓰기 트랜잭션을 엽니다.
+
+        읽기부터 쓰기 잠금을 잡으므로, 여러 프로세스가 같은 채팅의 message_count를 동시에 읽고
+        같은 seq로 INSERT하다 UNIQUE 제약에 걸리는 일이 없습니다. (잠금 대기는 connect timeout까지)
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    @staticmethod
+    def _row_to_chat(row: sqlite3.Row) -> dict:
+        chat = dict(row)
+        chat.pop("generating_lease", None)
+        chat.pop("generating_until", None)
+        chat["history_state"] = json.loads(chat["history_state"]) if chat["history_state"] else None
+        return chat
+
+    def create_chat(self, agent_type: Optional[str], owner: str = "default") -> dict:
+        """
+        새 채팅을 생성합니다.
+
+        Args:
+            agent_type: 에이전트 타입 값 (AgentType.value)
+            owner: 채팅 소유자 식별자
+
+        Returns:
+            생성된 채팅 메타데이터 딕셔너리
+        """
+        now = time.time()
+        chat = {
+            "id": str(uuid.uuid4()),
+            "owner": owner,
+            "title": DEFAULT_TITLE,
+            "agent_type": agent_type,
+            "created_at": datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M"),
+            "created_ts": now,
+            "message_count": 0,
+            "history_state": None,
+        }
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO chats (id, owner, title, agent_type, created_at, created_ts) VALUES (?, ?, ?, ?, ?, ?)",
+                (chat["id"], owner, chat["title"], agent_type, chat["created_at"], now),
+            )
+        return chat
+
+    def get_chat(self, chat_id: str) -> Optional[dict]:
+        """채팅 메타데이터를 반환합니다. (메시지는 포함하지 않음)"""
+        row = self._connect().execute("SELECT * FROM chats WHERE id = ?", (chat_id,)).fetchone()
+        return self._row_to_chat(row) if row else None
+
+    def list_chats(self, owner: str = "default", limit: int = 20, offset: int = 0) -> List[dict]:
+        """최신순 채팅 목록을 페이지 단위로 반환합니다. (인덱스만 사용, 메시지는 읽지 않음)"""
+        rows = self._connect().execute(
+            "SELECT * FROM chats WHERE owner = ? ORDER BY created_ts DESC LIMIT ? OFFSET ?",
+            (owner, limit, offset),
+        ).fetchall()
+        return [self._row_to_chat(row) for row in rows]
+
+    def count_chats(self, owner: str = "default") -> int:
+        """소유자의 전체 채팅 수"""
+        return self._connect().execute("SELECT COUNT(*) FROM chats WHERE owner = ?", (owner,)).fetchone()[0]
+
+    def load_messages(self, chat_id: str) -> List[BaseMessage]:
+        """채팅의 전체 메시지를 순서대로 불러옵니다."""
+        rows = self._connect().execute(
+            "SELECT payload FROM messages WHERE chat_id = ? ORDER BY seq", (chat_id,)
+        ).fetchall()
+        return messages_from_dict([json.loads(row["payload"]) for row in rows])
+
+    def append_messages(self, chat_id: str, messages: List[BaseMessage], lease: Optional[str] = None):
+        """
+        채팅 끝에 메시지를 추가합니다.
+
+        아직 제목이 없는 채팅에 첫 사용자 메시지가 들어오면 그 내용으로 제목을 정합니다.
+
+        Args:
+            chat_id: 채팅 ID
+            messages: 추가할 메시지 목록
+            lease: acquire_generation()으로 받은 임대 토큰 (지정하면 아직 그 임대를 가지고 있는지 확인하고 연장)
+
+        Raises:
+            KeyError: 존재하지 않는 채팅
+            ChatBusyError: lease가 만료된 사이 다른 요청이 임대를 가져간 경우
+        """
+        if not messages:
+            return
+        with self._write_transaction() as conn:
+            row = conn.execute(
+                "SELECT title, message_count, generating_lease, generating_until FROM chats WHERE id = ?",
+                (chat_id,),
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"존재하지 않는 채팅입니다: {chat_id}")
+            now = time.time()
+            if lease is not None and row["generating_lease"] != lease:
+                raise ChatBusyError(f"다른 요청이 답변 생성 임대를 가져갔습니다: {chat_id}")
+            title, seq = row["title"], row["message_count"]
+
+            conn.executemany(
+                "INSERT INTO messages (chat_id, seq, payload) VALUES (?, ?, ?)",
+                [
+                    (chat_id, seq + i, json.dumps(payload, ensure_ascii=False))
+                    for i, payload in enumerate(messages_to_dict(messages))
+                ],
+            )
+
+            if title == DEFAULT_TITLE:
+                first_user_msg = next((m.content for m in messages if isinstance(m, HumanMessage)), None)
+                if first_user_msg:
+                    title = make_title(first_user_msg)
+
+            conn.execute(
+                "UPDATE chats SET title = ?, message_count = ? WHERE id = ?",
+                (title, seq + len(messages), chat_id),
+            )
+            if lease is not None:
+                conn.execute(
+                    "UPDATE chats SET generating_until = ? WHERE id = ?", (now + GENERATION_LEASE_SECONDS, chat_id)
+                )
+
+    def acquire_generation(self, chat_id: str, ttl: float = None) -> Optional[str]:
+        """
+        채팅의 답변 생성 임대를 잡습니다.
+
+        다른 요청이 유효한 임대를 가지고 있으면 None을 반환합니다. 임대는 ttl초 뒤 만료되며,
+        임대를 지정한 append_messages 호출마다 연장됩니다.
+
+        Args:
+            chat_id: 채팅 ID
+            ttl: 임대 유효 시간(초), 기본값 GENERATION_LEASE_SECONDS
+
+        Returns:
+            임대 토큰 (release_generation()과 append_messages(lease=)에 전달), 사용 중이면 None
+        """
+        ttl = GENERATION_LEASE_SECONDS if ttl is None else ttl
+        with self._write_transaction() as conn:
+            row = conn.execute(
+                "SELECT generating_lease, generating_until FROM chats WHERE id = ?", (chat_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"존재하지 않는 채팅입니다: {chat_id}")
+            now = time.time()
+            if row["generating_lease"] and (row["generating_until"] or 0) > now:
+                return None
+            lease = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE chats SET generating_lease = ?, generating_until = ? WHERE id = ?",
+                (lease, now + ttl, chat_id),
+            )
+        return lease
+
+    def release_generation(self, chat_id: str, lease: str):
+        """답변 생성 임대를 반납합니다. (그 사이 다른 요청이 가져간 임대는 건드리지 않음)"""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "UPDATE chats SET generating_lease = NULL, generating_until = NULL WHERE id = ? AND generating_lease = ?",
+                (chat_id, lease),
+            )
+
+    def update_history_state(self, chat_id: str, history_state: Optional[dict]):
+        """대화 윈도우 상태(요약 등)를 저장합니다."""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "UPDATE chats SET history_state = ? WHERE id = ?",
+                (json.dumps(history_state, ensure_ascii=False) if history_state else None, chat_id),
+            )
+
+    def delete_chat(self, chat_id: str):
+        """채팅과 그 메시지를 삭제합니다."""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
+
+# 프로세스 전역 저장소 (get_chat_store()로 접근)
+_chat_store = None
+_chat_store_lock = threading.Lock()
+
+def get_chat_store() -> ChatStore:
+    """프로세스 전역 채팅 저장소를 반환합니다. (CHAT_DB_PATH 환경 변수로 경로 지정)"""
+    global _chat_store
+    if _chat_store is None:
+        with _chat_store_lock:
+            if _chat_store is None:
+                _chat_store = ChatStore(os.getenv("CHAT_DB_PATH", "data/chats.sqlite3"))
+    return _chat_store
@@ -1,6 +1,7 @@
 from pathlib import Path
 from langchain_core.tools import tool
 from dotenv import load_dotenv
+from core.concurrency import with_bounded_async
 
 load_dotenv()
 
@@ -65,4 +66,4 @@ def save_code(code: str, filename: str, language: str = "python") -> str:
         return f"파일 저장 중 오류 발생: {str(e)}"
 
 # 도구 리스트
-code_tools = [generate_code, save_code]
\ No newline at end of file
+code_tools = with_bounded_async([generate_code, save_code])
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""
+비동기 도구 실행 모듈
+동기 도구(웹 검색, yt-dlp 등)를 제한된 크기의 공유 스레드 풀에서 실행하여
+한 턴의 여러 tool_calls를 동시에, 그러나 정해진 개수 이하로만 실행되도록 합니다.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
+from typing import Callable, List
+
+from langchain_core.tools import BaseTool
+
+# 동시에 실행할 수 있는 도구 호출 수 (프로세스 전체 기준)
+MAX_TOOL_CONCURRENCY = int(os.getenv("AGENT_MAX_TOOL_CONCURRENCY", "4"))
+
+_tool_executor = ThreadPoolExecutor(
+    max_workers=MAX_TOOL_CONCURRENCY,
+    thread_name_prefix="agent-tool"
+)
+
+async def run_in_tool_pool(func: Callable, *args, **kwargs):
+    """
+    동기 함수를 공유 도구 스레드 풀에서 실행하고 결과를 기다립니다.
+
+    현재 contextvars(콜백, 트레이싱 컨텍스트 등)를 복사해서 전달하므로
+    스레드 안에서도 LangChain 콜백이 같은 실행에 연결됩니다.
+    """
+    loop = asyncio.get_running_loop()
+    context = copy_context()
+    return await loop.run_in_executor(_tool_executor, partial(context.run, func, *args, **kwargs))
+
+def with_bounded_async(tool_list: List[BaseTool]) -> List[BaseTool]:
+    """
+    coroutine이 없는 도구에 공유 스레드 풀을 사용하는 비동기 구현을 붙입니다.
+
+    LangGraph ToolNode는 비동기 실행 시 한 턴의 tool_calls를 asyncio.gather로 동시에 실행하므로,
+    각 도구가 이 풀을 거치면 동시 실행 수가 MAX_TOOL_CONCURRENCY로 제한됩니다.
+
+    Args:
+        tool_list: @tool로 만든 도구 목록
+
+    Returns:
+        같은 도구 목록 (비동기 구현이 추가됨)
+    """
+    for t in tool_list:
+        func = getattr(t, "func", None)
+        if func is None or getattr(t, "coroutine", None) is not None:
+            continue
+
+        async def _coroutine(*args, _func=func, **kwargs):
+            return await run_in_tool_pool(_func, *args, **kwargs)
+
+        t.coroutine = _coroutine
+    return tool_list
@@ -0,0 +1,137 @@
+"""
+임베딩 캐시 모듈
+(모델 이름, 텍스트 SHA-256)을 키로 임베딩 벡터를 로컬 SQLite에 float32 바이트로 저장하여
+내용이 바뀌지 않은 텍스트는 다시 원격으로 임베딩하지 않습니다.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from core.gemini_governor import embedding_governor
+
+# SQLite 한 쿼리에 넣을 수 있는 파라미터 수 제한을 넘지 않도록 나눠서 조회
+_LOOKUP_CHUNK = 500
+
+def text_hash(text: str) -> str:
+    """텍스트 내용의 SHA-256 해시"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class CachedEmbeddings(Embeddings):
+    """
+    임베딩 결과를 디스크에 캐시하는 Embeddings 래퍼
+
+    embed_documents는 캐시에 없는 텍스트만 batch_size 단위로 원격 호출하고,
+    결과는 입력 순서 그대로 반환합니다.
+    원격 호출은 임베딩용 Gemini 관문(embedding_governor)을 거쳐 속도·동시 실행 제한과 재시도를 받습니다.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        db_path: str = "data/cache/embeddings.sqlite3",
+        model_name: str = None,
+        batch_size: int = 100,
+    ):
+        """
+        Args:
+            embeddings: 실제 임베딩을 수행하는 객체 (GoogleGenerativeAIEmbeddings 등)
+            db_path: 캐시 SQLite 파일 경로
+            model_name: 캐시 키에 쓸 모델 이름 (없으면 embeddings.model 사용)
+            batch_size: 원격 호출 1회에 보낼 최대 텍스트 수
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name or getattr(embeddings, "model", None) or type(embeddings).__name__
+        self.batch_size = batch_size
+        self.db_path = db_path
+        self.stats = {"hits": 0, "misses": 0, "remote_calls": 0}
+
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def _load(self, hashes: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            for i in range(0, len(hashes), _LOOKUP_CHUNK):
+                chunk = hashes[i:i + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [self.model_name, *chunk],
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def _count(self, **deltas: int):
+        """통계를 잠금 안에서 갱신합니다. (여러 스레드가 같은 인스턴스를 공유하므로)"""
+        with self._lock:
+            for name, delta in deltas.items():
+                self.stats[name] += delta
+
+    def _save(self, items: Dict[str, List[float]]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [
+                    (self.model_name, h, np.asarray(vector, dtype=np.float32).tobytes())
+                    for h, vector in items.items()
+                ],
+            )
+            self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """캐시를 거쳐 문서들을 임베딩합니다. (캐시에 없는 텍스트만 원격 호출)"""
+        hashes = [text_hash(t) for t in texts]
+        vectors = self._load(list(set(hashes)))
+
+        # 캐시에 없는 텍스트 (같은 내용은 한 번만 요청)
+        missing = {}
+        for h, t in zip(hashes, texts):
+            if h not in vectors and h not in missing:
+                missing[h] = t
+
+        self._count(hits=len(texts) - sum(1 for h in hashes if h in missing), misses=len(missing))
+
+        missing_items = list(missing.items())
+        for i in range(0, len(missing_items), self.batch_size):
+            batch = missing_items[i:i + self.batch_size]
+            embedded = embedding_governor.call(self.embeddings.embed_documents, [t for _, t in batch])
+            self._count(remote_calls=1)
+            new_vectors = {h: vector for (h, _), vector in zip(batch, embedded)}
+            self._save(new_vectors)
+            # 저장 형식(float32)과 같은 값을 반환하여 캐시 적중 여부와 관계없이 결과가 일정하도록 함
+            vectors.update({h: np.asarray(v, dtype=np.float32).tolist() for h, v in new_vectors.items()})
+
+        return [vectors[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        """질의 임베딩 (같은 질의가 반복되는 경우가 많아 함께 캐시)"""
+        h = "query:" + text_hash(text)
+        cached = self._load([h])
+        if h in cached:
+            self._count(hits=1)
+            return cached[h]
+
+        self._count(misses=1, remote_calls=1)
+        vector = embedding_governor.call(self.embeddings.embed_query, text)
+        self._save({h: vector})
+        return np.asarray(vector, dtype=np.float32).tolist()
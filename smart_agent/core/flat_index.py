@@ -0,0 +1,504 @@
+"""
+메모리 맵 NumPy 평면 인덱스 (VectorStore)
+
+L2 정규화된 float32 임베딩을 `.npy` 행렬 하나에 이어 붙여 저장하고,
+문서 텍스트·메타데이터는 같은 순서의 JSONL 파일에 기록합니다.
+행렬은 np.memmap으로 열기 때문에 프로세스 시작 시 파일을 읽어 들이지 않고,
+여러 프로세스가 같은 페이지를 OS 캐시로 공유합니다.
+JSONL도 메모리 맵으로 훑어 행별 id와 줄의 바이트 위치만 기억하고, 텍스트·메타데이터는 검색 결과로 나온 행의 줄만 읽습니다.
+
+저장 구조 (db_path 폴더):
+    vectors.npy     고정 길이 헤더의 .npy 파일 (행 추가 시 헤더의 shape만 제자리에서 갱신)
+    metadata.jsonl  행마다 {"row", "id", "text", "metadata"} 한 줄, 삭제는 {"deleted": id} 줄로 기록
+    .lock           쓰기 잠금 파일 (여러 프로세스가 같은 인덱스에 쓸 때 한 번에 하나씩)
+
+헤더의 행 수까지만 유효한 행으로 보므로, 추가가 중간에 중단되어 헤더보다 뒤에 남은 메타데이터 줄은 보이지 않고
+다음 추가가 같은 행 번호로 덮어씁니다. 줄바꿈 없이 끊긴 마지막 줄은 다음 쓰기가 잠금을 잡은 뒤 잘라냅니다.
+"""
+import ast
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 프로세스 안의 잠금만 사용
+    fcntl = None
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "metadata.jsonl"
+LOCK_FILE = ".lock"
+
+# .npy 헤더를 고정 길이로 써서 행 수가 늘어나도 헤더만 덮어쓰면 되도록 함 (64의 배수)
+_HEADER_SIZE = 128
+_MAGIC = b"\x93NUMPY\x01\x00"
+# 한 번에 점수를 계산할 행 수 (매우 큰 인덱스에서도 임시 메모리를 일정하게 유지)
+_SCAN_BLOCK = 65536
+# _append()가 쓰는 줄의 앞부분 (텍스트를 파싱하지 않고 행 번호와 id만 읽음)
+_RECORD_PREFIX = re.compile(rb'\{"row": (\d+), "id": ("(?:[^"\\]|\\.)*")[,}]')
+
+def _encode_header(rows: int, dim: int) -> bytes:
+    header = repr({"descr": "<f4", "fortran_order": False, "shape": (rows, dim)}).encode("latin1")
+    body_size = _HEADER_SIZE - len(_MAGIC) - 2
+    if len(header) + 1 > body_size:
+        raise ValueError("npy 헤더가 너무 깁니다.")
+    header = header.ljust(body_size - 1) + b"\n"
+    return _MAGIC + (body_size).to_bytes(2, "little") + header
+
+def _read_header(path: str) -> Tuple[int, int]:
+    with open(path, "rb") as f:
+        raw = f.read(_HEADER_SIZE)
+    if not raw.startswith(_MAGIC) or len(raw) < _HEADER_SIZE:
+        raise ValueError(f"지원하지 않는 벡터 파일입니다: {path}")
+    header = ast.literal_eval(raw[len(_MAGIC) + 2:].decode("latin1").strip())
+    rows, dim = header["shape"]
+    return rows, dim
+
+def _normalize(vectors) -> np.ndarray:
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+class _RecordReader:
+    """
+    행 번호별 (바이트 위치, 길이)로 메타데이터 줄을 필요할 때만 읽습니다.
+
+    _refresh() 시점의 파일 핸들과 위치 배열을 그대로 들고 있으므로, 그 사이 compact()로 파일이 교체되어도
+    이 스냅숏으로 구한 행은 이전 파일에서 읽습니다.
+    """
+
+    def __init__(self, file, offsets: np.ndarray, lengths: np.ndarray):
+        self._file = file
+        self._offsets = offsets
+        self._lengths = lengths
+        self._lock = threading.Lock()
+
+    def read(self, row: int) -> dict:
+        with self._lock:
+            self._file.seek(int(self._offsets[row]))
+            raw = self._file.read(int(self._lengths[row]))
+        return json.loads(raw)
+
+    def document(self, row: int) -> Document:
+        record = self.read(row)
+        return Document(id=record["id"], page_content=record["text"], metadata=record["metadata"] or {})
+
+class FlatVectorStore(VectorStore):
+    """
+    메모리 맵 행렬 기반의 완전 탐색(flat) 벡터스토어
+
+    질의는 정규화된 벡터와의 내적(코사인 유사도)을 블록 단위 행렬 곱으로 계산하고,
+    argpartition으로 상위 k개만 골라 정렬합니다.
+    다른 프로세스가 행을 추가하면 다음 검색 때 파일 크기 변화를 보고 다시 엽니다.
+    """
+
+    def __init__(self, persist_directory: str, embedding_function: Embeddings):
+        """
+        Args:
+            persist_directory: 인덱스 파일을 저장할 폴더
+            embedding_function: 문서/질의 임베딩 객체
+        """
+        self.persist_directory = persist_directory
+        self.embedding_function = embedding_function
+        self._vectors_path = os.path.join(persist_directory, VECTORS_FILE)
+        self._metadata_path = os.path.join(persist_directory, METADATA_FILE)
+        self._lock_path = os.path.join(persist_directory, LOCK_FILE)
+        self._lock = threading.RLock()
+        os.makedirs(persist_directory, exist_ok=True)
+        self._reset()
+        self._refresh()
+
+    def _reset(self):
+        self._matrix: Optional[np.memmap] = None
+        self._ids: List[Optional[str]] = []  # 행 번호 위치의 문서 id (메타데이터 줄을 아직 못 읽은 행은 None)
+        self._offsets = np.zeros(0, dtype=np.int64)  # 행별 메타데이터 줄의 바이트 위치
+        self._lengths = np.zeros(0, dtype=np.int64)
+        self._rows = 0  # 헤더 기준으로 보이는(유효한) 행 수
+        self._alive = np.zeros(0, dtype=bool)
+        self._deleted = np.zeros(0, dtype=bool)  # 아직 보이지 않는 행에 대한 삭제 표시
+        self._id_to_row = {}  # 보이는 행 중 id별 최신 행
+        self._metadata_file = None  # 읽기용 핸들 (이전 스냅숏이 아직 쓰고 있을 수 있으므로 닫지 않고 버림)
+        self._metadata_offset = 0  # 지금까지 읽은 JSONL 바이트 위치
+        self._metadata_inode = None
+        self._reader: Optional[_RecordReader] = None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+
+    @contextmanager
+    def _write_lock(self):
+        """
+        같은 폴더에 쓰는 다른 스레드·프로세스(app.py와 pipeline.py 등)와 쓰기를 직렬화합니다.
+
+        잠금을 잡은 뒤에는 쓰는 중인 다른 작업이 없으므로, 줄바꿈 없이 끝난 메타데이터 마지막 줄은
+        중단된 쓰기의 잔여물로 보고 잘라냅니다. (그대로 두면 다음 줄이 그 뒤에 붙어 JSON이 깨짐)
+        """
+        with self._lock:
+            if fcntl is None:
+                self._truncate_torn_tail()
+                yield
+                return
+            with open(self._lock_path, "a") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    self._truncate_torn_tail()
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _truncate_torn_tail(self):
+        """메타데이터 파일을 마지막 줄바꿈 위치까지 자릅니다. (쓰기 잠금 안에서만 호출)"""
+        try:
+            f = open(self._metadata_path, "r+b")
+        except FileNotFoundError:
+            return
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            keep, pos = 0, end
+            while pos > 0:
+                start = max(0, pos - 65536)
+                f.seek(start)
+                newline = f.read(pos - start).rfind(b"\n")
+                if newline >= 0:
+                    keep = start + newline + 1
+                    break
+                pos = start
+            if keep < end:
+                logger.warning("%s: 끊긴 마지막 줄 %d바이트를 잘라냅니다.", self._metadata_path, end - keep)
+                f.truncate(keep)
+                f.flush()
+                os.fsync(f.fileno())
+
+    # ---- 파일 읽기 ----
+
+    def _grow(self, size: int):
+        if len(self._alive) < size:
+            extra = max(size - len(self._alive), len(self._alive))  # 두 배씩 늘림
+            self._alive = np.concatenate([self._alive, np.zeros(extra, dtype=bool)])
+            self._deleted = np.concatenate([self._deleted, np.zeros(extra, dtype=bool)])
+            self._offsets = np.concatenate([self._offsets, np.zeros(extra, dtype=np.int64)])
+            self._lengths = np.concatenate([self._lengths, np.zeros(extra, dtype=np.int64)])
+
+    def _apply_line(self, view, start: int, end: int):
+        """메타데이터 파일 view[start:end] 한 줄을 반영합니다. (레코드 줄은 행 번호·id·위치만 기억)"""
+        match = _RECORD_PREFIX.match(view, start, end)
+        if match:
+            row, doc_id = int(match[1]), json.loads(match[2])
+        else:
+            raw = view[start:end]
+            if not raw.strip():
+                return
+            try:
+                entry = json.loads(raw)
+            except ValueError as e:
+                # 손상된 줄 하나 때문에 인덱스 전체를 못 쓰게 되지 않도록 건너뜀
+                logger.warning("%s: 읽을 수 없는 메타데이터 줄을 건너뜁니다 (%s)", self._metadata_path, e)
+                return
+            if "deleted" in entry:
+                doc_id = entry["deleted"]
+                row = self._id_to_row.pop(doc_id, None)
+                if row is not None:
+                    self._alive[row] = False
+                # 아직 보이지 않는 행에 같은 id가 있으면 보이게 될 때 살아나지 않도록 표시
+                for pending in range(self._rows, len(self._ids)):
+                    if self._ids[pending] == doc_id:
+                        self._deleted[pending] = True
+                return
+            # 행 번호가 없는 예전 형식은 기록 순서가 곧 행 번호
+            row, doc_id = entry.get("row", len(self._ids)), entry["id"]
+
+        if row < self._rows:
+            return  # 이미 보이는 행은 다시 쓰이지 않음
+        # 중단된 추가가 남긴 줄은 다음 추가가 같은 행 번호로 덮어씀
+        if row >= len(self._ids):
+            self._ids.extend([None] * (row + 1 - len(self._ids)))
+        self._grow(row + 1)
+        self._ids[row] = doc_id
+        self._offsets[row] = start
+        self._lengths[row] = end - start
+        self._deleted[row] = False
+
+    def _publish(self, rows: int):
+        """헤더가 가리키는 행 수까지 새로 보이게 된 행을 반영합니다. (같은 id의 이전 행은 교체)"""
+        for row in range(self._rows, rows):
+            if self._deleted[row]:
+                continue
+            doc_id = self._ids[row]
+            old_row = self._id_to_row.get(doc_id)
+            if old_row is not None:
+                self._alive[old_row] = False
+            self._id_to_row[doc_id] = row
+            self._alive[row] = True
+        self._rows = rows
+
+    def _refresh(self):
+        """새로 추가된 메타데이터 줄만 훑고, 행 수가 바뀌었으면 행렬을 다시 메모리 맵으로 엽니다."""
+        with self._lock:
+            try:
+                stat = os.stat(self._metadata_path)
+            except FileNotFoundError:
+                stat = None
+                if self._metadata_file is not None:
+                    self._reset()  # 인덱스 폴더가 지워짐
+            if stat is not None and (stat.st_ino != self._metadata_inode or stat.st_size < self._metadata_offset):
+                if self._metadata_file is not None:
+                    # 다른 프로세스가 compact()로 파일을 교체했으면 처음부터 다시 읽음
+                    self._reset()
+                self._metadata_file = open(self._metadata_path, "rb")
+                stat = os.fstat(self._metadata_file.fileno())
+                self._metadata_inode = stat.st_ino
+            if stat is not None and stat.st_size > self._metadata_offset:
+                with mmap.mmap(self._metadata_file.fileno(), stat.st_size, access=mmap.ACCESS_READ) as view:
+                    # 마지막 줄이 아직 쓰는 중일 수 있으므로 완전한 줄까지만 반영
+                    pos = self._metadata_offset
+                    while (newline := view.find(b"\n", pos)) >= 0:
+                        self._apply_line(view, pos, newline)
+                        pos = newline + 1
+                self._metadata_offset = pos
+
+            if not os.path.exists(self._vectors_path):
+                return
+            rows, dim = _read_header(self._vectors_path)
+            # 헤더보다 먼저 쓰인 메타데이터까지만 (헤더를 읽는 사이에 추가된 행은 다음 번에 반영)
+            visible = self._rows
+            while visible < min(rows, len(self._ids)) and self._ids[visible] is not None:
+                visible += 1
+            if visible > self._rows:
+                self._publish(visible)
+                self._reader = _RecordReader(self._metadata_file, self._offsets, self._lengths)
+            if self._matrix is None or self._matrix.shape[0] != self._rows:
+                self._matrix = (
+                    np.memmap(self._vectors_path, dtype=np.float32, mode="r", offset=_HEADER_SIZE, shape=(self._rows, dim))
+                    if self._rows else None
+                )
+
+    # ---- 쓰기 ----
+
+    def _append(self, ids: List[str], texts: List[str], metadatas: List[dict], vectors: np.ndarray):
+        """행렬 끝에 행을 이어 쓰고, 메타데이터를 기록한 뒤 헤더의 행 수를 갱신합니다."""
+        with self._write_lock():
+            self._refresh()
+            if os.path.exists(self._vectors_path):
+                rows, dim = _read_header(self._vectors_path)
+                if dim != vectors.shape[1]:
+                    raise ValueError(f"임베딩 차원이 다릅니다: {dim} != {vectors.shape[1]}")
+            else:
+                rows, dim = 0, vectors.shape[1]
+                with open(self._vectors_path, "wb") as f:
+                    f.write(_encode_header(0, dim))
+
+            with open(self._vectors_path, "r+b") as f:
+                f.seek(_HEADER_SIZE + rows * dim * 4)
+                f.write(vectors.astype("<f4", copy=False).tobytes())
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+
+            with open(self._metadata_path, "a", encoding="utf-8") as f:
+                for row, (doc_id, text, metadata) in enumerate(zip(ids, texts, metadatas), start=rows):
+                    record = {"row": row, "id": doc_id, "text": text, "metadata": metadata}
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+            # 헤더를 마지막에 갱신하므로 중간에 중단되면 추가하던 행은 보이지 않고,
+            # 남은 메타데이터 줄은 행 번호가 헤더 밖이라 무시되었다가 다음 추가에서 덮어써짐
+            with open(self._vectors_path, "r+b") as f:
+                f.write(_encode_header(rows + len(ids), dim))
+            self._refresh()
+
+    def add_embeddings(
+        self,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """미리 계산한 임베딩을 추가합니다. 같은 id가 있으면 새 행으로 교체합니다."""
+        pairs = list(text_embeddings)
+        if not pairs:
+            return []
+        texts = [text for text, _ in pairs]
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in texts]
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        self._append(ids, texts, metadatas, _normalize([vector for _, vector in pairs]))
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = self.embedding_function.embed_documents(texts)
+        return self.add_embeddings(zip(texts, vectors), metadatas=metadatas, ids=ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """삭제 표시(tombstone)를 기록합니다. 행렬은 compact() 전까지 그대로 둡니다."""
+        if not ids:
+            return False
+        with self._write_lock():
+            self._refresh()
+            targets = [doc_id for doc_id in ids if doc_id in self._id_to_row]
+            if targets:
+                with open(self._metadata_path, "a", encoding="utf-8") as f:
+                    for doc_id in targets:
+                        f.write(json.dumps({"deleted": doc_id}) + "\n")
+                self._refresh()
+            return bool(targets)
+
+    def compact(self) -> int:
+        """
+        삭제된 행을 제거하여 파일을 다시 씁니다. (쓰기 잠금 안에서 실행, 다른 프로세스는 다음 검색 때 다시 읽음)
+
+        Returns:
+            제거한 행 수
+        """
+        with self._write_lock():
+            self._refresh()
+            if self._matrix is None:
+                return 0
+            reader = self._reader
+            live_rows = np.flatnonzero(self._alive[:self._matrix.shape[0]])
+            removed = self._matrix.shape[0] - len(live_rows)
+            if not removed:
+                return 0
+
+            vectors = np.asarray(self._matrix[live_rows])
+            dim = self._matrix.shape[1]
+            tmp_vectors = f"{self._vectors_path}.tmp"
+            tmp_metadata = f"{self._metadata_path}.tmp"
+            with open(tmp_vectors, "wb") as f:
+                f.write(_encode_header(len(live_rows), dim))
+                f.write(vectors.astype("<f4", copy=False).tobytes())
+            with open(tmp_metadata, "w", encoding="utf-8") as f:
+                for new_row, row in enumerate(live_rows):
+                    record = dict(reader.read(row), row=new_row)
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+            self._matrix = None
+            os.replace(tmp_vectors, self._vectors_path)
+            os.replace(tmp_metadata, self._metadata_path)
+
+            self._reset()
+            self._refresh()
+            return removed
+
+    # ---- 조회 ----
+
+    def count(self) -> int:
+        """삭제되지 않은 문서 수"""
+        self._refresh()
+        return len(self._id_to_row)
+
+    def get_documents(self) -> List[Document]:
+        """삭제되지 않은 모든 문서 (BM25 인덱스 생성용)"""
+        self._refresh()
+        with self._lock:
+            reader, rows = self._reader, sorted(self._id_to_row.values())
+        return [reader.document(row) for row in rows]
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        self._refresh()
+        with self._lock:
+            reader, rows = self._reader, [self._id_to_row[i] for i in ids if i in self._id_to_row]
+        return [reader.document(row) for row in rows]
+
+    def _top_k(self, queries: np.ndarray, k: int) -> Tuple[Optional[np.memmap], Optional[_RecordReader], List[List[Tuple[int, float]]]]:
+        """
+        여러 질의 벡터의 상위 k개 (행 번호, 코사인 유사도)를 한 번의 행렬 곱으로 구합니다.
+
+        Args:
+            queries: (질의 수, 차원) 정규화된 행렬
+
+        Returns:
+            (행렬, 레코드 리더, 질의별 결과) - 결과의 행 번호는 함께 반환한 행렬·리더 기준
+        """
+        self._refresh()
+        with self._lock:
+            matrix, alive, reader = self._matrix, self._alive, self._reader
+        if matrix is None or k <= 0:
+            return matrix, reader, [[] for _ in range(len(queries))]
+
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, matrix.shape[0], _SCAN_BLOCK):
+            block = matrix[start:start + _SCAN_BLOCK]
+            scores = queries @ block.T  # (질의 수, 블록 행 수)
+            scores[:, ~alive[start:start + len(block)]] = -np.inf
+            # 블록별 상위 k개만 남기고 이전 후보와 합침
+            if scores.shape[1] > k:
+                part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                part = np.tile(np.arange(scores.shape[1]), (len(queries), 1))
+            best_rows = np.concatenate([best_rows, part + start], axis=1)
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, part, axis=1)], axis=1)
+
+        order = np.argsort(-best_scores, axis=1)[:, :k]
+        results = []
+        for rows, scores in zip(np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)):
+            results.append([(int(r), float(s)) for r, s in zip(rows, scores) if np.isfinite(s)])
+        return matrix, reader, results
+
+    def _select_relevance_score_fn(self):
+        # 코사인 유사도(-1~1)를 0~1 관련도로 변환
+        return lambda score: (score + 1.0) / 2.0
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        _, reader, results = self._top_k(_normalize(embedding), k)
+        return [(reader.document(row), score) for row, score in results[0]]
+
+    def similarity_search_by_vector_with_embeddings(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, np.ndarray]]:
+        """상위 k개 문서와 저장된 (정규화된) 벡터를 함께 반환합니다. (재정렬 시 후보를 다시 임베딩하지 않도록)"""
+        matrix, reader, results = self._top_k(_normalize(embedding), k)
+        return [(reader.document(row), np.array(matrix[row])) for row, _ in results[0]]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding_function.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def batch_similarity_search(self, queries: List[str], k: int = 4) -> List[List[Document]]:
+        """여러 질의를 한 번의 행렬 곱으로 검색합니다."""
+        if not queries:
+            return []
+        vectors = _normalize([self.embedding_function.embed_query(q) for q in queries])
+        _, reader, results = self._top_k(vectors, k)
+        return [[reader.document(row) for row, _ in hits] for hits in results]
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        persist_directory: str = "data/flat_index",
+        **kwargs: Any,
+    ) -> "FlatVectorStore":
+        store = cls(persist_directory=persist_directory, embedding_function=embedding)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
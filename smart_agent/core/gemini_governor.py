@@ -0,0 +1,532 @@
+"""
+Gemini 호출 조정(governor) 모듈
+프로세스 안의 모든 Gemini 생성 호출(에이전트, 영상 요약·질문, 대화 요약, RAG)이 하나의 관문을 거치도록 하여
+분당 요청 수·토큰 수(토큰 버킷)와 동시 실행 수를 함께 제한하고,
+할당량 초과(429)·일시적 서버 오류는 지터를 준 지수 백오프로 재시도합니다.
+
+LangChain 채팅 모델은 govern_chat_model()로 감싸 원격 호출(_generate/_stream)만 관문을 거치게 하므로,
+응답 캐시(cache=)에서 바로 반환되는 요청은 버킷과 동시 실행 슬롯을 쓰지 않습니다.
+임베딩 호출은 할당량이 따로 집계되므로 별도의 관문(embedding_governor)을 거칩니다.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+from core.history import count_tokens, message_text
+
+# 재시도할 HTTP 상태 코드 (할당량 초과, 서버 오류, 시간 초과)
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+# 상태 코드·예외 타입이 없는 오류에서 찾을 gRPC 상태 이름 (대소문자 구분, 일반 문장 속 숫자나 단어는 보지 않음)
+_RETRYABLE_STATUS_PATTERN = re.compile(r"\b(?:RESOURCE_EXHAUSTED|UNAVAILABLE)\b")
+_RETRYABLE_ERROR_TYPES = ("ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded", "TooManyRequests", "InternalServerError")
+# 서버가 알려준 재시도 대기 시간 (예: "retry_delay { seconds: 12 }", "Please retry in 12.5s")
+_RETRY_DELAY_PATTERN = re.compile(r"(?:retry_delay\s*\{\s*seconds:\s*|retry in\s+)(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """예외에 붙은 HTTP 상태 코드 (google api_core·google.genai의 code, httpx·requests의 response.status_code 등)"""
+    for value in (
+        getattr(error, "code", None),
+        getattr(error, "status_code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+    ):
+        if isinstance(value, int):
+            return value
+    return None
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    할당량 초과·일시적 오류처럼 다시 시도하면 성공할 수 있는 오류인지 판별합니다.
+
+    상태 코드와 예외 타입으로 판단하고, 둘 다 없을 때만 메시지의 gRPC 상태 이름(RESOURCE_EXHAUSTED, UNAVAILABLE)을 봅니다.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (TimeoutError, ConnectionError)):
+            return True
+        code = _status_code(error)
+        if code is not None:
+            if code in RETRYABLE_STATUS_CODES:
+                return True
+        elif type(error).__name__ in _RETRYABLE_ERROR_TYPES:
+            return True
+        elif _RETRYABLE_STATUS_PATTERN.search(str(error)):
+            return True
+        # LangChain이 감싼 원래 예외까지 확인
+        error = error.__cause__ or error.__context__
+    return False
+
+def _retry_hint(error: BaseException) -> Optional[float]:
+    match = _RETRY_DELAY_PATTERN.search(str(error))
+    return float(match.group(1)) if match else None
+
+def estimate_tokens(value: Any) -> int:
+    """요청 입력(문자열, 메시지, 메시지 목록)의 토큰 수를 로컬에서 근사합니다."""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return count_tokens(value)
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_tokens(item) for item in value)
+    if hasattr(value, "content"):
+        return count_tokens(message_text(value))
+    if hasattr(value, "to_messages"):  # ChatPromptValue
+        return estimate_tokens(value.to_messages())
+    return count_tokens(str(value))
+
+def usage_tokens(result: Any) -> Optional[int]:
+    """
+    응답에 실제 사용 토큰 수가 있으면 반환합니다.
+    (LangChain 메시지·ChatResult·ChatGenerationChunk, google.generativeai 응답)
+    """
+    generations = getattr(result, "generations", None)
+    if isinstance(generations, list):  # ChatResult
+        counts = [count for count in map(usage_tokens, generations) if count is not None]
+        return sum(counts) if counts else None
+    if hasattr(result, "message") and hasattr(result, "text"):  # ChatGeneration(Chunk)
+        result = result.message
+    usage = getattr(result, "usage_metadata", None)
+    if not usage:
+        return None
+    if isinstance(usage, dict):
+        return usage.get("total_tokens") or (usage.get("input_tokens", 0) + usage.get("output_tokens", 0))
+    return getattr(usage, "total_token_count", None)
+
+class TokenBucket:
+    """
+    초당 rate만큼 채워지고 최대 capacity까지 쌓이는 토큰 버킷
+
+    reserve()는 요청량을 먼저 차감(예약)한 뒤 사용 가능해질 때까지 기다릴 시간을 반환하므로,
+    먼저 예약한 호출이 먼저 실행되고(선착순) 기다리는 동안 잠금을 잡지 않습니다.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """amount를 예약하고 기다려야 하는 시간(초)을 반환합니다. (capacity보다 큰 요청은 capacity로 취급)"""
+        with self._lock:
+            self._refill()
+            self._tokens -= min(amount, self.capacity)
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def adjust(self, delta: float):
+        """예약량과 실제 사용량의 차이를 반영합니다. (양수면 추가 차감, 음수면 반환)"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+class GeminiGovernor:
+    """
+    프로세스 전역 Gemini 호출 관문
+
+    호출 하나마다 요청 버킷 1개와 예상 토큰 수만큼 토큰 버킷을 예약하고, 동시 실행 수 제한 안에서 실행합니다.
+    응답에 실제 토큰 수가 있으면 예상치와의 차이를 토큰 버킷에 반영합니다.
+    재시도할 수 있는 오류는 최대 max_retries번까지, 매번 버킷을 다시 예약하며 재시도합니다.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 60,
+        tokens_per_minute: float = 250_000,
+        max_concurrency: int = 4,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+    ):
+        """
+        Args:
+            requests_per_minute: 분당 최대 요청 수
+            tokens_per_minute: 분당 최대 토큰 수 (입력 예상치 기준으로 예약, 응답 후 실제 사용량으로 보정)
+            max_concurrency: 동시에 실행할 수 있는 최대 호출 수
+            max_retries: 재시도 가능한 오류의 최대 재시도 횟수
+            base_delay: 첫 재시도 대기 시간의 상한(초), 이후 2배씩 증가
+            max_delay: 재시도 대기 시간의 최대값(초)
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0, "succeeded": 0, "failed": 0, "retries": 0,
+            "queued": 0, "max_queued": 0, "in_flight": 0,
+            "wait_seconds": 0.0,
+        }
+
+    # ---- 통계 ----
+
+    def _update(self, **deltas):
+        with self._lock:
+            for key, delta in deltas.items():
+                self._stats[key] += delta
+            self._stats["max_queued"] = max(self._stats["max_queued"], self._stats["queued"])
+
+    def stats(self) -> dict:
+        """대기 중(queued)·실행 중(in_flight) 호출 수와 누적 호출·재시도·대기 시간 통계"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_wait_seconds"] = stats["wait_seconds"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+    # ---- 공통 ----
+
+    def _admission_delay(self, tokens: int) -> float:
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+    def _admit(self, tokens: int):
+        """버킷을 예약해 기다린 뒤 동시 실행 슬롯을 얻습니다."""
+        self._update(queued=1)
+        started = time.monotonic()
+        try:
+            time.sleep(self._admission_delay(tokens))
+            self._slots.acquire()
+        finally:
+            self._update(queued=-1, wait_seconds=time.monotonic() - started)
+        self._update(in_flight=1)
+
+    async def _aadmit(self, tokens: int):
+        """_admit()의 비동기 버전 (이벤트 루프를 막지 않음)"""
+        self._update(queued=1)
+        started = time.monotonic()
+        try:
+            await asyncio.sleep(self._admission_delay(tokens))
+            await self._acquire_slot()
+        finally:
+            self._update(queued=-1, wait_seconds=time.monotonic() - started)
+        self._update(in_flight=1)
+
+    def _release(self):
+        self._update(in_flight=-1)
+        self._slots.release()
+
+    def _failed(self, attempt: int, error: Exception) -> bool:
+        """더 재시도하지 않을 오류이면 실패로 기록하고 True를 반환합니다."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            self._update(failed=1)
+            return True
+        self._update(retries=1)
+        return False
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        """지터를 준 지수 백오프 (서버가 대기 시간을 알려주면 그보다 짧게 기다리지 않음)"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        hint = _retry_hint(error)
+        if hint is not None:
+            delay = max(delay, min(hint, self.max_delay))
+        return delay
+
+    def _reconcile(self, actual: Optional[int], reserved: int):
+        if actual is not None:
+            self.tokens.adjust(actual - min(reserved, self.tokens.capacity))
+
+    # ---- 동기 호출 ----
+
+    def call(self, func: Callable, *args, tokens: int = None, **kwargs):
+        """
+        func(*args, **kwargs)를 속도·동시 실행 제한 안에서 실행하고, 일시적 오류는 재시도합니다.
+
+        Args:
+            func: Gemini를 호출하는 함수 (예: llm.invoke)
+            tokens: 예상 토큰 수 (없으면 첫 번째 인자로 추정)
+
+        예:
+            response = governor.call(llm.invoke, messages)
+        """
+        if tokens is None:
+            tokens = estimate_tokens(args[0]) if args else 0
+        self._update(calls=1)
+        attempt = 0
+        while True:
+            self._admit(tokens)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if self._failed(attempt, e):
+                    raise
+                error = e
+            else:
+                self._update(succeeded=1)
+                self._reconcile(usage_tokens(result), tokens)
+                return result
+            finally:
+                self._release()
+
+            time.sleep(self._backoff(attempt, error))
+            attempt += 1
+
+    def stream(self, func: Callable[..., Iterator], *args, tokens: int = None, **kwargs) -> Iterator:
+        """
+        func(*args, **kwargs)가 반환하는 반복자를 슬롯을 잡은 채 끝까지 읽으며 항목을 그대로 내보냅니다.
+
+        이미 내보낸 항목은 되돌릴 수 없으므로 첫 항목을 받기 전에 난 오류만 재시도하고,
+        항목들의 사용 토큰 수 합계로 토큰 버킷을 보정합니다.
+        """
+        if tokens is None:
+            tokens = estimate_tokens(args[0]) if args else 0
+        self._update(calls=1)
+        attempt = 0
+        while True:
+            self._admit(tokens)
+            used, started = None, False
+            try:
+                for item in func(*args, **kwargs):
+                    started = True
+                    count = usage_tokens(item)
+                    if count is not None:
+                        used = (used or 0) + count
+                    yield item
+            except Exception as e:
+                if started:
+                    self._update(failed=1)
+                    raise
+                if self._failed(attempt, e):
+                    raise
+                error = e
+            else:
+                self._update(succeeded=1)
+                self._reconcile(used, tokens)
+                return
+            finally:
+                self._release()
+
+            time.sleep(self._backoff(attempt, error))
+            attempt += 1
+
+    # ---- 비동기 호출 ----
+
+    async def _acquire_slot(self):
+        """이벤트 루프를 막지 않고 동시 실행 슬롯을 얻습니다. (동기 호출과 같은 슬롯을 공유)"""
+        delay = 0.005
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
+    async def acall(self, func: Callable[..., Awaitable], *args, tokens: int = None, **kwargs):
+        """
+        call()의 비동기 버전 (func는 코루틴 함수, 예: llm.ainvoke)
+
+        예:
+            response = await governor.acall(llm.ainvoke, messages)
+        """
+        if tokens is None:
+            tokens = estimate_tokens(args[0]) if args else 0
+        self._update(calls=1)
+        attempt = 0
+        while True:
+            await self._aadmit(tokens)
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                if self._failed(attempt, e):
+                    raise
+                error = e
+            else:
+                self._update(succeeded=1)
+                self._reconcile(usage_tokens(result), tokens)
+                return result
+            finally:
+                self._release()
+
+            await asyncio.sleep(self._backoff(attempt, error))
+            attempt += 1
+
+    async def astream(self, func: Callable[..., AsyncIterator], *args, tokens: int = None, **kwargs) -> AsyncIterator:
+        """stream()의 비동기 버전 (func는 비동기 반복자를 반환하는 함수, 예: 모델의 _astream)"""
+        if tokens is None:
+            tokens = estimate_tokens(args[0]) if args else 0
+        self._update(calls=1)
+        attempt = 0
+        while True:
+            await self._aadmit(tokens)
+            used, started = None, False
+            try:
+                async for item in func(*args, **kwargs):
+                    started = True
+                    count = usage_tokens(item)
+                    if count is not None:
+                        used = (used or 0) + count
+                    yield item
+            except Exception as e:
+                if started:
+                    self._update(failed=1)
+                    raise
+                if self._failed(attempt, e):
+                    raise
+                error = e
+            else:
+                self._update(succeeded=1)
+                self._reconcile(used, tokens)
+                return
+            finally:
+                self._release()
+
+            await asyncio.sleep(self._backoff(attempt, error))
+            attempt += 1
+
+# 프로세스 전역 관문 (모든 Gemini 호출이 공유)
+governor = GeminiGovernor(
+    requests_per_minute=float(os.getenv("GEMINI_RPM", "60")),
+    tokens_per_minute=float(os.getenv("GEMINI_TPM", "250000")),
+    max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+    max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "4")),
+    base_delay=float(os.getenv("GEMINI_RETRY_BASE_SECONDS", "1.0")),
+    max_delay=float(os.getenv("GEMINI_RETRY_MAX_SECONDS", "30")),
+)
+
+# 임베딩 호출용 관문 (임베딩 모델의 할당량은 생성 모델과 따로 집계되므로 버킷과 슬롯을 분리)
+# CachedEmbeddings가 캐시에 없는 텍스트를 원격으로 임베딩할 때만 거침
+embedding_governor = GeminiGovernor(
+    requests_per_minute=float(os.getenv("GEMINI_EMBED_RPM", "1500")),
+    tokens_per_minute=float(os.getenv("GEMINI_EMBED_TPM", "1000000")),
+    max_concurrency=int(os.getenv("GEMINI_EMBED_MAX_CONCURRENCY", "4")),
+    max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "4")),
+    base_delay=float(os.getenv("GEMINI_RETRY_BASE_SECONDS", "1.0")),
+    max_delay=float(os.getenv("GEMINI_RETRY_MAX_SECONDS", "30")),
+)
+
+# 관문이 재시도를 맡으므로 클라이언트 자체 재시도는 끔 (1 = 최초 요청만)
+CLIENT_MAX_RETRIES = 1
+
+class _GovernedChatModel:
+    """govern_chat_model()로 감싼 모델 클래스의 표시용 기반 클래스"""
+
+    __slots__ = ()
+
+# 관문 안에서 실행 중인 모델 메서드 표시 (_stream이 내부에서 _generate를 부르는 모델 등에서 두 번 예약하지 않도록)
+_inside_governed_call = contextvars.ContextVar("inside_governed_call", default=False)
+
+def _marked(func: Callable) -> Callable:
+    def call(*args, **kwargs):
+        token = _inside_governed_call.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _inside_governed_call.reset(token)
+    return call
+
+def _amarked(func: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    async def call(*args, **kwargs):
+        token = _inside_governed_call.set(True)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _inside_governed_call.reset(token)
+    return call
+
+def _marked_iter(func: Callable[..., Iterator]) -> Callable[..., Iterator]:
+    # 항목을 읽는 동안만 표시 (yield 사이에 호출자가 실행하는 코드는 관문 밖)
+    def iterate(*args, **kwargs):
+        iterator = iter(func(*args, **kwargs))
+        while True:
+            token = _inside_governed_call.set(True)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _inside_governed_call.reset(token)
+            yield item
+    return iterate
+
+def _amarked_iter(func: Callable[..., AsyncIterator]) -> Callable[..., AsyncIterator]:
+    async def iterate(*args, **kwargs):
+        iterator = func(*args, **kwargs).__aiter__()
+        while True:
+            token = _inside_governed_call.set(True)
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                _inside_governed_call.reset(token)
+            yield item
+    return iterate
+
+def _governed_generate(self, messages, stop=None, run_manager=None, **kwargs):
+    method = super(type(self), self)._generate
+    if _inside_governed_call.get():
+        return method(messages, stop, run_manager, **kwargs)
+    return governor.call(_marked(method), messages, stop, run_manager, **kwargs)
+
+async def _governed_agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+    method = super(type(self), self)._agenerate
+    if _inside_governed_call.get():
+        return await method(messages, stop, run_manager, **kwargs)
+    return await governor.acall(_amarked(method), messages, stop, run_manager, **kwargs)
+
+def _governed_stream(self, messages, stop=None, run_manager=None, **kwargs):
+    method = super(type(self), self)._stream
+    if _inside_governed_call.get():
+        yield from method(messages, stop, run_manager, **kwargs)
+        return
+    yield from governor.stream(_marked_iter(method), messages, stop, run_manager, **kwargs)
+
+async def _governed_astream(self, messages, stop=None, run_manager=None, **kwargs):
+    method = super(type(self), self)._astream
+    stream = (
+        method(messages, stop, run_manager, **kwargs)
+        if _inside_governed_call.get()
+        else governor.astream(_amarked_iter(method), messages, stop, run_manager, **kwargs)
+    )
+    async for chunk in stream:
+        yield chunk
+
+@functools.lru_cache(maxsize=None)
+def _governed_class(cls: type) -> type:
+    """
+    cls의 원격 호출 메서드를 관문으로 감싼 하위 클래스를 만듭니다.
+
+    BaseChatModel은 응답 캐시를 확인한 뒤 캐시에 없을 때만 이 메서드들을 부르므로 캐시 적중은 관문을 거치지 않습니다.
+    모델이 직접 구현한 메서드만 감싸므로, 기본 구현(_agenerate → _generate 등)을 거쳐 두 번 예약하지 않고
+    _stream을 구현하지 않은 모델이 스트리밍 가능으로 판단되지도 않습니다.
+    """
+    from langchain_core.language_models import BaseChatModel
+
+    namespace = {"__module__": cls.__module__, "__qualname__": cls.__qualname__, "__slots__": ()}
+    for name, wrapper in (
+        ("_generate", _governed_generate),
+        ("_agenerate", _governed_agenerate),
+        ("_stream", _governed_stream),
+        ("_astream", _governed_astream),
+    ):
+        if getattr(cls, name) is not getattr(BaseChatModel, name):
+            namespace[name] = wrapper
+    # 클래스 이름·모듈을 그대로 두어 LangChain 직렬화 id(응답 캐시 키)가 바뀌지 않도록 함
+    return type(cls)(cls.__name__, (_GovernedChatModel, cls), namespace)
+
+def govern_chat_model(model):
+    """
+    LangChain 채팅 모델(BaseChatModel)의 원격 호출이 관문을 거치도록 모델을 바꿔 반환합니다. (같은 객체)
+
+    invoke/ainvoke/stream과 bind_tools로 만든 Runnable 모두 그대로 사용하면 되고,
+    응답 캐시에 있는 요청은 요청·토큰 버킷과 동시 실행 슬롯을 쓰지 않으며 토큰 사용량도 차감하지 않습니다.
+
+    예:
+        llm = govern_chat_model(ChatGoogleGenerativeAI(model="gemini-2.5-flash", cache=cache))
+        response = llm.bind_tools(tools).invoke(messages)
+    """
+    from langchain_core.language_models import BaseChatModel
+
+    if isinstance(model, BaseChatModel) and not isinstance(model, _GovernedChatModel):
+        model.__class__ = _governed_class(type(model))
+    return model
@@ -0,0 +1,217 @@
+"""
+대화 히스토리 관리 모듈
+토큰 예산 안에서 최근 N개 턴은 그대로 유지하고, 그보다 오래된 턴은 요약 메시지 하나로 접어서 전달합니다.
+"""
+import json
+import math
+import os
+import re
+from typing import Callable, List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+# 요약 메시지 앞에 붙는 표시 (에이전트가 요약임을 알 수 있도록)
+SUMMARY_PREFIX = "[이전 대화 요약]"
+
+# 메시지 1개당 역할/구분자 등에 드는 대략적인 토큰 수
+_MESSAGE_OVERHEAD = 4
+
+_WORD_PATTERN = re.compile(r"[A-Za-z0-9_]+|[가-힣぀-ヿ一-鿿]|[^\sA-Za-z0-9_]")
+
+def count_tokens(text: str) -> int:
+    """
+    텍스트의 토큰 수를 로컬에서 근사합니다. (원격 토크나이저 호출 없음)
+
+    영문/숫자는 4글자당 1토큰, 한글·한자·가나는 글자당 1토큰, 기호는 개당 1토큰으로 계산하여
+    실제 Gemini 토큰 수보다 약간 크게(보수적으로) 잡습니다.
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _WORD_PATTERN.findall(text):
+        if piece[0].isascii() and (piece[0].isalnum() or piece[0] == "_"):
+            tokens += math.ceil(len(piece) / 4)
+        else:
+            tokens += 1
+    return tokens
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """count_tokens 기준으로 max_tokens 이하가 되도록 텍스트 뒷부분을 잘라냅니다."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+def message_text(message: BaseMessage) -> str:
+    """메시지 content를 문자열로 변환합니다. (리스트 형태의 content 포함)"""
+    content = message.content
+    if isinstance(content, list):
+        return "".join(
+            item.get("text", "") if isinstance(item, dict) else str(item)
+            for item in content
+        )
+    return content if isinstance(content, str) else str(content)
+
+def count_message_tokens(message: BaseMessage) -> int:
+    """메시지 하나의 토큰 수 (본문 + 도구 호출 인자 + 고정 오버헤드)"""
+    tokens = _MESSAGE_OVERHEAD + count_tokens(message_text(message))
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        tokens += count_tokens(tool_call.get("name", ""))
+        tokens += count_tokens(json.dumps(tool_call.get("args", {}), ensure_ascii=False))
+    return tokens
+
+def count_messages_tokens(messages: List[BaseMessage]) -> int:
+    """메시지 목록 전체의 토큰 수"""
+    return sum(count_message_tokens(m) for m in messages)
+
+def split_turns(messages: List[BaseMessage]) -> List[Tuple[int, int]]:
+    """
+    메시지 목록을 턴 단위 (시작 인덱스, 끝 인덱스) 구간으로 나눕니다.
+
+    턴은 HumanMessage에서 시작하여 다음 HumanMessage 직전까지이므로,
+    AI의 tool_calls와 그에 대한 ToolMessage는 항상 같은 턴에 들어갑니다.
+    """
+    starts = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+    if not starts or starts[0] != 0:
+        starts = [0] + starts
+    return [(start, end) for start, end in zip(starts, starts[1:] + [len(messages)])]
+
+def _format_for_summary(messages: List[BaseMessage]) -> str:
+    lines = []
+    for m in messages:
+        text = message_text(m).strip()
+        if m.type == "tool":
+            text = text[:500]
+        if text:
+            lines.append(f"{m.type}: {text}")
+    return "\n".join(lines)
+
+_summary_llm = None
+
+def default_summarizer(previous_summary: str, messages: List[BaseMessage]) -> str:
+    """
+    이전 요약과 새로 접히는 메시지를 합쳐 갱신된 요약을 만듭니다. (Gemini 사용)
+
+    Args:
+        previous_summary: 지금까지의 요약 (없으면 빈 문자열)
+        messages: 이번에 요약에 새로 포함될 메시지들
+
+    Returns:
+        갱신된 요약 문자열
+    """
+    global _summary_llm
+    if _summary_llm is None:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        from core.gemini_governor import CLIENT_MAX_RETRIES, govern_chat_model
+        _summary_llm = govern_chat_model(ChatGoogleGenerativeAI(
+            model="gemini-2.5-flash",
+            temperature=0,
+            google_api_key=os.getenv("GEMINI_API_KEY"),
+            max_retries=CLIENT_MAX_RETRIES
+        ))
+
+    prompt = f"""다음은 지금까지의 대화 요약과 그 이후에 이어진 대화입니다.
+두 내용을 합쳐 하나의 간결한 요약으로 갱신해주세요.
+사용자의 요청, 확정된 사실, 숫자, 고유명사, 아직 해결되지 않은 질문은 빠뜨리지 마세요.
+
+기존 요약:
+{previous_summary or "(없음)"}
+
+이어진 대화:
+{_format_for_summary(messages)}
+
+갱신된 요약:"""
+    response = _summary_llm.invoke(prompt)
+    return message_text(response).strip()
+
+def _fallback_summary(previous_summary: str, messages: List[BaseMessage]) -> str:
+    """요약 LLM 호출이 실패했을 때 사용하는 단순 발췌 요약"""
+    lines = [previous_summary] if previous_summary else []
+    for m in messages:
+        if isinstance(m, HumanMessage):
+            lines.append(f"- 사용자: {message_text(m)[:200]}")
+    return "\n".join(lines)
+
+def _summary_message_tokens(summary: str) -> int:
+    """요약 메시지(표시 + 요약 본문)의 토큰 수"""
+    return _MESSAGE_OVERHEAD + count_tokens(SUMMARY_PREFIX) + count_tokens(summary)
+
+class ConversationWindow:
+    """
+    토큰 예산 기반 대화 윈도우
+
+    최근 keep_turns개의 턴은 원문 그대로 두고, 그보다 오래된 턴이나 예산(max_tokens)을 넘는 턴은
+    요약 메시지로 접습니다. 요약은 매번 처음부터 만들지 않고 새로 접히는 턴만 반영해 갱신합니다.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 8000,
+        keep_turns: int = 6,
+        summarizer: Optional[Callable[[str, List[BaseMessage]], str]] = None
+    ):
+        """
+        Args:
+            max_tokens: 요약 + 원문 메시지 전체의 토큰 예산
+            keep_turns: 원문 그대로 유지할 최대 턴 수 (마지막 턴은 예산을 넘어도 항상 유지)
+            summarizer: (기존 요약, 새로 접을 메시지) -> 갱신된 요약 함수
+        """
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.summarizer = summarizer or default_summarizer
+
+    def prepare(self, messages: List[BaseMessage], state: Optional[dict] = None) -> Tuple[List[BaseMessage], dict]:
+        """
+        에이전트에 전달할 메시지 목록을 만듭니다.
+
+        Args:
+            messages: 채팅의 전체 메시지 목록
+            state: 이전 호출이 반환한 상태 ({"summary": str, "summarized_count": int})
+
+        Returns:
+            (에이전트 입력 메시지 목록, 갱신된 상태)
+        """
+        state = dict(state or {})
+        summary = state.get("summary", "")
+        summarized_count = state.get("summarized_count", 0)
+        # 메시지가 삭제되는 등 이전 상태와 맞지 않으면 처음부터 다시 계산
+        if summarized_count > len(messages):
+            summary, summarized_count = "", 0
+
+        turns = [t for t in split_turns(messages) if t[0] >= summarized_count]
+        kept = turns[-self.keep_turns:] if self.keep_turns > 0 else turns[-1:]
+        turn_tokens = [count_messages_tokens(messages[s:e]) for s, e in kept]
+
+        while True:
+            # 예산을 넘으면 오래된 턴부터 요약으로 넘김 (마지막 턴은 항상 유지)
+            summary_tokens = _summary_message_tokens(summary) if summary else 0
+            while len(kept) > 1 and summary_tokens + sum(turn_tokens) > self.max_tokens:
+                kept = kept[1:]
+                turn_tokens = turn_tokens[1:]
+
+            cut = kept[0][0] if kept else len(messages)
+            if cut <= summarized_count:
+                break
+            to_fold = messages[summarized_count:cut]
+            try:
+                summary = self.summarizer(summary, to_fold)
+            except Exception:
+                summary = _fallback_summary(summary, to_fold)
+            summarized_count = cut
+            # 갱신된 요약이 길어져 다시 예산을 넘을 수 있으므로 새 요약 기준으로 다시 확인
+
+        window = list(messages[summarized_count:])
+        if summary:
+            # 마지막 턴만 남았는데도 예산을 넘으면 요약을 남은 예산만큼 잘라서 전달 (상태에는 전체 요약 유지)
+            room = self.max_tokens - sum(turn_tokens) - _summary_message_tokens("")
+            shown = truncate_tokens(summary, room)
+            if shown:
+                window = [SystemMessage(content=f"{SUMMARY_PREFIX}\n{shown}")] + window
+
+        return window, {"summary": summary, "summarized_count": summarized_count}
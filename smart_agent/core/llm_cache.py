@@ -0,0 +1,192 @@
+"""
+LLM 응답 캐시 모듈
+LangChain의 BaseCache를 구현하여 채팅 모델에 cache=로 넘기면,
+(모델 설정·온도·바인딩된 도구 스키마, 직렬화된 메시지 목록)이 같은 요청은 원격 호출 없이 저장된 응답을 반환합니다.
+메모리(LRU)와 SQLite 디스크(TTL) 2단계로 저장하며, 도구 호출(tool_calls)이 포함된 응답도 그대로 복원됩니다.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+def make_cache_key(prompt: str, llm_string: str) -> str:
+    """
+    캐시 키를 만듭니다.
+
+    prompt는 LangChain이 직렬화한 메시지 목록이고, llm_string에는 모델 이름·온도 등 설정과
+    bind_tools로 바인딩된 도구 스키마가 포함되므로 둘을 함께 해시하면 같은 요청인지 판별할 수 있습니다.
+    """
+    return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+class LLMResponseCache(BaseCache):
+    """
+    LLM 응답 2단계 캐시
+
+    - 메모리: 최근 사용 순서(LRU)로 최대 max_memory_entries개 보관
+    - 디스크: SQLite에 ttl_seconds 동안 보관 (프로세스 재시작 후에도 유지)
+    응답은 langchain_core.load의 dumps/loads로 직렬화하여 저장하므로 메시지 종류와 도구 호출이 보존되고,
+    조회할 때마다 새 객체로 복원되어 호출자가 결과를 수정해도 캐시가 바뀌지 않습니다.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "data/cache/llm_cache.sqlite3",
+        max_memory_entries: int = 256,
+        ttl_seconds: int = 86400,
+        namespace: str = "default",
+    ):
+        """
+        Args:
+            db_path: 캐시 SQLite 파일 경로
+            max_memory_entries: 메모리 계층의 최대 항목 수
+            ttl_seconds: 항목 유효 시간(초)
+            namespace: 같은 파일을 쓰는 캐시들을 구분하는 이름 (에이전트 타입 등)
+        """
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # {key: (만료 시각, 직렬화된 응답)}
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+        # SQLite 파일은 처음 조회할 때 엽니다. (에이전트 생성·모듈 import만으로 캐시 디렉토리·파일이 생기지 않도록)
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """디스크 계층 연결을 반환합니다. 처음 호출할 때 파일과 테이블을 만듭니다. (잠금 보유 상태에서 호출)"""
+        if self._conn is None:
+            if os.path.dirname(self.db_path):
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_expires ON llm_cache(expires_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = make_cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return loads(payload, allowed_objects="core")
+                del self._memory[key]
+                self._stats["expired"] += 1
+
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT response, expires_at FROM llm_cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            payload, expires_at = row
+            if expires_at <= now:
+                conn.execute("DELETE FROM llm_cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+                conn.commit()
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            self._remember(key, expires_at, payload)
+            self._stats["disk_hits"] += 1
+        return loads(payload, allowed_objects="core")
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = make_cache_key(prompt, llm_string)
+        payload = dumps(list(return_val))
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, payload)
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (namespace, key, response, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, payload, expires_at),
+            )
+            # 만료된 행 정리
+            purged = conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+            self._stats["expired"] += max(purged, 0)
+            conn.commit()
+
+    def _remember(self, key: str, expires_at: float, payload: str):
+        """메모리 계층에 저장하고 용량을 넘으면 가장 오래 사용하지 않은 항목을 제거합니다. (잠금 보유 상태에서 호출)"""
+        self._memory[key] = (expires_at, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def clear(self, **kwargs: Any) -> None:
+        """이 namespace의 메모리와 디스크 캐시를 모두 비웁니다."""
+        with self._lock:
+            self._memory.clear()
+            conn = self._connection()
+            conn.execute("DELETE FROM llm_cache WHERE namespace = ?", (self.namespace,))
+            conn.commit()
+
+    def stats(self) -> dict:
+        """적중률과 제거 횟수 등 캐시 통계를 반환합니다."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        total = hits + stats["misses"]
+        stats["hit_rate"] = hits / total if total else 0.0
+        return stats
+
+# namespace별 캐시 인스턴스 (같은 프로세스에서는 메모리 계층을 공유)
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_response_cache(namespace: str, ttl_seconds: int) -> Optional[LLMResponseCache]:
+    """
+    namespace별 응답 캐시를 반환합니다.
+    LLM_CACHE_ENABLED=0이면 모든 캐시를 끄고 None을 반환합니다.
+
+    Args:
+        namespace: 캐시 이름 (에이전트 타입 등)
+        ttl_seconds: 항목 유효 시간(초)
+    """
+    if os.getenv("LLM_CACHE_ENABLED", "1") == "0":
+        return None
+    with _caches_lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            cache = LLMResponseCache(
+                db_path=os.getenv("LLM_CACHE_PATH", "data/cache/llm_cache.sqlite3"),
+                ttl_seconds=ttl_seconds,
+                namespace=namespace,
+            )
+            _caches[namespace] = cache
+        return cache
+
+def get_cache_stats() -> dict:
+    """namespace별 캐시 통계"""
+    with _caches_lock:
+        caches = dict(_caches)
+    return {namespace: cache.stats() for namespace, cache in caches.items()}
@@ -0,0 +1,175 @@
+"""
+검색 후처리(재정렬) 모듈
+
+후보 문서를 넉넉히 가져온 뒤
+1) 질의와의 유사도에 선택적으로 어휘 겹침 점수를 섞고,
+2) 하나의 NumPy 유사도 행렬로 MMR(Maximal Marginal Relevance)을 계산하여 중복 청크를 걸러내고,
+3) 최종 결과를 토큰 예산 안에 들어가도록 채웁니다.
+겹치게 분할된(chunk_overlap) 비슷한 청크가 컨텍스트를 낭비하지 않도록 하기 위한 단계입니다.
+"""
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+from core.bm25 import tokenize
+from core.flat_index import FlatVectorStore, _normalize
+from core.history import count_tokens
+
+def lexical_overlap(query: str, texts: List[str]) -> np.ndarray:
+    """질의 토큰 중 각 문서에 등장하는 비율 (0~1)"""
+    query_tokens = set(tokenize(query))
+    if not query_tokens:
+        return np.zeros(len(texts), dtype=np.float32)
+    return np.array(
+        [len(query_tokens & set(tokenize(text))) / len(query_tokens) for text in texts],
+        dtype=np.float32,
+    )
+
+def mmr_select(relevance: np.ndarray, doc_vectors: np.ndarray, k: int, lambda_mult: float = 0.5) -> List[int]:
+    """
+    MMR로 k개의 문서 인덱스를 고릅니다.
+
+    문서 간 유사도 행렬을 한 번만 계산하고, 선택된 문서들과의 최대 유사도를 벡터로 갱신하므로
+    후보 n개에 대해 O(n^2) 행렬 곱 한 번과 O(k·n) 갱신으로 끝납니다.
+
+    Args:
+        relevance: 질의와 각 문서의 관련도 (n,)
+        doc_vectors: 정규화된 문서 벡터 (n, 차원)
+        k: 고를 문서 수
+        lambda_mult: 1이면 관련도만, 0이면 다양성만 고려
+
+    Returns:
+        선택 순서대로의 문서 인덱스
+    """
+    n = len(relevance)
+    if n == 0 or k <= 0:
+        return []
+    similarity = doc_vectors @ doc_vectors.T
+    max_similarity = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+
+    selected = [int(np.argmax(relevance))]
+    for _ in range(min(k, n) - 1):
+        last = selected[-1]
+        available[last] = False
+        max_similarity = np.maximum(max_similarity, similarity[last])
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        selected.append(int(np.argmax(scores)))
+    return selected
+
+def pack_to_budget(
+    docs: List[Document],
+    max_tokens: Optional[int],
+    token_counter: Callable[[str], int] = count_tokens,
+) -> List[Document]:
+    """
+    순서대로 문서를 담되 토큰 예산을 넘는 문서는 건너뜁니다.
+    (첫 문서 하나도 예산에 들어가지 않으면 첫 문서만 반환)
+    """
+    if not max_tokens:
+        return docs
+    packed = []
+    used = 0
+    for doc in docs:
+        tokens = token_counter(doc.page_content)
+        if used + tokens <= max_tokens:
+            packed.append(doc)
+            used += tokens
+    return packed or docs[:1]
+
+def search_with_vectors(vectorstore: VectorStore, query_vector: List[float], k: int) -> Tuple[List[Document], Optional[np.ndarray]]:
+    """
+    질의 벡터로 후보 k개와 벡터 DB에 저장된 후보 임베딩을 함께 가져옵니다.
+
+    Chroma는 컬렉션 query(include=["embeddings"])로, FlatVectorStore는 메모리 맵 행렬에서 바로 읽으므로
+    후보를 다시 임베딩하지 않습니다. 저장된 벡터를 꺼낼 수 없는 벡터스토어면 (문서, None)을 반환합니다.
+
+    Returns:
+        (후보 문서 목록, 후보 벡터 (n, 차원) 또는 None)
+    """
+    if isinstance(vectorstore, FlatVectorStore):
+        hits = vectorstore.similarity_search_by_vector_with_embeddings(query_vector, k=k)
+        if not hits:
+            return [], None
+        return [doc for doc, _ in hits], np.stack([vector for _, vector in hits])
+
+    collection = getattr(vectorstore, "_collection", None)
+    if collection is not None:
+        result = collection.query(
+            query_embeddings=[query_vector],
+            n_results=k,
+            include=["documents", "metadatas", "embeddings"],
+        )
+        ids, texts = result["ids"][0], result["documents"][0]
+        metadatas = result["metadatas"][0] if result.get("metadatas") else [None] * len(ids)
+        docs = [
+            Document(id=doc_id, page_content=text, metadata=metadata or {})
+            for doc_id, text, metadata in zip(ids, texts, metadatas)
+        ]
+        embeddings = result.get("embeddings")
+        vectors = np.asarray(embeddings[0], dtype=np.float32) if embeddings is not None and len(docs) else None
+        return docs, vectors
+
+    return vectorstore.similarity_search_by_vector(query_vector, k=k), None
+
+class RerankingRetriever(BaseRetriever):
+    """
+    과다 검색(fetch_k) 후 MMR·어휘 재채점·토큰 예산 패킹을 적용하는 리트리버
+
+    후보 임베딩은 벡터 DB에 저장된 벡터를 함께 가져와 쓰므로 질의마다 임베딩 호출은 질의 1건뿐입니다.
+    (저장된 벡터를 꺼낼 수 없는 벡터스토어만 embeddings로 다시 구함, CachedEmbeddings 권장)
+    """
+
+    vectorstore: VectorStore
+    embeddings: Embeddings
+    k: int = 3
+    fetch_k: int = 20
+    lambda_mult: float = 0.5
+    lexical_weight: float = 0.0
+    max_tokens: Optional[int] = None
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def rerank(
+        self,
+        query: str,
+        candidates: List[Document],
+        doc_vectors: Optional[np.ndarray] = None,
+        query_vector: Optional[List[float]] = None,
+    ) -> List[Document]:
+        """
+        후보 문서를 재정렬하여 최종 결과를 반환합니다.
+
+        Args:
+            query: 질의
+            candidates: 후보 문서
+            doc_vectors: 후보 임베딩 (없으면 embeddings로 계산)
+            query_vector: 질의 임베딩 (없으면 embeddings로 계산)
+        """
+        if not candidates:
+            return []
+        texts = [doc.page_content for doc in candidates]
+        if query_vector is None:
+            query_vector = self.embeddings.embed_query(query)
+        if doc_vectors is None:
+            doc_vectors = self.embeddings.embed_documents(texts)
+        query_vector = _normalize(query_vector)[0]
+        doc_vectors = _normalize(doc_vectors)
+
+        relevance = doc_vectors @ query_vector
+        if self.lexical_weight:
+            relevance = (1 - self.lexical_weight) * relevance + self.lexical_weight * lexical_overlap(query, texts)
+
+        order = mmr_select(relevance, doc_vectors, self.k, self.lambda_mult)
+        return pack_to_budget([candidates[i] for i in order], self.max_tokens)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        query_vector = self.embeddings.embed_query(query)
+        candidates, doc_vectors = search_with_vectors(self.vectorstore, query_vector, self.fetch_k)
+        return self.rerank(query, candidates, doc_vectors=doc_vectors, query_vector=query_vector)
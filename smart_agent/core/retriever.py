@@ -1,36 +1,199 @@
 import os
+import re
+import threading
+from typing import List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_chroma import Chroma
 
+from core.bm25 import BM25Index
+from core.embedding_cache import CachedEmbeddings
+from core.flat_index import FlatVectorStore
+from core.rerank import RerankingRetriever
+
+# 벡터스토어 백엔드: "chroma"(기본) 또는 "flat"(메모리 맵 NumPy 평면 인덱스)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+
+# 정확한 용어 검색으로 볼 토큰 (티커, 제품명/모델명, 코드 등: 대문자·숫자 포함)
+_EXACT_TERM_PATTERN = re.compile(r"^(?=.*[A-Z0-9])[A-Za-z0-9][A-Za-z0-9.\-]*$")
+
+def extract_exact_terms(query: str) -> List[str]:
+    """
+    질의에서 정확히 일치해야 하는 용어를 추출합니다.
+
+    따옴표로 감싼 구절, 또는 짧은 질의(3단어 이하)의 대문자·숫자 포함 토큰(예: AAPL, 005930, RTX4090)을 반환합니다.
+    """
+    quoted = re.findall(r'"([^"]+)"', query)
+    if quoted:
+        return quoted
+    words = query.split()
+    if len(words) > 3:
+        return []
+    return [w for w in words if _EXACT_TERM_PATTERN.match(w)]
+
+def _doc_key(doc: Document) -> str:
+    return doc.id or doc.page_content
+
+def reciprocal_rank_fusion(result_lists: List[List[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """
+    여러 검색 결과 목록을 Reciprocal Rank Fusion으로 합칩니다.
+
+    각 목록에서의 순위 r에 대해 1 / (rrf_k + r)을 더한 점수로 정렬합니다.
+    """
+    scores = {}
+    docs = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = _doc_key(doc)
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [docs[key] for key in ranked]
+
+class HybridRetriever(BaseRetriever):
+    """
+    BM25 어휘 검색 + 벡터 검색 하이브리드 리트리버
+
+    정확한 용어(티커, 제품명 등) 질의가 어휘 인덱스에서 바로 찾아지면 임베딩 호출 없이 반환하고,
+    그 외에는 두 결과를 Reciprocal Rank Fusion으로 합칩니다.
+    """
+
+    vectorstore: VectorStore
+    bm25: BM25Index
+    k: int = 3
+    fetch_k: int = 10
+    rrf_k: int = 60
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _lexical_only(self, query: str, lexical: List[Document]) -> bool:
+        exact_terms = extract_exact_terms(query)
+        if not exact_terms or not lexical:
+            return False
+        top_text = lexical[0].page_content.lower()
+        return all(term.lower() in top_text for term in exact_terms)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        lexical = [doc for doc, _ in self.bm25.search(query, self.fetch_k)]
+        if self._lexical_only(query, lexical):
+            return lexical[:self.k]
+
+        dense = self.vectorstore.similarity_search(query, k=self.fetch_k)
+        return reciprocal_rank_fusion([dense, lexical], k=self.k, rrf_k=self.rrf_k)
+
 class VectorResourceManager:
-    def __init__(self, db_path: str = "data/db"):
+    # 프로세스 전역 벡터스토어 풀 {(backend, db_path): VectorStore}와 BM25 인덱스 {(backend, db_path): (문서 수, BM25Index)}
+    _vectorstores = {}
+    _bm25_indexes = {}
+    _lock = threading.Lock()
+
+    def __init__(self, db_path: str = "data/db", backend: str = None):
+        """
+        Args:
+            db_path: 벡터 DB 폴더
+            backend: "chroma" 또는 "flat" (없으면 VECTOR_BACKEND 환경 변수)
+        """
         self.db_path = db_path
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/embedding-001",
-            google_api_key=os.getenv("GEMINI_API_KEY")
+        self.backend = backend or VECTOR_BACKEND
+        if self.backend not in ("chroma", "flat"):
+            raise ValueError(f"알 수 없는 벡터스토어 백엔드: {self.backend}")
+        # 내용이 같은 텍스트는 다시 임베딩하지 않도록 디스크 캐시를 거침
+        self.embeddings = CachedEmbeddings(
+            GoogleGenerativeAIEmbeddings(
+                model="models/embedding-001",
+                google_api_key=os.getenv("GEMINI_API_KEY")
+            ),
+            db_path=os.getenv("EMBEDDING_CACHE_PATH", "data/cache/embeddings.sqlite3")
         )
         # 폴더가 없으면 생성
         os.makedirs(self.db_path, exist_ok=True)
 
-    def create_or_get_vectorstore(self) -> Chroma:
+    @property
+    def _pool_key(self) -> tuple:
+        return (self.backend, os.path.abspath(self.db_path))
+
+    def create_or_get_vectorstore(self) -> VectorStore:
         """
         기존 벡터 DB를 로드합니다.
+        같은 db_path의 벡터스토어는 프로세스에서 한 번만 생성하여 재사용합니다.
         """
-        vectorstore = Chroma(
-            persist_directory=self.db_path,
-            embedding_function=self.embeddings
-        )
-        return vectorstore
+        with self._lock:
+            vectorstore = self._vectorstores.get(self._pool_key)
+            if vectorstore is None:
+                if self.backend == "flat":
+                    vectorstore = FlatVectorStore(
+                        persist_directory=self.db_path,
+                        embedding_function=self.embeddings
+                    )
+                else:
+                    vectorstore = Chroma(
+                        persist_directory=self.db_path,
+                        embedding_function=self.embeddings
+                    )
+                self._vectorstores[self._pool_key] = vectorstore
+            return vectorstore
+
+    def _all_documents(self, vectorstore) -> List[Document]:
+        if isinstance(vectorstore, FlatVectorStore):
+            return vectorstore.get_documents()
+        data = vectorstore.get(include=["documents", "metadatas"])
+        return [
+            Document(id=doc_id, page_content=text or "", metadata=metadata or {})
+            for doc_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"])
+        ]
 
-    def get_retriever(self):
-        """리트리버 객체 반환 (상위 k개 결과 설정 가능)"""
+    def get_bm25_index(self) -> BM25Index:
+        """
+        벡터 DB에 저장된 문서로 BM25 인덱스를 만들어 반환합니다.
+        문서 수가 바뀌었을 때만 다시 만듭니다.
+        """
         vectorstore = self.create_or_get_vectorstore()
-        return vectorstore.as_retriever(search_kwargs={"k": 3})
+        count = vectorstore.count() if isinstance(vectorstore, FlatVectorStore) else vectorstore._collection.count()
+        with self._lock:
+            cached = self._bm25_indexes.get(self._pool_key)
+            if cached is not None and cached[0] == count:
+                return cached[1]
+
+        index = BM25Index(self._all_documents(vectorstore))
+        with self._lock:
+            self._bm25_indexes[self._pool_key] = (count, index)
+        return index
+
+    def get_retriever(self, mode: str = "dense", k: int = 3, max_tokens: int = None):
+        """
+        리트리버 객체 반환 (상위 k개 결과 설정 가능)
+
+        Args:
+            mode: "dense"(벡터 검색), "hybrid"(BM25 + 벡터 검색, RRF 결합)
+                  또는 "mmr"(과다 검색 후 MMR·어휘 재채점으로 중복 청크 제거)
+            k: 반환할 문서 수
+            max_tokens: "mmr" 모드에서 결과 문서들의 최대 토큰 수 (없으면 제한 없음)
+        """
+        vectorstore = self.create_or_get_vectorstore()
+        if mode == "hybrid":
+            return HybridRetriever(vectorstore=vectorstore, bm25=self.get_bm25_index(), k=k)
+        if mode == "mmr":
+            return RerankingRetriever(
+                vectorstore=vectorstore,
+                embeddings=self.embeddings,
+                k=k,
+                lexical_weight=0.2,
+                max_tokens=max_tokens
+            )
+        if mode != "dense":
+            raise ValueError(f"알 수 없는 검색 모드: {mode}")
+        return vectorstore.as_retriever(search_kwargs={"k": k})
 
 # 사용 예시 (테스트용)
 if __name__ == "__main__":
     from dotenv import load_dotenv
     load_dotenv()
-    
+
     manager = VectorResourceManager()
-    retriever = manager.get_retriever()  # 기존 DB 로드
\ No newline at end of file
+    retriever = manager.get_retriever()  # 기존 DB 로드
+    hybrid_retriever = manager.get_retriever(mode="hybrid")  # BM25 + 벡터 검색
+    mmr_retriever = manager.get_retriever(mode="mmr", max_tokens=1500)  # 중복 청크 제거 + 토큰 예산
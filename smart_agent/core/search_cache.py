@@ -0,0 +1,225 @@
+"""
+웹 검색 결과 캐시 모듈
+정규화된 검색어와 검색 파라미터를 키로 하여 메모리(LRU)와 SQLite 디스크(TTL) 2단계로 결과를 저장합니다.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+def normalize_query(query: str) -> str:
+    """검색어를 캐시 키용으로 정규화합니다. (앞뒤 공백 제거, 소문자화, 연속 공백 축약)"""
+    return re.sub(r"\s+", " ", query.strip().lower())
+
+
+class _InFlight:
+    """진행 중인 원격 검색 1건 (같은 키의 동시 요청이 결과를 공유)"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SearchCache:
+    """
+    검색 결과 2단계 캐시
+
+    - 메모리: 최근 사용 순서(LRU)로 최대 max_memory_entries개 보관
+    - 디스크: SQLite에 ttl_seconds 동안 보관 (프로세스 재시작 후에도 유지)
+    - 같은 키의 동시 요청은 원격 검색 1건만 수행하고 결과를 공유 (single-flight)
+    """
+
+    def __init__(
+        self,
+        db_path: str = "data/cache/search_cache.sqlite3",
+        max_memory_entries: int = 256,
+        ttl_seconds: int = 3600,
+    ):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # {key: (만료 시각, 결과, 원격 검색 소요 시간)}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "shared_inflight": 0,
+            "evictions": 0,
+            "expired": 0,
+            "latency_saved": 0.0,
+        }
+
+        # SQLite 파일은 처음 조회할 때 엽니다. (모듈 import만으로 캐시 디렉토리·파일이 생기지 않도록)
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """디스크 계층 연결을 반환합니다. 처음 호출할 때 파일과 테이블을 만듭니다. (잠금 보유 상태에서 호출)"""
+        if self._conn is None:
+            if os.path.dirname(self.db_path):
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS search_cache (
+                    key TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    results TEXT NOT NULL,
+                    fetch_latency REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_expires ON search_cache(expires_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(query: str, **params) -> str:
+        """정규화된 검색어와 검색 파라미터(k, search_depth 등)로 캐시 키를 만듭니다."""
+        payload = json.dumps({"query": normalize_query(query), "params": params}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_or_fetch(self, query: str, fetch: Callable[[], list], **params) -> list:
+        """
+        캐시된 검색 결과를 반환하고, 없으면 fetch로 원격 검색 후 저장합니다.
+
+        Args:
+            query: 검색어
+            fetch: 원격 검색을 수행하는 함수 (결과 리스트 반환)
+            **params: 결과에 영향을 주는 검색 파라미터 (캐시 키에 포함)
+
+        Returns:
+            검색 결과 리스트
+        """
+        key = self.make_key(query, **params)
+
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                # 위의 조회 뒤에 다른 요청이 원격 검색을 끝내고 저장했을 수 있으므로 잠금 안에서 다시 확인
+                cached = self._lookup_locked(key)
+                if cached is not None:
+                    return cached
+                call = _InFlight()
+                self._inflight[key] = call
+            else:
+                self._stats["shared_inflight"] += 1
+
+        if not leader:
+            # 같은 검색이 이미 진행 중이면 그 결과를 기다림
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            started = time.perf_counter()
+            results = fetch()
+            latency = time.perf_counter() - started
+            with self._lock:
+                self._stats["misses"] += 1
+            # 오류 문자열이나 빈 결과는 캐시하지 않음
+            if isinstance(results, list) and results:
+                self._store(key, query, results, latency)
+            call.result = results
+            return results
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    def _lookup(self, key: str):
+        with self._lock:
+            return self._lookup_locked(key)
+
+    def _lookup_locked(self, key: str):
+        """메모리, 디스크 순서로 캐시를 조회합니다. 없거나 만료되었으면 None (잠금 보유 상태에서 호출)"""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, results, latency = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                self._stats["latency_saved"] += latency
+                return results
+            del self._memory[key]
+            self._stats["expired"] += 1
+
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT results, fetch_latency, expires_at FROM search_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        results_json, latency, expires_at = row
+        if expires_at <= now:
+            conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+            conn.commit()
+            self._stats["expired"] += 1
+            return None
+
+        results = json.loads(results_json)
+        self._remember(key, expires_at, results, latency)
+        self._stats["disk_hits"] += 1
+        self._stats["latency_saved"] += latency
+        return results
+
+    def _store(self, key: str, query: str, results: list, latency: float):
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, results, latency)
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, query, results, fetch_latency, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, normalize_query(query), json.dumps(results, ensure_ascii=False), latency, expires_at),
+            )
+            # 만료된 행 정리
+            purged = conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+            self._stats["expired"] += max(purged, 0)
+            conn.commit()
+
+    def _remember(self, key: str, expires_at: float, results: list, latency: float):
+        """메모리 계층에 저장하고 용량을 넘으면 가장 오래 사용하지 않은 항목을 제거합니다. (잠금 보유 상태에서 호출)"""
+        self._memory[key] = (expires_at, results, latency)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def clear(self):
+        """메모리와 디스크의 캐시를 모두 비웁니다."""
+        with self._lock:
+            self._memory.clear()
+            conn = self._connection()
+            conn.execute("DELETE FROM search_cache")
+            conn.commit()
+
+    def stats(self) -> dict:
+        """적중률, 절약한 지연 시간, 제거 횟수 등 캐시 통계를 반환합니다."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        total = hits + stats["misses"]
+        stats["hit_rate"] = hits / total if total else 0.0
+        return stats
@@ -0,0 +1,89 @@
+"""
+에이전트 응답 스트리밍 모듈
+컴파일된 LangGraph 그래프의 stream API를 사용해 LLM 토큰과 도구 진행 이벤트를 순서대로 전달합니다.
+"""
+from typing import AsyncIterator, Iterator, List
+
+from langchain_core.messages import AIMessageChunk, BaseMessage, ToolMessage
+
+# 최종 답변을 생성하는 그래프 노드 이름 (core/agent.py의 _build_graph 참고)
+AGENT_NODE = "agent"
+TOOLS_NODE = "tools"
+
+def content_to_text(content) -> str:
+    """
+    메시지 content를 화면에 표시할 문자열로 변환합니다.
+
+    Gemini 응답은 문자열 외에도 [{"type": "text", "text": ...}] 형태의 리스트로 올 수 있습니다.
+    """
+    if isinstance(content, list):
+        text_parts = []
+        for item in content:
+            if isinstance(item, dict) and "text" in item:
+                text_parts.append(item["text"])
+            elif isinstance(item, str):
+                text_parts.append(item)
+        return "".join(text_parts) if text_parts else ""
+    if isinstance(content, dict):
+        return content.get("text", str(content))
+    return content or ""
+
+def stream_agent_events(agent, inputs: dict, config: dict = None) -> Iterator[dict]:
+    """
+    에이전트 그래프를 실행하면서 이벤트를 하나씩 반환합니다.
+
+    Args:
+        agent: app 속성(컴파일된 그래프)을 가진 에이전트
+        inputs: 그래프 입력 ({"messages": [...]})
+        config: 그래프 실행 설정 (callbacks 등)
+
+    Yields:
+        다음 중 하나의 딕셔너리
+        - {"type": "token", "text": str}: agent 노드에서 생성 중인 토큰
+        - {"type": "tool_start", "name": str, "args": dict}: 도구 호출 시작
+        - {"type": "tool_end", "name": str, "content": str}: 도구 실행 완료
+        - {"type": "final", "messages": List[BaseMessage]}: 실행이 끝난 뒤의 전체 메시지 목록
+    """
+    messages: List[BaseMessage] = list(inputs.get("messages", []))
+
+    for mode, payload in agent.app.stream(inputs, config=config, stream_mode=["messages", "updates"]):
+        yield from _to_events(mode, payload, messages)
+
+    yield {"type": "final", "messages": messages}
+
+async def astream_agent_events(agent, inputs: dict, config: dict = None) -> AsyncIterator[dict]:
+    """
+    stream_agent_events의 비동기 버전입니다. (HTTP 서비스처럼 이벤트 루프 안에서 실행할 때 사용)
+
+    이벤트 형식은 stream_agent_events와 같습니다.
+    """
+    messages: List[BaseMessage] = list(inputs.get("messages", []))
+
+    async for mode, payload in agent.app.astream(inputs, config=config, stream_mode=["messages", "updates"]):
+        for event in _to_events(mode, payload, messages):
+            yield event
+
+    yield {"type": "final", "messages": messages}
+
+def _to_events(mode: str, payload, messages: List[BaseMessage]) -> Iterator[dict]:
+    """그래프 stream 출력 하나를 이벤트로 변환하고, 노드가 추가한 메시지는 messages에 누적합니다."""
+    if mode == "messages":
+        chunk, metadata = payload
+        # 도구 내부의 LLM 호출 토큰은 제외하고 agent 노드의 답변만 전달
+        if metadata.get("langgraph_node") != AGENT_NODE or not isinstance(chunk, AIMessageChunk):
+            return
+        text = content_to_text(chunk.content)
+        if text:
+            yield {"type": "token", "text": text}
+
+    elif mode == "updates":
+        for node_name, update in payload.items():
+            new_messages = (update or {}).get("messages", [])
+            messages.extend(new_messages)
+
+            for message in new_messages:
+                if node_name == AGENT_NODE and getattr(message, "tool_calls", None):
+                    for tool_call in message.tool_calls:
+                        yield {"type": "tool_start", "name": tool_call["name"], "args": tool_call.get("args", {})}
+                elif node_name == TOOLS_NODE and isinstance(message, ToolMessage):
+                    yield {"type": "tool_end", "name": message.name, "content": content_to_text(message.content)}
@@ -3,27 +3,62 @@ from typing import Annotated
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.tools import tool
 from dotenv import load_dotenv
+from core.concurrency import with_bounded_async
+from core.search_cache import SearchCache
+from core.tracing import span
 
 load_dotenv()
 
+# 검색 파라미터 (결과에 영향을 주므로 캐시 키에도 포함됨)
+SEARCH_K = 3
+SEARCH_DEPTH = "advanced"
+
 web_search_tool = TavilySearchResults(
     api_key=os.getenv("TAVILY_API_KEY"),
-    k=3,
-    search_depth="advanced",
+    k=SEARCH_K,
+    search_depth=SEARCH_DEPTH,
     description=(
         "실시간 웹 검색 도구입니다. "
         "현재 사건, 최신 기술 트렌드, 또는 내부 문서에 없는 일반적인 지식을 찾을 때 사용합니다."
     )
 )
 
+# 검색 결과 캐시 (메모리 LRU + SQLite TTL)
+search_cache = SearchCache(
+    db_path=os.getenv("SEARCH_CACHE_PATH", "data/cache/search_cache.sqlite3"),
+    ttl_seconds=int(os.getenv("SEARCH_CACHE_TTL", "3600"))
+)
+
+# 실제 검색을 수행하는 클라이언트 (invoke({"query": ...})를 지원하는 객체면 교체 가능, set_search_client 참고)
+_search_client = web_search_tool
+
+def set_search_client(client):
+    """
+    검색 클라이언트를 교체합니다. (오프라인 테스트용 로컬 대체 클라이언트 등)
+    
+    Args:
+        client: invoke({"query": str})를 호출하면 [{"url": ..., "content": ...}] 리스트를 반환하는 객체
+    """
+    global _search_client
+    _search_client = client
+
 @tool
 def search_web(query: str) -> str:
     """
     최신 정보나 웹상의 지식이 필요할 때 이 도구를 호출하세요.
     입력값은 구체적인 검색 쿼리 문자열이어야 합니다.
     """
-    # 도구 실행 및 결과 반환
-    results = web_search_tool.invoke({"query": query})
+    def fetch():
+        with span("tavily.search", query_chars=len(query)):
+            return _search_client.invoke({"query": query})
+
+    # 도구 실행 및 결과 반환 (같은 검색어는 캐시에서 바로 반환)
+    results = search_cache.get_or_fetch(
+        query,
+        fetch,
+        k=SEARCH_K,
+        search_depth=SEARCH_DEPTH
+    )
     
     # 결과를 하나의 문자열로 결합 (에이전트가 읽기 편하도록 포맷팅)
     content = "\n\n".join(
@@ -32,7 +67,7 @@ def search_web(query: str) -> str:
     return content
 
 # 2. 도구 리스트 정의 (나중에 에이전트에 전달될 목록)
-tools = [search_web]
+tools = with_bounded_async([search_web])
 
 if __name__ == "__main__":
     # 테스트 코드
@@ -42,4 +77,5 @@ if __name__ == "__main__":
     print("--- 웹 검색 테스트 시작 ---")
     test_query = "2024년 12월 삼성전자의 최신 소식은?"
     result = search_web.invoke(test_query)
-    print(result)
\ No newline at end of file
+    print(result)
+    print(search_cache.stats())
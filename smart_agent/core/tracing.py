@@ -0,0 +1,439 @@
+"""
+에이전트 실행 추적(tracing) 모듈
+대화 턴 하나를 trace로 보고, 그 안의 그래프 노드·LLM 호출·도구 실행·외부 I/O를 span으로 기록합니다.
+span에는 소요 시간, 토큰 수, 입출력 크기, 에이전트 루프 반복 횟수가 담기며,
+턴이 끝나면 JSONL 파일에 한 줄로 저장되고 종류·이름별 p50/p95 지연 통계로 집계됩니다.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import math
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+# 현재 실행 중인 턴 (도구 내부의 외부 I/O span을 같은 턴에 기록하기 위해 사용)
+_current_turn: contextvars.ContextVar[Optional["TurnTrace"]] = contextvars.ContextVar("current_turn", default=None)
+
+def _percentile(values: List[float], q: float) -> float:
+    """선형 보간 백분위수 (q: 0~100)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower, upper = math.floor(position), math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def _payload_size(value: Any) -> int:
+    """입출력의 대략적인 크기 (UTF-8 바이트)"""
+    if value is None:
+        return 0
+    if hasattr(value, "content"):
+        value = value.content
+    if not isinstance(value, str):
+        value = str(value)
+    return len(value.encode("utf-8"))
+
+class TurnTrace:
+    """대화 턴 하나의 span 모음"""
+
+    def __init__(self, name: str, metadata: dict = None):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.metadata = metadata or {}
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.spans: List[dict] = []
+        self.iterations = 0  # 에이전트 노드 실행 횟수 (should_continue가 도구로 보낸 횟수 + 1)
+        self._open: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.handler = TracingCallbackHandler(self)
+
+    def start_span(self, span_id: str, kind: str, name: str, parent_id: str = None, **attrs) -> dict:
+        with self._lock:
+            span = {
+                "span_id": span_id,
+                "parent_id": parent_id if parent_id in self._open else None,
+                "kind": kind,
+                "name": name,
+                "offset_ms": round((time.perf_counter() - self._started) * 1000, 3),
+                "iteration": self.iterations,
+                **attrs,
+            }
+            span["_t0"] = time.perf_counter()
+            self._open[span_id] = span
+            return span
+
+    def end_span(self, span_id: str, error: BaseException = None, **attrs):
+        with self._lock:
+            span = self._open.pop(span_id, None)
+            if span is None:
+                return
+            span["duration_ms"] = round((time.perf_counter() - span.pop("_t0")) * 1000, 3)
+            span.update(attrs)
+            if error is not None:
+                span["error"] = f"{type(error).__name__}: {error}"
+            self.spans.append(span)
+
+    def to_record(self) -> dict:
+        duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        tokens = {"input": 0, "output": 0}
+        for span in self.spans:
+            tokens["input"] += span.get("input_tokens", 0) or 0
+            tokens["output"] += span.get("output_tokens", 0) or 0
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "metadata": self.metadata,
+            "started_at": self.started_at,
+            "duration_ms": duration_ms,
+            "iterations": self.iterations,
+            "tokens": tokens,
+            "spans": sorted(self.spans, key=lambda span: span["offset_ms"]),
+        }
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain 콜백으로 그래프 노드·LLM 호출·도구 실행을 span으로 기록합니다.
+
+    LangGraph 노드는 실행 메타데이터의 langgraph_node와 실행 이름이 같은 체인으로 구분합니다.
+    """
+
+    # 비동기 실행에서도 이벤트 루프에서 바로 호출되도록 하여 시간 측정이 밀리지 않게 함
+    run_inline = True
+
+    def __init__(self, turn: TurnTrace):
+        self.turn = turn
+        self._parents: Dict[str, Optional[str]] = {}  # 기록하지 않는 중간 체인 실행의 부모 (span 부모 연결용)
+
+    def _parent(self, parent_run_id) -> Optional[str]:
+        """가장 가까운 기록 중인 상위 span을 찾습니다. (노드 내부의 중간 체인은 건너뜀)"""
+        parent_id = str(parent_run_id) if parent_run_id else None
+        while parent_id is not None and parent_id not in self.turn._open and parent_id in self._parents:
+            parent_id = self._parents[parent_id]
+        return parent_id
+
+    # ---- 그래프 노드 ----
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if not node or kwargs.get("name") != node:
+            self._parents[str(run_id)] = str(parent_run_id) if parent_run_id else None
+            return
+        if node == "agent":
+            self.turn.iterations += 1
+        messages = inputs.get("messages") if isinstance(inputs, dict) else None
+        self.turn.start_span(
+            str(run_id), "node", node,
+            parent_id=self._parent(parent_run_id),
+            input_messages=len(messages) if isinstance(messages, list) else None,
+        )
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._parents.pop(str(run_id), None)
+        self.turn.end_span(str(run_id))
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._parents.pop(str(run_id), None)
+        self.turn.end_span(str(run_id), error=error)
+
+    # ---- LLM 호출 ----
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        model = (kwargs.get("invocation_params") or {}).get("model") or kwargs.get("name") or "chat_model"
+        self.turn.start_span(
+            str(run_id), "llm", str(model),
+            parent_id=self._parent(parent_run_id),
+            input_bytes=sum(_payload_size(m) for batch in messages for m in batch),
+        )
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        model = (kwargs.get("invocation_params") or {}).get("model") or kwargs.get("name") or "llm"
+        self.turn.start_span(
+            str(run_id), "llm", str(model),
+            parent_id=self._parent(parent_run_id),
+            input_bytes=sum(_payload_size(p) for p in prompts),
+        )
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        input_tokens = output_tokens = 0
+        output_bytes = 0
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+                output_bytes += _payload_size(message if message is not None else generation.text)
+        self.turn.end_span(
+            str(run_id),
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            output_bytes=output_bytes,
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self.turn.end_span(str(run_id), error=error)
+
+    # ---- 도구 실행 ----
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        self.turn.start_span(
+            str(run_id), "tool", name,
+            parent_id=self._parent(parent_run_id),
+            input_bytes=_payload_size(input_str),
+        )
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self.turn.end_span(str(run_id), output_bytes=_payload_size(output))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self.turn.end_span(str(run_id), error=error)
+
+@contextmanager
+def span(name: str, kind: str = "io", **attrs):
+    """
+    현재 턴에 외부 I/O 등 임의 구간의 span을 기록합니다. (추적 중이 아니면 아무것도 하지 않음)
+
+    예:
+        with span("tavily.search", query_chars=len(query)):
+            results = client.invoke(...)
+    """
+    turn = _current_turn.get()
+    if turn is None:
+        yield
+        return
+    span_id = uuid.uuid4().hex
+    turn.start_span(span_id, kind, name, **attrs)
+    try:
+        yield
+    except BaseException as e:
+        turn.end_span(span_id, error=e)
+        raise
+    turn.end_span(span_id)
+
+class _TraceWriter:
+    """
+    완료된 턴을 백그라운드 스레드에서 JSONL 파일에 추가합니다.
+
+    - 요청 스레드·이벤트 루프는 큐에 넣기만 하므로 직렬화·디스크 쓰기를 기다리지 않음
+    - 파일이 max_bytes를 넘으면 {path}.1로 옮기고 새 파일에 이어 씀 (이전 {path}.1은 덮어씀)
+    - 큐가 가득 차면(디스크가 느린 경우 등) 새 기록은 버리고 dropped에 셈
+    """
+
+    batch_size = 100
+
+    def __init__(self, path: str, max_bytes: int, max_queue: int = 1000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, record: dict):
+        with self._lock:
+            if self._thread is None:
+                # 처음 기록할 때 시작 (모듈 import만으로 스레드가 생기지 않도록)
+                self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """큐에 쌓인 기록을 모두 쓸 때까지 최대 timeout초 기다립니다. (모두 썼으면 True)"""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write("".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in batch))
+            except Exception:
+                logger.exception("추적 기록 %d개를 %s에 쓰지 못했습니다", len(batch), self.path)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, text: str):
+        data = text.encode("utf-8")
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if self.max_bytes and size and size + len(data) > self.max_bytes:
+            os.replace(self.path, self.path + ".1")
+        # 묶음 전체를 한 번의 추가 쓰기로 기록 (다른 프로세스의 기록과 줄이 섞이지 않도록)
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+class Tracer:
+    """
+    턴 단위 추적기
+
+    완료된 턴은 백그라운드 스레드가 JSONL 파일(sink_path)에 한 줄씩 추가하고 (max_bytes를 넘으면 교체),
+    최근 턴과 (종류, 이름)별 소요 시간을 메모리에 보관하여 p50/p95를 계산합니다.
+    """
+
+    def __init__(
+        self,
+        sink_path: str = "data/traces.jsonl",
+        enabled: bool = True,
+        max_recent: int = 200,
+        max_samples: int = 1000,
+        max_bytes: int = 50 * 1024 * 1024,
+    ):
+        self.sink_path = sink_path
+        self.enabled = enabled
+        self._recent = deque(maxlen=max_recent)
+        self._durations = defaultdict(lambda: deque(maxlen=max_samples))
+        self._lock = threading.Lock()
+        self._writer = _TraceWriter(sink_path, max_bytes) if sink_path else None
+
+    @contextmanager
+    def trace_turn(self, name: str, metadata: dict = None):
+        """
+        대화 턴 하나를 추적합니다. 반환된 TurnTrace의 handler를 그래프 실행 config의 callbacks에 넣으세요.
+
+        예:
+            with tracer.trace_turn("web_search") as turn:
+                agent.app.invoke(inputs, config={"callbacks": [turn.handler]})
+        """
+        turn = TurnTrace(name, metadata)
+        token = _current_turn.set(turn)
+        error = None
+        try:
+            yield turn
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current_turn.reset(token)
+            record = turn.to_record()
+            if error is not None:
+                record["error"] = f"{type(error).__name__}: {error}"
+            if self.enabled:
+                self._record(record)
+
+    def _record(self, record: dict):
+        # 메모리 집계만 여기서 하고, 파일 쓰기는 백그라운드 스레드에 맡김 (비동기 요청 처리를 막지 않도록)
+        with self._lock:
+            self._recent.append(record)
+            self._durations[("turn", record["name"])].append(record["duration_ms"])
+            for span_record in record["spans"]:
+                self._durations[(span_record["kind"], span_record["name"])].append(span_record["duration_ms"])
+        if self._writer is not None:
+            self._writer.submit(record)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """파일에 아직 쓰지 않은 턴을 모두 쓸 때까지 기다립니다. (모두 썼으면 True)"""
+        return self._writer.flush(timeout) if self._writer is not None else True
+
+    def histograms(self) -> List[dict]:
+        """이 프로세스에서 기록한 (종류, 이름)별 지연 통계"""
+        with self._lock:
+            samples = {key: list(values) for key, values in self._durations.items()}
+        return _summarize(samples)
+
+    def recent_turns(self) -> List[dict]:
+        with self._lock:
+            return list(self._recent)
+
+def _summarize(samples: Dict[tuple, List[float]]) -> List[dict]:
+    rows = []
+    for (kind, name), values in samples.items():
+        if not values:
+            continue
+        rows.append({
+            "kind": kind,
+            "name": name,
+            "count": len(values),
+            "p50_ms": round(_percentile(values, 50), 1),
+            "p95_ms": round(_percentile(values, 95), 1),
+            "max_ms": round(max(values), 1),
+        })
+    return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)
+
+def _tail_lines(path: str, limit: int, block_size: int = 64 * 1024) -> List[bytes]:
+    """파일 끝에서부터 블록 단위로 읽어 마지막 limit줄(빈 줄 제외)을 반환합니다. (파일 전체를 읽지 않음)"""
+    if limit <= 0:
+        return []
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return []
+    with f:
+        position = f.seek(0, os.SEEK_END)
+        buffer = b""
+        # 마지막 limit줄의 앞쪽 경계까지 보이도록 줄바꿈이 limit개를 넘을 때까지 읽음
+        while position > 0 and buffer.count(b"\n") <= limit:
+            read = min(block_size, position)
+            position -= read
+            f.seek(position)
+            buffer = f.read(read) + buffer
+    # 마지막 조각은 줄바꿈으로 끝나지 않은(기록 중인) 줄이거나 빈 문자열
+    lines = buffer.split(b"\n")[:-1]
+    if position > 0:
+        lines = lines[1:]  # 블록 경계에서 잘린 첫 줄
+    return [line for line in lines if line.strip()][-limit:]
+
+def load_turns(path: str, limit: int = 200) -> List[dict]:
+    """
+    JSONL 파일에서 최근 턴을 최대 limit개 읽습니다. (여러 프로세스가 기록한 결과 포함)
+    파일 끝부분만 읽으며, 모자라면 교체된 이전 파일({path}.1)의 끝부분에서 채웁니다.
+    """
+    lines = _tail_lines(path, limit)
+    if len(lines) < limit:
+        lines = _tail_lines(path + ".1", limit - len(lines)) + lines
+    turns = []
+    for line in lines:
+        try:
+            turns.append(json.loads(line))
+        except ValueError:
+            continue  # 깨진 줄은 건너뜀
+    return turns
+
+def summarize_turns(turns: List[dict]) -> List[dict]:
+    """턴 목록의 (종류, 이름)별 p50/p95 지연 통계"""
+    samples = defaultdict(list)
+    for turn in turns:
+        samples[("turn", turn["name"])].append(turn["duration_ms"])
+        for span_record in turn.get("spans", []):
+            samples[(span_record["kind"], span_record["name"])].append(span_record["duration_ms"])
+    return _summarize(samples)
+
+# 프로세스 전역 추적기
+tracer = Tracer(
+    sink_path=os.getenv("TRACE_PATH", "data/traces.jsonl"),
+    enabled=os.getenv("TRACING_ENABLED", "1") != "0",
+    max_bytes=int(os.getenv("TRACE_MAX_MB", "50")) * 1024 * 1024,
+)
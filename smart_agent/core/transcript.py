@@ -0,0 +1,85 @@
+"""
+자막(VTT/SRT) 파싱 모듈
+자막 파일을 시작·종료 시각이 있는 텍스트 구간(cue) 목록으로 변환합니다.
+"""
+import html
+import re
+from typing import List
+
+from core.video_segments import format_timestamp
+
+_TIMING_PATTERN = re.compile(
+    r"(?P<start>(?:\d+:)?\d{1,2}:\d{2}[.,]\d{3})\s*-->\s*(?P<end>(?:\d+:)?\d{1,2}:\d{2}[.,]\d{3})"
+)
+# 자동 생성 자막의 단어별 타이밍 태그(<00:00:01.234>)와 서식 태그(<c>, <i> 등)
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+
+def parse_timestamp(value: str) -> float:
+    """'01:02:03.456' 또는 '02:03,456' 형식을 초로 변환합니다."""
+    parts = value.replace(",", ".").split(":")
+    seconds = float(parts[-1])
+    if len(parts) >= 2:
+        seconds += int(parts[-2]) * 60
+    if len(parts) >= 3:
+        seconds += int(parts[-3]) * 3600
+    return seconds
+
+def _clean(line: str) -> str:
+    return html.unescape(_TAG_PATTERN.sub("", line)).strip()
+
+def parse_subtitles(text: str) -> List[dict]:
+    """
+    VTT 또는 SRT 자막을 파싱합니다. (두 형식 모두 "시작 --> 종료" 줄 다음에 텍스트가 오는 구조)
+
+    유튜브 자동 자막은 이전 줄을 반복하며 한 줄씩 밀려 올라가므로,
+    직전 구간에 이미 나온 줄은 제거합니다.
+
+    Returns:
+        [{"start": 초, "end": 초, "text": 텍스트}] 목록
+    """
+    cues = []
+    previous_lines = set()
+    for block in re.split(r"\r?\n\s*\r?\n", text.strip()):
+        lines = block.splitlines()
+        timing_index = next((i for i, line in enumerate(lines) if _TIMING_PATTERN.search(line)), None)
+        if timing_index is None:
+            continue  # WEBVTT 헤더, NOTE, STYLE 블록 등
+        match = _TIMING_PATTERN.search(lines[timing_index])
+
+        text_lines = [_clean(line) for line in lines[timing_index + 1:]]
+        text_lines = [line for line in text_lines if line]
+        new_lines = [line for line in text_lines if line not in previous_lines]
+        previous_lines = set(text_lines)
+        if not new_lines:
+            continue
+
+        cues.append({
+            "start": parse_timestamp(match.group("start")),
+            "end": parse_timestamp(match.group("end")),
+            "text": " ".join(new_lines),
+        })
+    return cues
+
+def merge_cues(cues: List[dict], window_seconds: float = 30.0) -> List[dict]:
+    """짧은 자막 구간들을 window_seconds 단위로 묶습니다. (프롬프트 길이와 타임스탬프 수를 줄이기 위해)"""
+    merged = []
+    for cue in cues:
+        if merged and cue["start"] - merged[-1]["start"] < window_seconds:
+            merged[-1]["end"] = cue["end"]
+            merged[-1]["text"] += " " + cue["text"]
+        else:
+            merged.append(dict(cue))
+    return merged
+
+def format_transcript(cues: List[dict], max_chars: int = None) -> str:
+    """구간 목록을 "[mm:ss] 텍스트" 줄들로 만듭니다. (max_chars를 넘으면 뒷부분을 자름)"""
+    lines = []
+    total = 0
+    for cue in cues:
+        line = f"[{format_timestamp(cue['start'])}] {cue['text']}"
+        if max_chars and total + len(line) > max_chars:
+            lines.append("... (이후 자막 생략)")
+            break
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
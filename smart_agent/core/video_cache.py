@@ -0,0 +1,90 @@
+"""
+영상 분석 결과 캐시 모듈
+(비디오 ID, 모델, 프롬프트 버전, 종류)를 키로 요약·분석 결과를 JSON 파일로 저장하여
+같은 영상에 대한 후속 질문마다 영상을 다시 업로드하지 않도록 합니다.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+class AnalysisCache:
+    """
+    디렉토리 기반 영상 분석 캐시
+
+    파일은 임시 파일에 쓴 뒤 교체하므로 중간에 중단되어도 깨진 캐시가 남지 않고,
+    전체 크기가 max_bytes를 넘으면 가장 오래 사용되지 않은 파일부터 지웁니다.
+    """
+
+    def __init__(self, directory, max_bytes: int = 200 * 1024 * 1024):
+        """
+        Args:
+            directory: 캐시 파일을 저장할 디렉토리
+            max_bytes: 캐시 전체의 최대 크기 (바이트)
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _path(self, video_id: str, model: str, prompt_version: int, kind: str) -> Path:
+        digest = hashlib.sha1(f"{model}:{prompt_version}:{kind}".encode("utf-8")).hexdigest()[:16]
+        return self.directory / f"{video_id}.{kind}.{digest}.json"
+
+    def get(self, video_id: str, model: str, prompt_version: int, kind: str = "summary") -> Optional[str]:
+        """저장된 결과를 반환합니다. 없으면 None"""
+        path = self._path(video_id, model, prompt_version, kind)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.stats["misses"] += 1
+            return None
+        # 최근 사용 시각 갱신 (오래 사용되지 않은 파일부터 지우기 위해)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.stats["hits"] += 1
+        return entry["content"]
+
+    def put(self, video_id: str, model: str, prompt_version: int, content: str, kind: str = "summary"):
+        """결과를 저장하고, 필요하면 오래된 파일을 정리합니다."""
+        path = self._path(video_id, model, prompt_version, kind)
+        entry = {
+            "video_id": video_id,
+            "model": model,
+            "prompt_version": prompt_version,
+            "kind": kind,
+            "created_at": time.time(),
+            "content": content,
+        }
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            files = []
+            for path in self.directory.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files, key=lambda item: item[0]):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                self.stats["evictions"] += 1
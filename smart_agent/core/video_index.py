@@ -0,0 +1,206 @@
+"""
+영상 구간 인덱스 모듈
+영상별로 타임스탬프가 붙은 자막·구간 요약 청크를 임베딩하여 로컬 평면 인덱스(FlatVectorStore)에 저장하고,
+질문과 관련된 구간만 찾아 답변 프롬프트에 넣을 수 있도록 합니다.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from core.flat_index import FlatVectorStore
+from core.transcript import merge_cues
+from core.video_segments import format_timestamp
+
+INDEX_META_FILE = "index.json"
+
+def chunks_from_cues(video_id: str, cues: List[dict], window_seconds: float = 60.0) -> List[Document]:
+    """자막 구간을 window_seconds 단위로 묶어 타임스탬프가 붙은 청크로 만듭니다."""
+    return [
+        Document(
+            page_content=cue["text"],
+            metadata={"video_id": video_id, "start": cue["start"], "end": cue["end"], "source": "transcript"},
+        )
+        for cue in merge_cues(cues, window_seconds)
+    ]
+
+def chunks_from_segments(video_id: str, segments: List[dict]) -> List[Document]:
+    """구간 요약({"start", "end", "text"})을 청크로 만듭니다. (자막이 없는 영상용)"""
+    return [
+        Document(
+            page_content=segment["text"],
+            metadata={"video_id": video_id, "start": segment["start"], "end": segment["end"], "source": "segment"},
+        )
+        for segment in segments
+    ]
+
+def format_chunk(doc: Document) -> str:
+    """청크를 "[mm:ss~mm:ss] 텍스트" 형식으로 만듭니다."""
+    start = format_timestamp(doc.metadata.get("start", 0))
+    end = format_timestamp(doc.metadata.get("end", 0))
+    return f"[{start}~{end}] {doc.page_content}"
+
+def _chunks_hash(chunks: List[Document]) -> str:
+    digest = hashlib.sha256()
+    for doc in chunks:
+        digest.update(f"{doc.metadata.get('start')}|{doc.page_content}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+class VideoIndex:
+    """
+    영상별 구간 인덱스
+
+    인덱스는 root_dir/{video_id}/에 저장되며, 청크 내용이 바뀌면(예: 구간 요약 → 자막) 다시 만듭니다.
+    한 번 만든 인덱스는 프로세스가 바뀌어도 재사용되므로 같은 영상의 후속 질문은 임베딩 1회(질문)만 필요합니다.
+
+    - 인덱스 생성(임베딩)은 영상별 잠금 안에서 실행하므로 다른 영상의 생성·검색을 막지 않음
+    - 전체 크기가 max_bytes를 넘으면 가장 오래 사용되지 않은 영상의 인덱스부터 삭제 (LRU)
+      (생성·검색 중인 영상의 인덱스는 삭제하지 않음)
+    """
+
+    def __init__(self, root_dir, embeddings: Embeddings, max_bytes: int = 200 * 1024 * 1024):
+        """
+        Args:
+            root_dir: 인덱스를 저장할 디렉토리
+            embeddings: 청크·질문 임베딩 모델
+            max_bytes: 인덱스 전체의 최대 크기 (바이트)
+        """
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.embeddings = embeddings
+        self.max_bytes = max_bytes
+        self._stores = {}
+        self._lock = threading.Lock()  # _stores·_video_locks·_users 보호 (짧게만 잡음)
+        self._video_locks = {}
+        self._users = Counter()  # {video_id: 영상별 잠금을 기다리거나 잡고 있는 호출 수}
+        self.stats = {"builds": 0, "reused": 0, "evictions": 0, "evicted_bytes": 0}
+
+    def _meta_path(self, video_id: str) -> Path:
+        return self.root_dir / video_id / INDEX_META_FILE
+
+    def _read_meta(self, video_id: str) -> dict:
+        try:
+            with open(self._meta_path(video_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def has_index(self, video_id: str) -> bool:
+        return bool(self._read_meta(video_id))
+
+    @contextmanager
+    def _locked(self, video_id: str):
+        """영상별 잠금 (사용 중인 영상은 LRU 정리에서 제외되고, 아무도 쓰지 않으면 잠금을 정리함)"""
+        with self._lock:
+            lock = self._video_locks.setdefault(video_id, threading.Lock())
+            self._users[video_id] += 1
+        try:
+            with lock:
+                yield
+        finally:
+            with self._lock:
+                self._users[video_id] -= 1
+                if self._users[video_id] <= 0:
+                    del self._users[video_id]
+                    del self._video_locks[video_id]
+
+    def _store(self, video_id: str) -> FlatVectorStore:
+        with self._lock:
+            store = self._stores.get(video_id)
+            if store is None:
+                store = FlatVectorStore(persist_directory=str(self.root_dir / video_id), embedding_function=self.embeddings)
+                self._stores[video_id] = store
+            return store
+
+    def ensure(self, video_id: str, chunks: List[Document]) -> FlatVectorStore:
+        """청크로 인덱스를 만듭니다. (같은 청크로 이미 만들었으면 그대로 사용)"""
+        source_hash = _chunks_hash(chunks)
+        with self._locked(video_id):
+            if self._read_meta(video_id).get("source_hash") == source_hash:
+                self.stats["reused"] += 1
+                _touch(self._meta_path(video_id))
+                return self._store(video_id)
+
+            # 내용이 바뀌었으면 처음부터 다시 만듦
+            with self._lock:
+                self._stores.pop(video_id, None)
+            shutil.rmtree(self.root_dir / video_id, ignore_errors=True)
+            store = self._store(video_id)
+            store.add_texts(
+                [doc.page_content for doc in chunks],
+                metadatas=[doc.metadata for doc in chunks],
+                ids=[f"{video_id}:{i}" for i in range(len(chunks))],
+            )
+            tmp_path = self._meta_path(video_id).with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"source_hash": source_hash, "chunks": len(chunks)}, f)
+            os.replace(tmp_path, self._meta_path(video_id))
+            self.stats["builds"] += 1
+        self.evict(keep={video_id})
+        return store
+
+    def search(self, video_id: str, question: str, k: int = 4) -> List[Document]:
+        """질문과 관련된 구간을 시간 순서로 반환합니다."""
+        with self._locked(video_id):
+            docs = self._store(video_id).similarity_search(question, k=k)
+        return sorted(docs, key=lambda doc: doc.metadata.get("start", 0))
+
+    def evict(self, keep=()) -> int:
+        """
+        전체 크기가 max_bytes 이하가 될 때까지 오래 사용되지 않은 영상의 인덱스부터 지웁니다.
+        (생성·검색 중이거나 keep에 있는 영상은 제외)
+
+        Returns:
+            삭제한 인덱스 수
+        """
+        with self._lock:
+            indexes = []
+            for path in self.root_dir.iterdir():
+                if not path.is_dir():
+                    continue
+                try:
+                    last_used = (path / INDEX_META_FILE).stat().st_mtime
+                except OSError:
+                    last_used = 0  # 만드는 중에 중단된 인덱스는 가장 먼저 정리
+                indexes.append((last_used, _dir_size(path), path))
+
+            protected = set(keep) | set(self._users)
+            total = sum(size for _, size, _ in indexes)
+            removed = 0
+            for _, size, path in sorted(indexes, key=lambda item: item[0]):
+                if total <= self.max_bytes:
+                    break
+                if path.name in protected:
+                    continue
+                self._stores.pop(path.name, None)
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                removed += 1
+                self.stats["evictions"] += 1
+                self.stats["evicted_bytes"] += size
+            return removed
+
+def _touch(path: Path):
+    # 최근 사용 시각 갱신 (오래 사용되지 않은 인덱스부터 지우기 위해)
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def _dir_size(path: Path) -> int:
+    size = 0
+    for file in path.rglob("*"):
+        try:
+            if file.is_file():
+                size += file.stat().st_size
+        except OSError:
+            continue
+    return size
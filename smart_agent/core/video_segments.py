@@ -0,0 +1,132 @@
+"""
+영상 구간 분할 모듈
+긴 영상을 일정 시간 단위의 구간 파일로 나눠 구간별로 병렬 요약할 수 있도록 합니다.
+"""
+import math
+import os
+import shutil
+import subprocess
+import uuid
+from pathlib import Path
+from typing import List
+
+# 분할이 끝까지 완료된 구간 디렉토리에만 있는 표시 파일
+COMPLETE_MARKER = ".complete"
+
+def format_timestamp(seconds: float) -> str:
+    """초를 mm:ss (1시간 이상이면 h:mm:ss) 형식으로 변환합니다."""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+class FfmpegSegmenter:
+    """
+    ffmpeg로 영상을 다시 인코딩하지 않고(-c copy) 시간 단위 구간 파일로 나눕니다.
+
+    구간 경계는 키프레임에 맞춰지므로 실제 길이는 segment_seconds와 조금 다를 수 있습니다.
+    """
+
+    def __init__(self, segment_seconds: int = 600, ffmpeg_path: str = "ffmpeg"):
+        self.segment_seconds = segment_seconds
+        self.ffmpeg_path = ffmpeg_path
+
+    def split(self, video_path: str, output_dir: str, duration: float = None) -> List[dict]:
+        """
+        영상을 구간 파일로 나눕니다. (이미 끝까지 나눠 둔 구간이 있으면 그대로 사용)
+
+        임시 디렉토리에 나눈 뒤 완료 표시를 남기고 output_dir로 이름을 바꾸므로,
+        ffmpeg가 중간에 중단되어 남은 일부 구간을 전체 영상으로 착각하지 않습니다.
+
+        Args:
+            video_path: 원본 영상 경로
+            output_dir: 구간 파일을 저장할 디렉토리
+            duration: 영상 길이(초), 마지막 구간의 끝 시각 계산용
+
+        Returns:
+            [{"index", "path", "start", "end"}] 구간 목록
+        """
+        if shutil.which(self.ffmpeg_path) is None:
+            raise RuntimeError("ffmpeg가 설치되지 않았습니다. 긴 영상을 구간별로 처리하려면 ffmpeg를 설치하세요.")
+
+        output = Path(output_dir)
+        ext = Path(video_path).suffix
+        if not (output / COMPLETE_MARKER).exists():
+            # 완료 표시가 없는 디렉토리는 중단된 분할의 잔여물
+            shutil.rmtree(output, ignore_errors=True)
+            work_dir = output.with_name(f"{output.name}.tmp-{uuid.uuid4().hex[:8]}")
+            work_dir.mkdir(parents=True)
+            try:
+                subprocess.run(
+                    [
+                        self.ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y",
+                        "-i", str(video_path),
+                        "-c", "copy", "-map", "0",
+                        "-f", "segment",
+                        "-segment_time", str(self.segment_seconds),
+                        "-reset_timestamps", "1",
+                        str(work_dir / f"segment_%03d{ext}"),
+                    ],
+                    check=True,
+                    capture_output=True,
+                )
+                (work_dir / COMPLETE_MARKER).touch()
+                try:
+                    os.rename(work_dir, output)
+                except OSError:
+                    # 같은 영상을 동시에 나눈 다른 작업이 먼저 완료함
+                    if not (output / COMPLETE_MARKER).exists():
+                        raise
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        existing = sorted(output.glob(f"segment_*{ext}"))
+
+        segments = []
+        for index, path in enumerate(existing):
+            start = index * self.segment_seconds
+            end = start + self.segment_seconds
+            if duration:
+                end = min(end, duration)
+            segments.append({"index": index, "path": str(path), "start": start, "end": end})
+        return segments
+
+class OfflineSegmenter:
+    """
+    ffmpeg 없이 동작하는 로컬 대체 분할기 (테스트용)
+
+    영상 길이에 맞춰 구간 수를 정하고 파일을 바이트 단위로 나눠 씁니다.
+    (재생 가능한 영상은 아니며, OfflineVideoClient와 함께 사용)
+    """
+
+    chunk_size = 1024 * 1024
+
+    def __init__(self, segment_seconds: int = 600):
+        self.segment_seconds = segment_seconds
+
+    def split(self, video_path: str, output_dir: str, duration: float = None) -> List[dict]:
+        os.makedirs(output_dir, exist_ok=True)
+        ext = Path(video_path).suffix
+        duration = duration or self.segment_seconds
+        count = max(1, math.ceil(duration / self.segment_seconds))
+        part_size = math.ceil(os.path.getsize(video_path) / count)
+
+        segments = []
+        with open(video_path, "rb") as src:
+            for index in range(count):
+                path = Path(output_dir) / f"segment_{index:03d}{ext}"
+                remaining = part_size
+                with open(path, "wb") as dst:
+                    while remaining > 0:
+                        chunk = src.read(min(self.chunk_size, remaining))
+                        if not chunk:
+                            break
+                        dst.write(chunk)
+                        remaining -= len(chunk)
+                start = index * self.segment_seconds
+                segments.append({
+                    "index": index,
+                    "path": str(path),
+                    "start": start,
+                    "end": min(start + self.segment_seconds, duration),
+                })
+        return segments
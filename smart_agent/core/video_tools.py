@@ -1,10 +1,26 @@
 import os
-import base64
 import re
+import math
+import hashlib
+import shutil
+import threading
+import time
+import uuid
+import contextvars
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 from langchain_core.tools import tool
 from dotenv import load_dotenv
+from core.concurrency import with_bounded_async
+from core.video_cache import AnalysisCache
+from core.video_segments import FfmpegSegmenter, OfflineSegmenter, format_timestamp
+from core.transcript import format_transcript, merge_cues, parse_subtitles
+from core.video_index import VideoIndex, chunks_from_cues, chunks_from_segments, format_chunk
+from core.tracing import span
+from core.gemini_governor import CLIENT_MAX_RETRIES, estimate_tokens, govern_chat_model, governor
 import json
 
 load_dotenv()
@@ -15,6 +31,735 @@ VIDEO_DIR.mkdir(exist_ok=True)
 VIDEO_ANALYSIS_DIR = Path("video_analysis")
 VIDEO_ANALYSIS_DIR.mkdir(exist_ok=True)
 
+# 요약 프롬프트를 바꾸면 올려서 이전 프롬프트로 만든 캐시를 쓰지 않도록 함
+PROMPT_VERSION = 1
+# 영상 요약 캐시 (비디오 ID, 모델, 프롬프트 버전별)
+analysis_cache = AnalysisCache(
+    VIDEO_ANALYSIS_DIR,
+    max_bytes=int(os.getenv("VIDEO_ANALYSIS_MAX_MB", "200")) * 1024 * 1024
+)
+
+YOUTUBE_PATTERN = r'(?:https?://)?(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/)([a-zA-Z0-9_-]{11})'
+# 영상 메타데이터 중 파일로 저장할 항목
+INFO_FIELDS = ("id", "title", "description", "duration", "uploader", "upload_date", "ext", "webpage_url")
+# 긴 영상 구간 처리 설정: 이 크기(MB)나 길이(구간 2개 초과)를 넘으면 구간별로 나눠 요약
+VIDEO_SEGMENT_THRESHOLD_MB = int(os.getenv("VIDEO_SEGMENT_THRESHOLD_MB", "30"))
+VIDEO_SEGMENT_SECONDS = int(os.getenv("VIDEO_SEGMENT_SECONDS", "600"))
+VIDEO_SEGMENT_WORKERS = int(os.getenv("VIDEO_SEGMENT_WORKERS", "3"))
+# 자막 우선 요약 설정: 찾을 자막 언어 (앞쪽 우선)와 프롬프트에 넣을 자막 최대 글자 수
+VIDEO_SUBTITLE_LANGS = [lang.strip() for lang in os.getenv("VIDEO_SUBTITLE_LANGS", "ko,en").split(",") if lang.strip()]
+TRANSCRIPT_MAX_CHARS = int(os.getenv("TRANSCRIPT_MAX_CHARS", "200000"))
+# 영상 Q&A 구간 인덱스 설정: 청크 길이(초)와 질문당 가져올 구간 수
+VIDEO_CHUNK_SECONDS = int(os.getenv("VIDEO_CHUNK_SECONDS", "60"))
+VIDEO_QA_TOP_K = int(os.getenv("VIDEO_QA_TOP_K", "4"))
+# 로컬 테스트 모드: 다운로드·자막 조회·영상 분석·구간 분할을 모두 네트워크 없는 대체 구현으로 실행
+VIDEO_OFFLINE = os.getenv("VIDEO_MODEL_CLIENT") == "offline"
+VIDEO_MIME_TYPES = {
+    ".mp4": "video/mp4",
+    ".webm": "video/webm",
+    ".mkv": "video/x-matroska"
+}
+
+def extract_video_id(youtube_url: str) -> Optional[str]:
+    """유튜브 URL에서 비디오 ID(11자)를 추출합니다. 유효하지 않으면 None"""
+    match = re.search(YOUTUBE_PATTERN, youtube_url)
+    return match.group(1) if match else None
+
+def find_video_file(video_id: str) -> Optional[Path]:
+    """다운로드된 영상 파일을 찾습니다. (메타데이터·임시 파일 제외)"""
+    for path in VIDEO_DIR.glob(f"{video_id}.*"):
+        if path.suffix.lower() not in (".json", ".part", ".ytdl", ".tmp"):
+            return path
+    return None
+
+def info_path(video_id: str) -> Path:
+    return VIDEO_DIR / f"{video_id}.info.json"
+
+def transcript_path(video_id: str) -> Path:
+    return VIDEO_DIR / f"{video_id}.transcript.json"
+
+def load_video_info(video_id: str) -> Optional[dict]:
+    """저장해 둔 영상 메타데이터를 읽습니다. 없으면 None"""
+    try:
+        with open(info_path(video_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+class YtDlpDownloader:
+    """yt-dlp로 영상을 다운로드합니다. (정보 조회와 다운로드를 extract_info 한 번으로 처리)"""
+
+    def download(self, youtube_url: str, video_id: str, output_dir: str, on_progress) -> Tuple[str, dict]:
+        """
+        Args:
+            youtube_url: 유튜브 영상 URL
+            video_id: 비디오 ID
+            output_dir: 다운로드할 임시 디렉토리
+            on_progress: 진행 상황 콜백 (downloaded_bytes, total_bytes)
+
+        Returns:
+            (다운로드된 파일 경로, 원본 메타데이터)
+        """
+        import yt_dlp
+
+        def hook(status):
+            on_progress(status.get("downloaded_bytes") or 0, status.get("total_bytes") or status.get("total_bytes_estimate"))
+
+        ydl_opts = {
+            'format': 'best[height<=360]',  # 360p로 제한 (용량 및 속도 최적화, 내용 분석에는 충분)
+            'outtmpl': os.path.join(output_dir, f'{video_id}.%(ext)s'),
+            'quiet': True,
+            'no_warnings': True,
+            'progress_hooks': [hook],
+        }
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            raw_info = ydl.extract_info(youtube_url, download=True)
+
+        files = [p for p in Path(output_dir).glob(f"{video_id}.*") if p.suffix.lower() not in (".part", ".ytdl")]
+        if not files:
+            raise FileNotFoundError(f"영상 다운로드 실패: {youtube_url}")
+        return str(files[0]), raw_info
+
+class OfflineDownloader:
+    """
+    네트워크 없이 동작하는 로컬 대체 다운로더 (테스트용)
+
+    video_id에서 결정되는 size_bytes 크기의 파일을 만들고 진행 상황을 보고합니다.
+    호출 횟수(calls)를 세므로 중복 다운로드 제거 여부를 확인할 수 있습니다.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, size_bytes: int = 1024 * 1024, duration: int = 300, latency: float = 0.0):
+        """
+        Args:
+            size_bytes: 만들 영상 파일 크기
+            duration: 메타데이터에 넣을 영상 길이(초)
+            latency: 다운로드마다 기다릴 시간(초) (원격 다운로드 지연 흉내)
+        """
+        self.size_bytes = size_bytes
+        self.duration = duration
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def download(self, youtube_url: str, video_id: str, output_dir: str, on_progress) -> Tuple[str, dict]:
+        with self._lock:
+            self.calls += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+        path = Path(output_dir) / f"{video_id}.mp4"
+        pattern = hashlib.sha256(video_id.encode("utf-8")).digest()
+        written = 0
+        with open(path, "wb") as f:
+            while written < self.size_bytes:
+                size = min(self.chunk_size, self.size_bytes - written)
+                f.write((pattern * (size // len(pattern) + 1))[:size])
+                written += size
+                on_progress(written, self.size_bytes)
+        info = {
+            "id": video_id, "title": f"offline video {video_id}", "description": "로컬 테스트용 영상",
+            "duration": self.duration, "ext": "mp4", "webpage_url": youtube_url,
+        }
+        return str(path), info
+
+class YtDlpTranscriptFetcher:
+    """yt-dlp로 영상 없이 자막(수동 자막 우선, 없으면 자동 자막)만 받습니다."""
+
+    def fetch(self, youtube_url: str, video_id: str, output_dir: str) -> Tuple[Optional[str], dict]:
+        """
+        Returns:
+            (자막 파일 경로 또는 None, 원본 메타데이터)
+        """
+        import yt_dlp
+
+        ydl_opts = {
+            'skip_download': True,
+            'writesubtitles': True,
+            'writeautomaticsub': True,
+            'subtitleslangs': VIDEO_SUBTITLE_LANGS,
+            'subtitlesformat': 'vtt/srt/best',
+            'outtmpl': os.path.join(output_dir, f'{video_id}.%(ext)s'),
+            'quiet': True,
+            'no_warnings': True,
+        }
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            raw_info = ydl.extract_info(youtube_url, download=True)
+
+        # 설정한 언어 순서대로 받은 자막 파일 선택
+        for lang in VIDEO_SUBTITLE_LANGS:
+            for ext in ("vtt", "srt"):
+                path = Path(output_dir) / f"{video_id}.{lang}.{ext}"
+                if path.exists():
+                    return str(path), raw_info
+        return None, raw_info
+
+class OfflineTranscriptFetcher:
+    """
+    네트워크 없이 동작하는 로컬 대체 자막 조회기 (테스트용)
+
+    cue_count가 0이면 자막이 없는 영상처럼 동작하고, 아니면 cue_seconds 간격의 WebVTT 자막을 만듭니다.
+    """
+
+    def __init__(self, cue_count: int = 0, cue_seconds: int = 10, duration: int = 300):
+        self.cue_count = cue_count
+        self.cue_seconds = cue_seconds
+        self.duration = duration
+        self.calls = 0
+
+    def fetch(self, youtube_url: str, video_id: str, output_dir: str) -> Tuple[Optional[str], dict]:
+        self.calls += 1
+        info = {
+            "id": video_id, "title": f"offline video {video_id}", "description": "로컬 테스트용 영상",
+            "duration": self.duration, "ext": "mp4", "webpage_url": youtube_url,
+        }
+        if not self.cue_count:
+            return None, info
+        lines = ["WEBVTT", ""]
+        for i in range(self.cue_count):
+            start, end = i * self.cue_seconds, (i + 1) * self.cue_seconds
+            lines += [f"{format_timestamp(start)}.000 --> {format_timestamp(end)}.000", f"로컬 자막 {i + 1}번째 문장입니다.", ""]
+        path = Path(output_dir) / f"{video_id}.{VIDEO_SUBTITLE_LANGS[0]}.vtt"
+        path.write_text("\n".join(lines), encoding="utf-8")
+        return str(path), info
+
+class _Download:
+    """진행 중인 다운로드 1건 (같은 영상의 동시 요청이 결과를 기다렸다가 공유)"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Optional[Tuple[Path, dict]] = None
+        self.error: Optional[BaseException] = None
+        self.progress = {"downloaded_bytes": 0, "total_bytes": None, "waiters": 0}
+
+class DownloadManager:
+    """
+    영상 다운로드 관리자
+
+    - 같은 video_id의 동시 요청은 다운로드 1건만 수행하고 나머지는 완료를 기다림
+    - 임시 디렉토리에 받은 뒤 os.replace로 옮겨 미완성 파일이 보이지 않도록 함
+    - 디렉토리 전체 크기가 max_bytes를 넘으면 가장 오래 사용되지 않은 영상부터 삭제 (LRU)
+      (다운로드 중이거나 pinned()로 사용 중인 영상은 삭제하지 않음)
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, downloader=None, transcript_fetcher=None):
+        self.directory = Path(directory)
+        self.tmp_dir = self.directory / ".tmp"
+        self.max_bytes = max_bytes
+        self.downloader = downloader or YtDlpDownloader()
+        self.transcript_fetcher = transcript_fetcher or YtDlpTranscriptFetcher()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._pins = Counter()  # {video_id: 사용 중인 호출 수}
+        self.stats = {
+            "downloads": 0, "transcripts": 0, "transcript_errors": 0, "reused": 0, "shared_inflight": 0,
+            "evictions": 0, "evicted_bytes": 0,
+        }
+
+    def progress(self, video_id: str) -> Optional[dict]:
+        """진행 중인 다운로드의 상태 (없으면 None)"""
+        with self._lock:
+            call = self._inflight.get(video_id)
+            return dict(call.progress) if call else None
+
+    def _single_flight(self, key: str, func):
+        """같은 key의 작업은 한 번만 실행하고, 동시에 요청한 호출은 결과를 기다렸다가 공유합니다."""
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _Download()
+                self._inflight[key] = call
+            else:
+                call.progress["waiters"] += 1
+                self.stats["shared_inflight"] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(call)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    def ensure(self, youtube_url: str, video_id: str) -> Tuple[Path, dict]:
+        """
+        영상 파일과 메타데이터를 준비합니다.
+
+        이미 받아 둔 파일과 메타데이터가 있으면 네트워크 요청 없이 그대로 사용하고,
+        없으면 한 번만 다운로드한 뒤 메타데이터를 영상 옆에 {video_id}.info.json으로 저장합니다.
+
+        Returns:
+            (영상 파일 경로, 메타데이터)
+        """
+        with self._lock:
+            video_path = find_video_file(video_id)
+            info = load_video_info(video_id)
+            if video_path and info is not None:
+                self.stats["reused"] += 1
+                self._touch(video_path)
+                return video_path, info
+
+        return self._single_flight(video_id, lambda call: self._download(youtube_url, video_id, call))
+
+    @contextmanager
+    def pinned(self, youtube_url: str, video_id: str):
+        """
+        영상을 준비하고 with 블록이 끝날 때까지 LRU 정리에서 제외합니다.
+        (업로드·구간 분할 중에 다른 스레드의 다운로드가 파일을 지우지 않도록)
+
+        예:
+            with download_manager.pinned(youtube_url, video_id) as (video_path, info):
+                ...
+        """
+        with self._lock:
+            self._pins[video_id] += 1
+        try:
+            yield self.ensure(youtube_url, video_id)
+        finally:
+            with self._lock:
+                self._pins[video_id] -= 1
+                if self._pins[video_id] <= 0:
+                    del self._pins[video_id]
+
+    def ensure_transcript(self, youtube_url: str, video_id: str) -> Tuple[list, dict]:
+        """
+        영상 없이 자막만 받아 파싱합니다.
+
+        결과(자막이 없다는 사실 포함)는 {video_id}.transcript.json에 저장하여 다시 조회하지 않습니다.
+
+        Returns:
+            ([{"start", "end", "text"}] 자막 구간 목록 (자막이 없으면 빈 목록), 메타데이터)
+        """
+        try:
+            with open(transcript_path(video_id), "r", encoding="utf-8") as f:
+                cues = json.load(f)["cues"]
+            info = load_video_info(video_id)
+            if info is not None:
+                return cues, info
+        except (OSError, ValueError, KeyError):
+            pass
+
+        return self._single_flight(f"{video_id}:transcript", lambda call: self._fetch_transcript(youtube_url, video_id))
+
+    def _fetch_transcript(self, youtube_url: str, video_id: str) -> Tuple[list, dict]:
+        work_dir = self.tmp_dir / f"{video_id}-{uuid.uuid4().hex[:8]}"
+        work_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            with span("yt-dlp.transcript", video_id=video_id):
+                subtitle_file, raw_info = self.transcript_fetcher.fetch(youtube_url, video_id, str(work_dir))
+            self.stats["transcripts"] += 1
+            cues = []
+            if subtitle_file:
+                with open(subtitle_file, "r", encoding="utf-8") as f:
+                    cues = parse_subtitles(f.read())
+
+            info = {key: raw_info.get(key) for key in INFO_FIELDS}
+            self._write_json(work_dir / "transcript.json", {"cues": cues}, transcript_path(video_id))
+            if load_video_info(video_id) is None:
+                self._write_json(work_dir / "info.json", info, info_path(video_id))
+            return cues, info
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    @staticmethod
+    def _write_json(tmp_path: Path, data, final_path: Path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, final_path)
+
+    def _download(self, youtube_url: str, video_id: str, call: _Download) -> Tuple[Path, dict]:
+        work_dir = self.tmp_dir / f"{video_id}-{uuid.uuid4().hex[:8]}"
+        work_dir.mkdir(parents=True, exist_ok=True)
+
+        def on_progress(downloaded: int, total: Optional[int]):
+            call.progress["downloaded_bytes"] = downloaded
+            call.progress["total_bytes"] = total
+
+        try:
+            with span("yt-dlp.download", video_id=video_id):
+                tmp_file, raw_info = self.downloader.download(youtube_url, video_id, str(work_dir), on_progress)
+            self.stats["downloads"] += 1
+
+            info = {key: raw_info.get(key) for key in INFO_FIELDS}
+
+            # 영상 파일을 먼저 옮기고 메타데이터를 마지막에 옮김
+            video_path = self.directory / f"{video_id}{Path(tmp_file).suffix}"
+            os.replace(tmp_file, video_path)
+            self._write_json(work_dir / "info.json", info, info_path(video_id))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        self.evict(keep={video_id})
+        return video_path, info
+
+    @staticmethod
+    def _touch(path: Path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def evict(self, keep=()) -> int:
+        """
+        디렉토리 크기가 max_bytes 이하가 될 때까지 오래 사용되지 않은 영상부터 지웁니다.
+        (다운로드 중이거나 사용 중(pinned)이거나 keep에 있는 영상은 제외)
+        자막이 없는 영상은 메타데이터({video_id}.info.json)도 함께 지웁니다.
+
+        Returns:
+            삭제한 영상 수
+        """
+        with self._lock:
+            protected = set(keep) | {key.split(":")[0] for key in self._inflight} | set(self._pins)
+            videos = []
+            for path in self.directory.iterdir():
+                # 메타데이터·자막(.json)은 작으므로 영상 파일만 정리 대상
+                if not path.is_file() or path.suffix == ".json":
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                videos.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in videos)
+            removed = 0
+            for _, size, path in sorted(videos, key=lambda item: item[0]):
+                if total <= self.max_bytes:
+                    break
+                video_id = path.name.split(".")[0]
+                if video_id in protected:
+                    continue
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                # 자막 요약이 다시 쓰는 메타데이터는 남기고, 그 외에는 영상과 함께 삭제
+                if not transcript_path(video_id).exists():
+                    try:
+                        info_path(video_id).unlink()
+                    except OSError:
+                        pass
+                total -= size
+                removed += 1
+                self.stats["evictions"] += 1
+                self.stats["evicted_bytes"] += size
+            return removed
+
+download_manager = DownloadManager(
+    VIDEO_DIR,
+    max_bytes=int(os.getenv("VIDEO_DIR_MAX_MB", "2048")) * 1024 * 1024,
+    downloader=OfflineDownloader() if VIDEO_OFFLINE else None,
+    transcript_fetcher=OfflineTranscriptFetcher() if VIDEO_OFFLINE else None,
+)
+
+def set_video_downloader(downloader):
+    """
+    영상 다운로더를 교체합니다. (오프라인 테스트용 로컬 대체 다운로더 등)
+
+    Args:
+        downloader: download(youtube_url, video_id, output_dir, on_progress)를 호출하면
+                    (다운로드된 파일 경로, 메타데이터)를 반환하는 객체
+    """
+    download_manager.downloader = downloader
+
+def set_transcript_fetcher(fetcher):
+    """
+    자막 조회기를 교체합니다. (오프라인 테스트용 로컬 대체 조회기 등)
+
+    Args:
+        fetcher: fetch(youtube_url, video_id, output_dir)를 호출하면
+                 (자막 파일 경로 또는 None, 메타데이터)를 반환하는 객체
+    """
+    download_manager.transcript_fetcher = fetcher
+
+def ensure_video(youtube_url: str, video_id: str) -> Tuple[Path, dict]:
+    """영상 파일과 메타데이터를 준비합니다. (DownloadManager.ensure 참고)"""
+    return download_manager.ensure(youtube_url, video_id)
+
+def fetch_transcript(youtube_url: str, video_id: str) -> Tuple[list, Optional[dict]]:
+    """
+    자막을 가져옵니다. (DownloadManager.ensure_transcript 참고)
+
+    자막 조회가 실패하면(자막 다운로드 429 등) 자막이 없는 것으로 보고 ([], None)을 반환하여
+    호출한 쪽이 영상 분석으로 넘어가도록 합니다. 실패는 저장하지 않으므로 다음 호출에서 다시 시도합니다.
+    """
+    try:
+        return download_manager.ensure_transcript(youtube_url, video_id)
+    except Exception:
+        download_manager.stats["transcript_errors"] += 1
+        return [], None
+
+class GeminiVideoClient:
+    """
+    Gemini File API로 영상을 분석하는 클라이언트
+
+    영상을 메모리에 읽지 않고 파일 경로로 업로드(스트리밍)하므로 영상 크기와 관계없이 메모리 사용량이 일정합니다.
+    """
+
+    def __init__(self, model_name: str = "gemini-2.5-flash", poll_interval: float = 2.0, timeout: float = 300.0):
+        self.model_name = model_name
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    def generate(self, video_path: str, mime_type: str, prompt: str) -> str:
+        import google.generativeai as genai
+
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        uploaded = genai.upload_file(path=video_path, mime_type=mime_type)
+        try:
+            # 업로드된 영상은 서버에서 처리(PROCESSING)가 끝나야 사용할 수 있음
+            deadline = time.monotonic() + self.timeout
+            while uploaded.state.name == "PROCESSING":
+                if time.monotonic() > deadline:
+                    raise TimeoutError("영상 처리 대기 시간이 초과되었습니다.")
+                time.sleep(self.poll_interval)
+                uploaded = genai.get_file(uploaded.name)
+            if uploaded.state.name != "ACTIVE":
+                raise RuntimeError(f"영상 처리 실패: {uploaded.state.name}")
+
+            # 영상 토큰 수는 미리 알 수 없으므로 프롬프트만으로 예약하고, 응답의 실제 사용량으로 보정
+            model = genai.GenerativeModel(self.model_name)
+            return governor.call(model.generate_content, [uploaded, prompt], tokens=estimate_tokens(prompt)).text
+        finally:
+            try:
+                genai.delete_file(uploaded.name)
+            except Exception:
+                pass
+
+    def generate_text(self, prompt: str) -> str:
+        """텍스트만으로 응답을 생성합니다. (구간 요약 합치기용)"""
+        import google.generativeai as genai
+
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        model = genai.GenerativeModel(self.model_name)
+        return governor.call(model.generate_content, prompt).text
+
+class OfflineVideoClient:
+    """
+    네트워크 없이 동작하는 로컬 대체 클라이언트 (테스트용)
+
+    영상 파일을 1MB씩 읽어 해시를 계산하고, 프롬프트 형식에 맞는 고정된 요약을 반환합니다.
+    """
+
+    chunk_size = 1024 * 1024
+
+    def generate(self, video_path: str, mime_type: str, prompt: str) -> str:
+        digest = hashlib.sha256()
+        size = 0
+        with open(video_path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                digest.update(chunk)
+                size += len(chunk)
+        return f"""1. 영상 주제 및 목적
+로컬 테스트용 요약입니다. ({mime_type}, {size} bytes, sha256 {digest.hexdigest()[:12]})
+
+2. 주요 내용 요약
+- 프롬프트 길이: {len(prompt)}자
+
+3. 핵심 메시지
+오프라인 클라이언트 응답
+
+4. 추천 대상
+테스트"""
+
+    def generate_text(self, prompt: str) -> str:
+        return f"""1. 영상 주제 및 목적
+로컬 테스트용 통합 요약입니다.
+
+2. 주요 내용 요약
+- 프롬프트 길이: {len(prompt)}자
+
+3. 핵심 메시지
+오프라인 클라이언트 응답
+
+4. 추천 대상
+테스트"""
+
+_video_model_client = OfflineVideoClient() if VIDEO_OFFLINE else GeminiVideoClient()
+
+def set_video_model_client(client):
+    """
+    영상 분석 클라이언트를 교체합니다. (오프라인 테스트용 로컬 대체 클라이언트 등)
+
+    Args:
+        client: generate(video_path, mime_type, prompt)를 호출하면 텍스트를 반환하는 객체
+    """
+    global _video_model_client
+    _video_model_client = client
+
+_video_segmenter = (
+    OfflineSegmenter(VIDEO_SEGMENT_SECONDS) if VIDEO_OFFLINE
+    else FfmpegSegmenter(VIDEO_SEGMENT_SECONDS)
+)
+
+def set_video_segmenter(segmenter):
+    """
+    영상 구간 분할기를 교체합니다. (ffmpeg 없는 환경의 로컬 대체 분할기 등)
+
+    Args:
+        segmenter: split(video_path, output_dir, duration)을 호출하면
+                   [{"index", "path", "start", "end"}] 목록을 반환하는 객체
+    """
+    global _video_segmenter
+    _video_segmenter = segmenter
+
+def _model_name() -> str:
+    """캐시 키에 쓸 현재 영상 분석 모델 이름"""
+    return getattr(_video_model_client, "model_name", type(_video_model_client).__name__)
+
+def _cached_summary(video_id: str, use_video: bool = False) -> Optional[str]:
+    """
+    캐시된 요약을 찾습니다.
+    영상 기반 요약이 있으면 우선 사용하고, use_video가 아니면 자막 기반 요약도 사용합니다.
+    """
+    cached = analysis_cache.get(video_id, _model_name(), PROMPT_VERSION)
+    if cached is None and not use_video:
+        cached = analysis_cache.get(video_id, _model_name(), PROMPT_VERSION, kind="summary-transcript")
+    return cached
+
+def get_cached_summary(youtube_url: str) -> Optional[str]:
+    """캐시에 저장된 영상 요약을 반환합니다. (영상 다운로드·모델 호출 없음, 없으면 None)"""
+    video_id = extract_video_id(youtube_url)
+    if not video_id:
+        return None
+    return _cached_summary(video_id)
+
+SUMMARY_FORMAT = """영상의 주요 내용을 다음 형식으로 요약해주세요:
+1. 영상 주제 및 목적
+2. 주요 내용 요약 (3-5개 포인트)
+3. 핵심 메시지
+4. 추천 대상
+
+한국어로 자세하고 구체적으로 작성해주세요."""
+
+def should_segment(file_size_mb: float, duration: float) -> bool:
+    """영상이 커서 구간별로 나눠 요약해야 하는지 판단합니다."""
+    return file_size_mb > VIDEO_SEGMENT_THRESHOLD_MB or (duration or 0) > VIDEO_SEGMENT_SECONDS * 2
+
+def _segment_kind(index: int) -> str:
+    """구간 요약의 캐시 종류 (구간 길이별로 나눠 VIDEO_SEGMENT_SECONDS가 바뀌면 예전 요약을 쓰지 않음)"""
+    return f"segment{VIDEO_SEGMENT_SECONDS}-{index:03d}"
+
+def _segment_count_kind() -> str:
+    """영상의 구간 수를 저장하는 캐시 종류 (캐시에서 빠진 구간을 찾을 때 사용)"""
+    return f"segment{VIDEO_SEGMENT_SECONDS}-count"
+
+def _summarize_segment(video_id: str, segment: dict, total: int, title: str, mime_type: str) -> str:
+    """구간 하나를 요약합니다. (구간별로 캐시하여 재시도 시 성공한 구간은 다시 보내지 않음)"""
+    kind = _segment_kind(segment['index'])
+    cached = analysis_cache.get(video_id, _model_name(), PROMPT_VERSION, kind=kind)
+    if cached is not None:
+        return cached
+
+    prompt = f"""다음은 유튜브 영상 "{title}"의 {segment['index'] + 1}/{total}번째 구간입니다.
+({format_timestamp(segment['start'])} ~ {format_timestamp(segment['end'])})
+
+이 구간에서 다루는 내용을 핵심 위주로 5문장 이내로 요약해주세요. 한국어로 작성해주세요."""
+    with span("gemini.video", video_id=video_id, segment=segment["index"]):
+        result = _video_model_client.generate(segment["path"], mime_type, prompt)
+    analysis_cache.put(video_id, _model_name(), PROMPT_VERSION, result, kind=kind)
+    return result
+
+def _summarize_segments(video_id: str, video_path: Path, info: dict, mime_type: str) -> Tuple[List[dict], List[str]]:
+    """
+    영상을 구간으로 나눠 구간별로 병렬 요약합니다(map). (이미 캐시된 구간은 다시 보내지 않음)
+
+    구간 요약은 VIDEO_SEGMENT_WORKERS개까지만 동시에 실행하며,
+    일부 구간이 실패하면 실패한 구간 목록과 함께 RuntimeError를 발생시키고,
+    성공한 구간은 캐시되므로 다음 호출에서는 실패한 구간만 다시 요약합니다.
+
+    Returns:
+        ([{"index", "path", "start", "end"}] 구간 목록, 구간별 요약 목록)
+    """
+    title = info.get('title') or 'Unknown'
+    # 구간 길이별로 디렉토리를 나눠 VIDEO_SEGMENT_SECONDS가 바뀌면 예전 구간을 쓰지 않음
+    segment_dir = VIDEO_DIR / f"{video_id}_segments_{VIDEO_SEGMENT_SECONDS}s"
+    with span("ffmpeg.segment", video_id=video_id):
+        segments = _video_segmenter.split(str(video_path), str(segment_dir), info.get('duration'))
+
+    # 도구 실행 풀(core.concurrency) 안에서 호출되므로 교착을 피하기 위해 별도의 제한된 풀 사용
+    # (각 작업에 현재 컨텍스트를 복사하여 구간 요약도 같은 추적 턴에 기록되도록 함)
+    with ThreadPoolExecutor(max_workers=VIDEO_SEGMENT_WORKERS, thread_name_prefix="video-segment") as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, _summarize_segment, video_id, segment, len(segments), title, mime_type)
+            for segment in segments
+        ]
+        partials: List[Optional[str]] = []
+        failures = []
+        for segment, future in zip(segments, futures):
+            try:
+                partials.append(future.result())
+            except Exception as e:
+                partials.append(None)
+                failures.append(f"{format_timestamp(segment['start'])}~{format_timestamp(segment['end'])}: {e}")
+
+    if failures:
+        raise RuntimeError(
+            f"{len(segments)}개 구간 중 {len(failures)}개 구간 실패\n"
+            + "\n".join(f"- {line}" for line in failures)
+            + "\n다시 요청하면 실패한 구간만 다시 처리합니다."
+        )
+
+    # 모든 구간을 요약했으면 구간 파일은 필요 없음 (구간 요약과 구간 수는 캐시에 남음)
+    analysis_cache.put(video_id, _model_name(), PROMPT_VERSION, str(len(segments)), kind=_segment_count_kind())
+    shutil.rmtree(segment_dir, ignore_errors=True)
+    return segments, partials
+
+def summarize_video_segments(video_id: str, video_path: Path, info: dict, mime_type: str) -> str:
+    """
+    긴 영상을 구간으로 나눠 병렬로 요약(map)한 뒤 하나의 요약으로 합칩니다(reduce).
+    (구간 요약과 실패 처리는 _summarize_segments 참고)
+    """
+    title = info.get('title') or 'Unknown'
+    description = (info.get('description') or '')[:500]
+    segments, partials = _summarize_segments(video_id, video_path, info, mime_type)
+
+    # 구간 요약 합치기 (reduce, 텍스트만 전송)
+    sections = "\n\n".join(
+        f"[{format_timestamp(segment['start'])} ~ {format_timestamp(segment['end'])}]\n{partial}"
+        for segment, partial in zip(segments, partials)
+    )
+    prompt = f"""다음은 유튜브 영상을 시간 구간별로 요약한 내용입니다.
+
+영상 제목: {title}
+영상 설명: {description}
+
+{sections}
+
+위 구간별 요약을 종합하여 영상 전체를 요약해주세요.
+{SUMMARY_FORMAT}"""
+    with span("gemini.text", video_id=video_id, prompt_chars=len(prompt)):
+        return _video_model_client.generate_text(prompt)
+
+def summarize_transcript(video_id: str, cues: list, info: dict) -> str:
+    """자막 텍스트만으로 영상을 요약합니다. (영상 다운로드·업로드 없음)"""
+    title = info.get('title') or 'Unknown'
+    description = (info.get('description') or '')[:500]
+    transcript = format_transcript(merge_cues(cues), max_chars=TRANSCRIPT_MAX_CHARS)
+    prompt = f"""다음은 유튜브 영상의 자막입니다. 자막 내용을 바탕으로 영상을 요약해주세요.
+
+영상 제목: {title}
+영상 설명: {description}
+
+자막:
+{transcript}
+
+{SUMMARY_FORMAT}"""
+    with span("gemini.text", video_id=video_id, prompt_chars=len(prompt)):
+        result = _video_model_client.generate_text(prompt)
+    analysis_cache.put(video_id, _model_name(), PROMPT_VERSION, result, kind="summary-transcript")
+    return result
+
 @tool
 def download_youtube_video(youtube_url: str) -> str:
     """
@@ -27,41 +772,16 @@ def download_youtube_video(youtube_url: str) -> str:
         다운로드된 영상 파일 경로
     """
     try:
-        import yt_dlp
-        
         # 유튜브 URL 검증
-        youtube_pattern = r'(?:https?://)?(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/)([a-zA-Z0-9_-]{11})'
-        match = re.search(youtube_pattern, youtube_url)
-        if not match:
+        video_id = extract_video_id(youtube_url)
+        if not video_id:
             return f"유효하지 않은 유튜브 URL입니다: {youtube_url}"
-        
-        video_id = match.group(1)
-        
-        # 다운로드 옵션 설정
-        ydl_opts = {
-            'format': 'best[height<=360]',  # 360p로 제한 (용량 및 속도 최적화, 내용 분석에는 충분)
-            'outtmpl': str(VIDEO_DIR / f'{video_id}.%(ext)s'),
-            'quiet': True,
-            'no_warnings': True,
-        }
-        
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # 영상 정보 가져오기
-            info = ydl.extract_info(youtube_url, download=False)
-            title = info.get('title', 'Unknown')
-            duration = info.get('duration', 0)
-            
-            # 영상 다운로드
-            ydl.download([youtube_url])
-            
-            # 다운로드된 파일 찾기
-            video_files = list(VIDEO_DIR.glob(f"{video_id}.*"))
-            if not video_files:
-                return f"영상 다운로드 실패: {youtube_url}"
-            
-            video_path = video_files[0]
-            
-            return f"""영상 다운로드 완료!
+
+        video_path, info = ensure_video(youtube_url, video_id)
+        title = info.get('title') or 'Unknown'
+        duration = int(info.get('duration') or 0)
+
+        return f"""영상 다운로드 완료!
 제목: {title}
 길이: {duration // 60}분 {duration % 60}초
 파일 경로: {video_path}
@@ -73,153 +793,237 @@ def download_youtube_video(youtube_url: str) -> str:
         return f"영상 다운로드 중 오류 발생: {str(e)}"
 
 @tool
-def summarize_youtube_video(youtube_url: str) -> str:
+def summarize_youtube_video(youtube_url: str, use_video: bool = False) -> str:
     """
-    유튜브 영상을 다운로드하고 Gemini를 사용하여 요약합니다.
+    유튜브 영상을 Gemini를 사용하여 요약합니다.
+    자막이 있으면 자막으로 빠르게 요약하고, 자막이 없을 때만 영상을 다운로드하여 분석합니다.
     
     Args:
         youtube_url: 유튜브 영상 URL
+        use_video: True이면 자막이 있어도 영상 자체를 분석 (화면 내용이 중요한 경우)
     
     Returns:
         영상 요약 텍스트
     """
     try:
-        import yt_dlp
-        
         # 유튜브 URL에서 비디오 ID 추출
-        youtube_pattern = r'(?:https?://)?(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/)([a-zA-Z0-9_-]{11})'
-        match = re.search(youtube_pattern, youtube_url)
-        if not match:
+        video_id = extract_video_id(youtube_url)
+        if not video_id:
             return f"유효하지 않은 유튜브 URL입니다: {youtube_url}"
         
-        video_id = match.group(1)
-        
-        # 이미 다운로드된 영상이 있는지 확인
-        video_files = list(VIDEO_DIR.glob(f"{video_id}.*"))
-        if not video_files:
-            # 영상 다운로드
-            ydl_opts = {
-                'format': 'best[height<=360]',  # 360p로 제한 (용량 및 속도 최적화)
-                'outtmpl': str(VIDEO_DIR / f'{video_id}.%(ext)s'),
-                'quiet': True,
-                'no_warnings': True,
-            }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(youtube_url, download=False)
-                ydl.download([youtube_url])
-            
-            video_files = list(VIDEO_DIR.glob(f"{video_id}.*"))
-            if not video_files:
-                return f"영상 다운로드 실패: {youtube_url}"
+        # 이미 요약한 영상이면 다운로드·업로드 없이 캐시된 요약 반환
+        cached = _cached_summary(video_id, use_video)
+        if cached is not None:
+            return cached
         
-        video_path = video_files[0]
+        # 자막 우선: 자막만 받아 텍스트로 요약 (영상 다운로드 없음)
+        if not use_video:
+            cues, info = fetch_transcript(youtube_url, video_id)
+            if cues:
+                return summarize_transcript(video_id, cues, info)
         
-        # 영상 파일 읽기
-        with open(video_path, "rb") as video_file:
-            video_data = video_file.read()
+        # 영상과 메타데이터 준비 (이미 받아 둔 경우 네트워크 요청 없음, 요약이 끝날 때까지 LRU 정리에서 제외)
+        with download_manager.pinned(youtube_url, video_id) as (video_path, info):
+            title = info.get('title') or 'Unknown'
+            description = (info.get('description') or '')[:500]  # 처음 500자만
         
-        # 파일 크기 확인 및 경고 (Gemini는 실제로 더 큰 파일도 처리 가능하지만, 안정성을 위해 50MB로 제한)
-        file_size_mb = len(video_data) / (1024 * 1024)
-        if file_size_mb > 50:
-            return f"영상 파일이 너무 큽니다 ({file_size_mb:.2f}MB). 50MB 이하의 영상만 처리할 수 있습니다. 영상이 길다면 화질을 더 낮추거나 영상을 분할해서 처리해주세요."
+            # 파일 크기 확인 (파일을 읽지 않고 크기만 확인)
+            file_size_mb = os.path.getsize(video_path) / (1024 * 1024)
         
-        # 30MB 이상이면 경고 메시지 추가
-        size_warning = ""
-        if file_size_mb > 30:
-            size_warning = f"\n⚠️ 주의: 영상이 큽니다 ({file_size_mb:.2f}MB). 처리 시간이 오래 걸릴 수 있습니다."
+            # MIME 타입 결정
+            mime_type = VIDEO_MIME_TYPES.get(video_path.suffix.lower(), "video/mp4")
         
-        # MIME 타입 결정
-        video_ext = video_path.suffix.lower()
-        mime_types = {
-            ".mp4": "video/mp4",
-            ".webm": "video/webm",
-            ".mkv": "video/x-matroska"
-        }
-        mime_type = mime_types.get(video_ext, "video/mp4")
-        
-        # 영상 정보 가져오기
-        with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
-            info = ydl.extract_info(youtube_url, download=False)
-            title = info.get('title', 'Unknown')
-            description = info.get('description', '')[:500]  # 처음 500자만
-        
-        # Gemini API 직접 호출
-        import google.generativeai as genai
+            # 긴 영상은 구간별로 나눠 병렬 요약 후 합침
+            if should_segment(file_size_mb, info.get('duration')):
+                try:
+                    result = summarize_video_segments(video_id, video_path, info, mime_type)
+                except Exception as e:
+                    return f"영상 요약 생성 중 오류 발생: {str(e)}"
+                analysis_cache.put(video_id, _model_name(), PROMPT_VERSION, result)
+                return result
         
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
-        # 프롬프트 구성
-        prompt = f"""다음 유튜브 영상을 분석하고 요약해주세요.
+            # 프롬프트 구성
+            prompt = f"""다음 유튜브 영상을 분석하고 요약해주세요.
 
 영상 제목: {title}
 영상 설명: {description}
 
-영상의 주요 내용을 다음 형식으로 요약해주세요:
-1. 영상 주제 및 목적
-2. 주요 내용 요약 (3-5개 포인트)
-3. 핵심 메시지
-4. 추천 대상
-
-한국어로 자세하고 구체적으로 작성해주세요."""
+{SUMMARY_FORMAT}"""
         
-        # 영상 파일 업로드 및 요약
-        try:
-            response = model.generate_content([
-                {
-                    "mime_type": mime_type,
-                    "data": video_data
-                },
-                prompt
-            ])
-            
-            result = response.text
-            if size_warning:
-                result = size_warning + "\n\n" + result
-            
-            return result
+            # 영상 파일 업로드(파일 경로로 스트리밍) 및 요약
+            try:
+                with span("gemini.video", video_id=video_id, video_mb=round(file_size_mb, 2)):
+                    result = _video_model_client.generate(str(video_path), mime_type, prompt)
+                analysis_cache.put(video_id, _model_name(), PROMPT_VERSION, result)
+                return result
         
-        except Exception as e:
-            error_msg = str(e)
-            # 파일 크기 관련 에러인지 확인
-            if "file size" in error_msg.lower() or "too large" in error_msg.lower() or "size limit" in error_msg.lower():
-                return f"영상 파일이 너무 큽니다 ({file_size_mb:.2f}MB). Gemini API 제한을 초과했습니다. 영상을 더 낮은 화질로 다운로드하거나, 영상을 분할해서 처리해주세요."
-            return f"영상 요약 생성 중 오류 발생: {str(e)}"
+            except Exception as e:
+                error_msg = str(e)
+                # 파일 크기 관련 에러인지 확인
+                if "file size" in error_msg.lower() or "too large" in error_msg.lower() or "size limit" in error_msg.lower():
+                    return f"영상 파일이 너무 큽니다 ({file_size_mb:.2f}MB). Gemini API 제한을 초과했습니다. 영상을 더 낮은 화질로 다운로드하거나, 영상을 분할해서 처리해주세요."
+                return f"영상 요약 생성 중 오류 발생: {str(e)}"
     
     except ImportError:
         return "필요한 패키지가 설치되지 않았습니다. 'pip install yt-dlp google-generativeai'를 실행하세요."
     except Exception as e:
         return f"영상 요약 중 오류 발생: {str(e)}"
 
+_video_index: Optional[VideoIndex] = None
+_video_index_lock = threading.Lock()
+
+def get_video_index() -> VideoIndex:
+    """영상 구간 인덱스 (처음 사용할 때 생성, 임베딩은 디스크 캐시를 거침)"""
+    global _video_index
+    with _video_index_lock:
+        if _video_index is None:
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+            from core.embedding_cache import CachedEmbeddings
+
+            _video_index = VideoIndex(
+                VIDEO_ANALYSIS_DIR / "index",
+                CachedEmbeddings(
+                    GoogleGenerativeAIEmbeddings(
+                        model="models/embedding-001",
+                        google_api_key=os.getenv("GEMINI_API_KEY")
+                    ),
+                    db_path=os.getenv("EMBEDDING_CACHE_PATH", "data/cache/embeddings.sqlite3")
+                ),
+                max_bytes=int(os.getenv("VIDEO_INDEX_MAX_MB", "200")) * 1024 * 1024
+            )
+        return _video_index
+
+def set_video_index(index: VideoIndex):
+    """영상 구간 인덱스를 교체합니다. (로컬 임베딩을 쓰는 테스트용 인덱스 등)"""
+    global _video_index
+    _video_index = index
+
+def _cached_segment_summaries(video_id: str, duration: float = None) -> Tuple[List[dict], List[int]]:
+    """
+    구간별 요약(긴 영상 처리 시 캐시된 결과)을 시간 순서로 가져옵니다.
+
+    구간 수는 요약할 때 함께 저장한 값을 쓰고, 그 값이 없으면 영상 길이로 추정한 범위에서
+    마지막으로 캐시된 구간까지를 전체 구간으로 봅니다.
+
+    Returns:
+        (캐시된 구간 요약 목록, 캐시에서 빠진 구간 번호 목록), 요약한 적이 없으면 ([], [])
+    """
+    count = analysis_cache.get(video_id, _model_name(), PROMPT_VERSION, kind=_segment_count_kind())
+    try:
+        total = int(count) if count is not None else None
+    except ValueError:
+        total = None
+    if total is None:
+        total = max(1, math.ceil(duration / VIDEO_SEGMENT_SECONDS)) if duration else 1
+
+    segments, missing = [], []
+    for index in range(total):
+        text = analysis_cache.get(video_id, _model_name(), PROMPT_VERSION, kind=_segment_kind(index))
+        if text is None:
+            missing.append(index)
+            continue
+        start = index * VIDEO_SEGMENT_SECONDS
+        end = start + VIDEO_SEGMENT_SECONDS
+        segments.append({"start": start, "end": min(end, duration) if duration else end, "text": text})
+    if not segments:
+        return [], []
+    if count is None:
+        # 구간 수를 모르면 마지막으로 캐시된 구간 뒤는 영상에 없는 구간일 수 있으므로 빠진 구간으로 보지 않음
+        last = max(index for index in range(total) if index not in missing)
+        missing = [index for index in missing if index < last]
+    return segments, missing
+
+def _segment_summaries(youtube_url: str, video_id: str) -> List[dict]:
+    """
+    구간별 요약을 시간 순서로 가져옵니다. 없으면 빈 목록
+
+    일부 구간 요약만 캐시에서 빠졌으면(LRU 정리 등) 앞부분만 돌려주지 않고
+    영상을 다시 준비하여 빠진 구간만 다시 요약합니다.
+    """
+    info = load_video_info(video_id) or {}
+    segments, missing = _cached_segment_summaries(video_id, info.get("duration"))
+    if not missing:
+        return segments
+
+    with download_manager.pinned(youtube_url, video_id) as (video_path, info):
+        mime_type = VIDEO_MIME_TYPES.get(video_path.suffix.lower(), "video/mp4")
+        _summarize_segments(video_id, video_path, info, mime_type)
+    segments, _ = _cached_segment_summaries(video_id, info.get("duration"))
+    return segments
+
+def _video_chunks(youtube_url: str, video_id: str, use_video: bool) -> list:
+    """
+    인덱스에 넣을 타임스탬프 청크를 준비합니다.
+    자막이 있으면 자막으로, 없으면 구간 요약으로 만들고, 둘 다 없으면 빈 목록을 반환합니다.
+    """
+    if not use_video:
+        cues, _ = fetch_transcript(youtube_url, video_id)
+        if cues:
+            return chunks_from_cues(video_id, cues, VIDEO_CHUNK_SECONDS)
+    return chunks_from_segments(video_id, _segment_summaries(youtube_url, video_id))
+
+def _answer_llm():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from core.agent_factory import AgentFactory, AgentType
+
+    # 영상 Q&A 에이전트와 같은 캐시 정책 (같은 구간·질문이면 저장된 답변 사용)
+    return govern_chat_model(ChatGoogleGenerativeAI(
+        model="gemini-2.5-flash",
+        temperature=0,
+        google_api_key=os.getenv("GEMINI_API_KEY"),
+        max_retries=CLIENT_MAX_RETRIES,
+        cache=AgentFactory.get_response_cache(AgentType.VIDEO_QA)
+    ))
+
 @tool
-def answer_youtube_question(question: str, youtube_url: str) -> str:
+def answer_youtube_question(question: str, youtube_url: str, use_video: bool = False) -> str:
     """
     유튜브 영상에 대한 질문에 답변합니다.
+    질문과 관련된 영상 구간을 찾아 답변하며, 답변에 해당 구간의 타임스탬프([mm:ss])를 표시합니다.
     
     Args:
         question: 사용자의 질문
         youtube_url: 유튜브 영상 URL
+        use_video: True이면 자막이 있어도 영상 자체를 분석한 내용을 사용
     
     Returns:
         질문에 대한 답변
     """
     try:
-        # 먼저 영상 요약 생성
-        summary = summarize_youtube_video.invoke({"youtube_url": youtube_url})
-        
-        if "오류" in summary or "실패" in summary:
-            return summary
+        video_id = extract_video_id(youtube_url)
+        if not video_id:
+            return f"유효하지 않은 유튜브 URL입니다: {youtube_url}"
         
-        # Gemini로 질문 답변
-        from langchain_google_genai import ChatGoogleGenerativeAI
+        # 자막(또는 구간 요약)이 있으면 관련 구간만 찾아서 답변
+        # (자막·인덱스는 디스크에 저장되므로 같은 영상의 후속 질문은 영상 처리 없이 질문 임베딩 1회만 필요)
+        chunks = _video_chunks(youtube_url, video_id, use_video)
+        if not chunks:
+            # 자막도 구간 요약도 아직 없으면 요약을 먼저 만듦 (긴 영상이면 이때 구간 요약이 생겨 구간 인덱스로 답변)
+            summary = summarize_youtube_video.invoke({"youtube_url": youtube_url, "use_video": use_video})
+            if "오류" in summary or "실패" in summary:
+                return summary
+            chunks = _video_chunks(youtube_url, video_id, use_video)
         
-        llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            temperature=0,
-            google_api_key=os.getenv("GEMINI_API_KEY")
-        )
+        if chunks:
+            index = get_video_index()
+            index.ensure(video_id, chunks)
+            with span("video_index.search", video_id=video_id):
+                relevant = index.search(video_id, question, k=VIDEO_QA_TOP_K)
+            context = "\n\n".join(format_chunk(doc) for doc in relevant)
+            title = (load_video_info(video_id) or {}).get("title") or "Unknown"
+            prompt = f"""다음은 유튜브 영상 "{title}"에서 질문과 관련된 구간들입니다:
+
+{context}
+
+위 구간 내용을 바탕으로 다음 질문에 답변해주세요:
+{question}
+
+답변은 구간 내용에 근거하여 정확하고 구체적으로 작성하고,
+근거가 된 구간의 시작 시각을 [mm:ss] 형식으로 함께 표시해주세요.
+구간에 답이 없으면 영상에서 해당 내용을 찾지 못했다고 답변해주세요."""
+            return _answer_llm().invoke(prompt).content
         
+        # 구간 정보가 없는 짧은 영상은 위에서 만든 전체 요약으로 답변
         prompt = f"""다음은 유튜브 영상의 요약입니다:
 
 {summary}
@@ -229,11 +1033,11 @@ def answer_youtube_question(question: str, youtube_url: str) -> str:
 
 답변은 요약 내용에 근거하여 정확하고 구체적으로 작성해주세요."""
         
-        response = llm.invoke(prompt)
+        response = _answer_llm().invoke(prompt)
         return response.content
     
     except Exception as e:
         return f"질문 답변 생성 중 오류 발생: {str(e)}"
 
 # 도구 리스트
-video_tools = [download_youtube_video, summarize_youtube_video, answer_youtube_question]
+video_tools = with_bounded_async([download_youtube_video, summarize_youtube_video, answer_youtube_question])
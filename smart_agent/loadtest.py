@@ -0,0 +1,533 @@
+"""
+에이전트 부하 테스트 (오프라인)
+
+Gemini·Tavily 대신 지연 시간만 흉내 내는 가짜 채팅 모델과 가짜 도구를 AgentFactory로 주입하고,
+에이전트 타입별로 N개의 동시 세션이 여러 턴을 주고받을 때의
+처리량(turns/s), 턴 지연(p50/p95/p99), 프레임워크 오버헤드(턴 지연 - 가짜 모델·도구 대기 시간),
+메모리 증가(tracemalloc)를 측정하여 JSON으로 출력합니다.
+
+지연 분포 형식: fixed:ms, uniform:최소ms:최대ms, lognormal:p50ms:p95ms
+
+사용 예:
+    python loadtest.py --sessions 50 --turns 3
+    python loadtest.py --agent web_search --mode stream --llm-latency lognormal:800:2500 --tool-rounds 0-2
+    python loadtest.py --llm-latency fixed:0 --tool-latency fixed:0 --no-memory   # 순수 프레임워크 오버헤드
+"""
+import os
+
+# 원격 호출은 하지 않지만 모듈 로드 시 클라이언트를 만드는 도구가 있어 키 자리만 채움
+os.environ.setdefault("GEMINI_API_KEY", "loadtest")
+os.environ.setdefault("TAVILY_API_KEY", "loadtest")
+# 가짜 모델이 실제 Gemini 한도에 막히지 않도록 관문 한도를 풀어 둠 (한도를 포함해 측정하려면 환경 변수로 지정)
+os.environ.setdefault("GEMINI_RPM", "1000000000")
+os.environ.setdefault("GEMINI_TPM", "1000000000000")
+os.environ.setdefault("GEMINI_MAX_CONCURRENCY", "100000")
+
+import argparse
+import asyncio
+import contextvars
+import gc
+import json
+import math
+import platform
+import random
+import statistics
+import threading
+import time
+import tracemalloc
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import BaseTool, StructuredTool
+from pydantic import ConfigDict, PrivateAttr
+
+from core.agent_factory import AgentFactory, AgentType
+from core.code_tools import code_tools
+from core.gemini_governor import governor
+from core.history import ConversationWindow
+from core.streaming import stream_agent_events
+from core.tools import tools as web_tools
+from core.video_tools import video_tools
+
+# 에이전트 타입별 실제 도구 (가짜 도구는 이름과 인자 스키마를 그대로 따름)
+AGENT_TOOLS = {
+    AgentType.WEB_SEARCH: web_tools,
+    AgentType.CODE_GENERATOR: code_tools,
+    AgentType.VIDEO_QA: video_tools,
+    AgentType.PERSONA_CHATBOT: [],
+}
+
+# 현재 턴에서 가짜 모델·도구가 기다린 구간 [(시작, 끝)] (턴 지연에서 빼서 프레임워크 오버헤드를 구함)
+_injected: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("injected", default=None)
+
+def percentile(values: List[float], q: float) -> float:
+    """선형 보간 백분위수 (q: 0~100)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def latency_summary(samples_s: List[float]) -> Dict[str, float]:
+    samples_ms = [s * 1000 for s in samples_s] or [0.0]
+    return {
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+        "max_ms": round(max(samples_ms), 3),
+        "mean_ms": round(statistics.fmean(samples_ms), 3),
+    }
+
+class LatencyModel:
+    """지연 분포 ('fixed:ms', 'uniform:min:max', 'lognormal:p50:p95', 단위 ms)"""
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        kind, *params = spec.split(":")
+        values = [float(p) / 1000 for p in params]
+        if kind == "fixed" and len(values) == 1:
+            self._sample = lambda rng: values[0]
+        elif kind == "uniform" and len(values) == 2:
+            self._sample = lambda rng: rng.uniform(values[0], values[1])
+        elif kind == "lognormal" and len(values) == 2 and 0 < values[0] <= values[1]:
+            # p50 = e^mu, p95 = e^(mu + 1.645 sigma)
+            mu = math.log(values[0])
+            sigma = (math.log(values[1]) - mu) / 1.645
+            self._sample = lambda rng: rng.lognormvariate(mu, sigma)
+        else:
+            raise ValueError(f"알 수 없는 지연 분포: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        return max(0.0, self._sample(rng))
+
+def _record_wait(started: float):
+    intervals = _injected.get()
+    if intervals is not None:
+        intervals.append((started, time.perf_counter()))
+
+def _wait(seconds: float):
+    started = time.perf_counter()
+    if seconds > 0:
+        time.sleep(seconds)
+    _record_wait(started)
+
+async def _await(seconds: float):
+    started = time.perf_counter()
+    if seconds > 0:
+        await asyncio.sleep(seconds)
+    _record_wait(started)
+
+def _covered_seconds(intervals: List[Tuple[float, float]]) -> float:
+    """겹치는 구간(병렬 도구 실행 등)을 합친 총 대기 시간"""
+    total = 0.0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+def _default_args(tool: BaseTool) -> dict:
+    """도구 인자 스키마의 필수 인자를 타입에 맞는 기본값으로 채웁니다."""
+    schema = tool.args_schema.model_json_schema() if tool.args_schema else {}
+    defaults = {"string": "loadtest", "integer": 1, "number": 1.0, "boolean": False, "array": [], "object": {}}
+    return {
+        name: defaults.get(prop.get("type"), "loadtest")
+        for name, prop in tool.args.items()
+        if name in schema.get("required", [])
+    }
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    부하 테스트용 가짜 채팅 모델
+
+    지연 분포에 따라 기다린 뒤, 턴(마지막 사용자 메시지)마다 정해진 횟수만큼 바인딩된 도구를 호출하고
+    마지막에 answer_words 단어 길이의 답변을 반환합니다. 스트리밍 호출이면 답변을 여러 청크로 나눠 보냅니다.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    latency: LatencyModel
+    tool_rounds: Tuple[int, int] = (0, 1)  # 턴당 도구 호출 라운드 수 범위
+    parallel_tools: int = 1  # 라운드당 동시에 요청하는 도구 호출 수
+    answer_words: int = 120
+    seed: int = 0
+    bound_tools: List[Tuple[str, dict]] = []
+
+    _rng: random.Random = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default=None)
+
+    def model_post_init(self, __context):
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        bound = self.model_copy(update={"bound_tools": [(t.name, _default_args(t)) for t in tools]})
+        bound._rng, bound._lock = self._rng, self._lock
+        return bound
+
+    def _delay(self) -> float:
+        with self._lock:
+            return self.latency.sample(self._rng)
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+        human_text = messages[last_human].content if last_human >= 0 else ""
+        rounds_done = sum(1 for m in messages[last_human + 1:] if isinstance(m, AIMessage) and m.tool_calls)
+
+        # 같은 턴 안에서는 몇 번 도구를 부를지가 바뀌지 않도록 질문 내용으로 결정
+        plan = random.Random(zlib.crc32(f"{self.seed}:{human_text}".encode("utf-8")))
+        target_rounds = plan.randint(*self.tool_rounds)
+        input_tokens = sum(len(str(m.content)) // 4 + 4 for m in messages)
+
+        if self.bound_tools and rounds_done < target_rounds:
+            tool_calls = []
+            for i in range(self.parallel_tools):
+                name, args = self.bound_tools[plan.randrange(len(self.bound_tools))]
+                tool_calls.append({"name": name, "args": dict(args), "id": f"call_{uuid.uuid4().hex[:12]}"})
+            return AIMessage(
+                content="",
+                tool_calls=tool_calls,
+                usage_metadata={"input_tokens": input_tokens, "output_tokens": 20, "total_tokens": input_tokens + 20},
+            )
+
+        answer = " ".join(f"응답{i}" for i in range(self.answer_words))
+        output_tokens = self.answer_words * 2
+        return AIMessage(
+            content=answer,
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens},
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        _wait(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await _await(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    def _chunks(self, message: AIMessage) -> Iterator[ChatGenerationChunk]:
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                    for i, call in enumerate(message.tool_calls)
+                ],
+                usage_metadata=message.usage_metadata,
+            ))
+            return
+        words = message.content.split(" ")
+        for i in range(0, len(words), 8):
+            piece = " ".join(words[i:i + 8]) + (" " if i + 8 < len(words) else "")
+            last = i + 8 >= len(words)
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content=piece,
+                usage_metadata=message.usage_metadata if last else None,
+            ))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        _wait(self._delay())
+        for chunk in self._chunks(self._respond(messages)):
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await _await(self._delay())
+        for chunk in self._chunks(self._respond(messages)):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
+
+def make_fake_tools(real_tools: List[BaseTool], latency: LatencyModel, payload_bytes: int, seed: int = 0) -> List[BaseTool]:
+    """실제 도구와 이름·설명·인자 스키마가 같고, 지연 분포만큼 기다린 뒤 payload_bytes 크기의 결과를 반환하는 도구"""
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    payload = ("부하 테스트 도구 결과 " * (payload_bytes // 30 + 1))[:payload_bytes]
+
+    def delay() -> float:
+        with lock:
+            return latency.sample(rng)
+
+    def run(**kwargs) -> str:
+        _wait(delay())
+        return payload
+
+    async def arun(**kwargs) -> str:
+        await _await(delay())
+        return payload
+
+    return [
+        StructuredTool.from_function(
+            func=run,
+            coroutine=arun,
+            name=real.name,
+            description=real.description,
+            args_schema=real.args_schema,
+        )
+        for real in real_tools
+    ]
+
+def _summarize_history(previous_summary: str, messages: List[BaseMessage]) -> str:
+    """대화 윈도우용 로컬 요약 (Gemini 호출 없이 최근 내용만 이어 붙임)"""
+    text = " ".join(str(m.content)[:80] for m in messages)
+    return f"{previous_summary} {text}".strip()[-1000:]
+
+class _Recorder:
+    """턴별 측정값 수집 (여러 스레드·태스크에서 호출)"""
+
+    def __init__(self):
+        self.latencies = []
+        self.overheads = []
+        self.first_tokens = []
+        self.errors = []
+        self.llm_calls = 0
+        self.tool_calls = 0
+        self._lock = threading.Lock()
+
+    def add(self, elapsed: float, injected: float, final_messages: List[BaseMessage], new_count: int, first_token: float = None):
+        new_messages = final_messages[-new_count:] if new_count else []
+        with self._lock:
+            self.latencies.append(elapsed)
+            self.overheads.append(max(0.0, elapsed - injected))
+            if first_token is not None:
+                self.first_tokens.append(first_token)
+            self.llm_calls += sum(1 for m in new_messages if isinstance(m, AIMessage))
+            self.tool_calls += sum(len(m.tool_calls) for m in new_messages if isinstance(m, AIMessage))
+
+    def error(self, e: Exception):
+        with self._lock:
+            self.errors.append(f"{type(e).__name__}: {e}")
+
+def _question(session: int, turn: int, rng: random.Random) -> str:
+    return f"세션 {session}의 {turn + 1}번째 질문입니다. 주제 {rng.randint(0, 10_000)}에 대해 자세히 알려주세요."
+
+def _run_session_sync(agent, agent_type: AgentType, session: int, turns: int, mode: str, recorder: _Recorder, seed: int, think_time: float):
+    rng = random.Random(seed * 100_003 + session)
+    window = ConversationWindow(**AgentFactory.get_history_policy(agent_type), summarizer=_summarize_history)
+    messages, history_state = [], None
+    for turn in range(turns):
+        messages.append(HumanMessage(content=_question(session, turn, rng)))
+        inputs_messages, history_state = window.prepare(messages, history_state)
+        intervals = []
+        token = _injected.set(intervals)
+        started = time.perf_counter()
+        first_token = None
+        try:
+            if mode == "stream":
+                final = None
+                for event in stream_agent_events(agent, {"messages": inputs_messages}):
+                    if event["type"] == "token" and first_token is None:
+                        first_token = time.perf_counter() - started
+                    elif event["type"] == "final":
+                        final = event["messages"]
+            else:
+                final = agent.app.invoke({"messages": inputs_messages})["messages"]
+            elapsed = time.perf_counter() - started
+            recorder.add(elapsed, _covered_seconds(intervals), final, len(final) - len(inputs_messages), first_token)
+            messages.append(AIMessage(content=str(final[-1].content)))
+        except Exception as e:
+            recorder.error(e)
+        finally:
+            _injected.reset(token)
+        if think_time:
+            time.sleep(rng.uniform(0, think_time))
+
+async def _run_session_async(agent, agent_type: AgentType, session: int, turns: int, recorder: _Recorder, seed: int, think_time: float):
+    rng = random.Random(seed * 100_003 + session)
+    window = ConversationWindow(**AgentFactory.get_history_policy(agent_type), summarizer=_summarize_history)
+    messages, history_state = [], None
+    for turn in range(turns):
+        messages.append(HumanMessage(content=_question(session, turn, rng)))
+        inputs_messages, history_state = window.prepare(messages, history_state)
+        intervals = []
+        token = _injected.set(intervals)
+        started = time.perf_counter()
+        try:
+            final = (await agent.app.ainvoke({"messages": inputs_messages}))["messages"]
+            elapsed = time.perf_counter() - started
+            recorder.add(elapsed, _covered_seconds(intervals), final, len(final) - len(inputs_messages))
+            messages.append(AIMessage(content=str(final[-1].content)))
+        except Exception as e:
+            recorder.error(e)
+        finally:
+            _injected.reset(token)
+        if think_time:
+            await asyncio.sleep(rng.uniform(0, think_time))
+
+def run_load(
+    agent_type: AgentType,
+    sessions: int = 20,
+    turns: int = 3,
+    mode: str = "async",
+    llm_latency: str = "lognormal:800:2500",
+    tool_latency: str = "lognormal:300:1200",
+    tool_rounds: Tuple[int, int] = (0, 1),
+    parallel_tools: int = 1,
+    answer_words: int = 120,
+    payload_bytes: int = 2000,
+    think_time: float = 0.0,
+    seed: int = 0,
+    measure_memory: bool = True,
+) -> dict:
+    """
+    에이전트 타입 하나에 대해 sessions개의 동시 세션이 turns턴씩 대화하는 부하를 걸고 결과를 반환합니다.
+
+    Args:
+        mode: async(ainvoke, 이벤트 루프 하나), thread(invoke, 세션당 스레드), stream(stream_agent_events, 세션당 스레드)
+    """
+    llm = ScriptedChatModel(
+        latency=LatencyModel(llm_latency),
+        tool_rounds=tool_rounds,
+        parallel_tools=parallel_tools,
+        answer_words=answer_words,
+        seed=seed,
+    )
+    fake_tools = make_fake_tools(AGENT_TOOLS[agent_type], LatencyModel(tool_latency), payload_bytes, seed)
+    # 실제 서비스처럼 모든 세션이 에이전트 인스턴스 하나를 공유
+    agent = AgentFactory.create_agent(agent_type, llm=llm, tools=fake_tools)
+
+    # 워밍업 (첫 호출의 지연·메모리 할당이 결과에 섞이지 않도록)
+    _run_session_sync(agent, agent_type, -1, 1, "thread", _Recorder(), seed, 0)
+
+    recorder = _Recorder()
+    gc.collect()
+    if measure_memory:
+        tracemalloc.reset_peak()
+        memory_before = tracemalloc.get_traced_memory()[0]
+    governor_before = governor.stats()
+
+    started = time.perf_counter()
+    if mode == "async":
+        async def main():
+            await asyncio.gather(*[
+                _run_session_async(agent, agent_type, s, turns, recorder, seed, think_time) for s in range(sessions)
+            ])
+        asyncio.run(main())
+    elif mode in ("thread", "stream"):
+        with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="loadtest") as pool:
+            futures = [
+                pool.submit(_run_session_sync, agent, agent_type, s, turns, mode, recorder, seed, think_time)
+                for s in range(sessions)
+            ]
+            for future in futures:
+                future.result()
+    else:
+        raise ValueError(f"알 수 없는 실행 방식: {mode}")
+    duration = time.perf_counter() - started
+
+    memory = None
+    if measure_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - memory_before
+        memory = {
+            "peak_growth_kb": round((peak - memory_before) / 1024, 1),
+            "retained_growth_kb": round(retained / 1024, 1),
+            "retained_bytes_per_turn": round(retained / max(1, len(recorder.latencies))),
+        }
+
+    governor_after = governor.stats()
+    completed = len(recorder.latencies)
+    result = {
+        "agent_type": agent_type.value,
+        "sessions": sessions,
+        "turns": completed,
+        "errors": len(recorder.errors),
+        "error_samples": recorder.errors[:5],
+        "duration_s": round(duration, 3),
+        "throughput_tps": round(completed / duration, 3) if duration else 0.0,
+        "latency": latency_summary(recorder.latencies),
+        "overhead": latency_summary(recorder.overheads),
+        "llm_calls": recorder.llm_calls,
+        "tool_calls": recorder.tool_calls,
+        "governor": {
+            "retries": governor_after["retries"] - governor_before["retries"],
+            "max_queued": governor_after["max_queued"],
+            "wait_seconds": round(governor_after["wait_seconds"] - governor_before["wait_seconds"], 3),
+        },
+        "memory": memory,
+    }
+    if recorder.first_tokens:
+        result["first_token"] = latency_summary(recorder.first_tokens)
+    return result
+
+def _parse_range(value: str) -> Tuple[int, int]:
+    low, _, high = value.partition("-")
+    return int(low), int(high or low)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="가짜 모델·도구로 에이전트 그래프 부하 테스트")
+    parser.add_argument("--agent", nargs="+", default=[t.value for t in AgentType], help="측정할 에이전트 타입")
+    parser.add_argument("--sessions", type=int, default=20, help="동시 세션 수")
+    parser.add_argument("--turns", type=int, default=3, help="세션당 턴 수")
+    parser.add_argument("--mode", default="async", help="실행 방식 (async, thread, stream)")
+    parser.add_argument("--llm-latency", default="lognormal:800:2500", help="LLM 호출 지연 분포")
+    parser.add_argument("--tool-latency", default="lognormal:300:1200", help="도구 실행 지연 분포")
+    parser.add_argument("--tool-rounds", default="0-1", help="턴당 도구 호출 라운드 수 범위 (예: 0-2)")
+    parser.add_argument("--parallel-tools", type=int, default=1, help="라운드당 도구 호출 수")
+    parser.add_argument("--answer-words", type=int, default=120, help="최종 답변 길이(단어)")
+    parser.add_argument("--payload-bytes", type=int, default=2000, help="도구 결과 크기(바이트)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="턴 사이 최대 대기 시간(초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="tracemalloc 측정 끄기 (지연 측정이 더 정확해짐)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if not args.no_memory:
+        tracemalloc.start()
+
+    results = []
+    for agent_type in args.agent:
+        results.append(run_load(
+            AgentType(agent_type),
+            sessions=args.sessions,
+            turns=args.turns,
+            mode=args.mode,
+            llm_latency=args.llm_latency,
+            tool_latency=args.tool_latency,
+            tool_rounds=_parse_range(args.tool_rounds),
+            parallel_tools=args.parallel_tools,
+            answer_words=args.answer_words,
+            payload_bytes=args.payload_bytes,
+            think_time=args.think_time,
+            seed=args.seed,
+            measure_memory=not args.no_memory,
+        ))
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "config": {key: value for key, value in vars(args).items() if key not in ("agent", "output")},
+        "results": results,
+    }
+    try:
+        import resource  # 유닉스 계열에서만 사용 가능
+        report["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:
+        pass
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
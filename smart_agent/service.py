@@ -0,0 +1,226 @@
+"""
+Smart AI Agent HTTP 서비스 (FastAPI)
+Streamlit 화면 없이 다른 시스템이 에이전트를 직접 호출할 수 있도록 채팅 스레드 API와
+SSE(server-sent events) 토큰 스트리밍을 제공합니다.
+
+- 채팅 스레드와 메시지는 Streamlit 앱과 같은 SQLite 저장소(ChatStore)에 저장되므로 두 화면에서 이어서 대화할 수 있습니다.
+- 컴파일된 에이전트는 프로세스 전역 레지스트리(AgentFactory)에서 공유합니다.
+- 상태는 모두 SQLite에 있으므로 여러 워커 프로세스로 실행할 수 있습니다.
+
+실행 (smart_agent 디렉토리에서):
+    uvicorn service:app --host 0.0.0.0 --port 8000 --workers 4
+
+스트리밍 호출 예:
+    curl -N -X POST localhost:8000/threads/{thread_id}/messages \\
+         -H "Content-Type: application/json" -d '{"content": "안녕", "stream": true}'
+"""
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import List
+
+import anyio
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from pydantic import BaseModel, Field
+
+from core.agent_factory import AgentFactory, AgentType
+from core.chat_store import ChatBusyError, get_chat_store
+from core.gemini_governor import embedding_governor, governor
+from core.history import ConversationWindow
+from core.llm_cache import get_cache_stats
+from core.streaming import astream_agent_events, content_to_text
+from core.tracing import tracer
+
+load_dotenv()
+
+# SSE로 보내는 도구 결과 미리보기 최대 길이
+TOOL_PREVIEW_CHARS = 500
+
+class CreateThreadRequest(BaseModel):
+    agent_type: AgentType
+    owner: str = "default"
+
+class PostMessageRequest(BaseModel):
+    content: str = Field(min_length=1)
+    stream: bool = False  # True이면 SSE(text/event-stream)로 토큰과 도구 진행 상황을 전송
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 워커 프로세스마다 시작 시 에이전트를 미리 생성하여 첫 요청의 지연을 없앰 (AGENT_WARMUP=1)
+    if os.getenv("AGENT_WARMUP", "0") == "1":
+        await run_in_threadpool(AgentFactory.warm_up)
+    yield
+
+app = FastAPI(title="Smart AI Agent", lifespan=lifespan)
+
+# 같은 스레드에 답변 생성 중인 요청이 있을 때의 409 응답 메시지 (임대는 SQLite에 있어 워커 프로세스 사이에서도 유효)
+BUSY_DETAIL = "이 스레드는 이전 메시지에 대한 답변을 생성 중입니다."
+
+def _message_to_dict(message: BaseMessage) -> dict:
+    return {"type": message.type, "content": content_to_text(message.content) or str(message.content)}
+
+def _get_thread(thread_id: str) -> dict:
+    chat = get_chat_store().get_chat(thread_id)
+    if chat is None:
+        raise HTTPException(status_code=404, detail=f"존재하지 않는 스레드입니다: {thread_id}")
+    if not chat.get("agent_type"):
+        raise HTTPException(status_code=400, detail="에이전트 타입이 지정되지 않은 스레드입니다.")
+    return chat
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.get("/health")
+def health():
+    """상태 확인 (레지스트리·Gemini 관문(생성·임베딩)·LLM 캐시 통계 포함)"""
+    return {
+        "status": "ok",
+        "registry": AgentFactory.get_registry_stats(),
+        "governor": governor.stats(),
+        "embedding_governor": embedding_governor.stats(),
+        "llm_cache": get_cache_stats(),
+    }
+
+@app.get("/agents")
+def list_agents():
+    """사용 가능한 에이전트 타입 목록"""
+    return [{"agent_type": agent_type.value, **AgentFactory.get_agent_info(agent_type)} for agent_type in AgentType]
+
+@app.post("/threads", status_code=201)
+def create_thread(request: CreateThreadRequest):
+    """새 채팅 스레드를 만듭니다."""
+    return get_chat_store().create_chat(request.agent_type.value, owner=request.owner)
+
+@app.get("/threads")
+def list_threads(owner: str = "default", limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0)):
+    """소유자의 스레드 목록 (최신순)"""
+    store = get_chat_store()
+    return {"total": store.count_chats(owner), "threads": store.list_chats(owner, limit=limit, offset=offset)}
+
+@app.get("/threads/{thread_id}")
+def get_thread(thread_id: str):
+    return _get_thread(thread_id)
+
+@app.get("/threads/{thread_id}/messages")
+def get_messages(thread_id: str):
+    _get_thread(thread_id)
+    return [_message_to_dict(message) for message in get_chat_store().load_messages(thread_id)]
+
+@app.delete("/threads/{thread_id}", status_code=204)
+def delete_thread(thread_id: str):
+    _get_thread(thread_id)
+    get_chat_store().delete_chat(thread_id)
+
+def _prepare_turn(chat: dict, content: str, lease: str):
+    """
+    사용자 메시지를 저장하고 에이전트에 넘길 입력을 만듭니다. (SQLite·대화 요약 호출이 있어 스레드 풀에서 실행)
+
+    Args:
+        chat: 스레드 메타데이터
+        content: 사용자 메시지
+        lease: 이 요청이 잡은 답변 생성 임대 토큰
+
+    Returns:
+        (에이전트, 그래프 입력)
+    """
+    store = get_chat_store()
+    agent_type = AgentType(chat["agent_type"])
+    agent = AgentFactory.create_agent(agent_type)
+
+    store.append_messages(chat["id"], [HumanMessage(content=content)], lease=lease)
+    messages = store.load_messages(chat["id"])
+
+    # 토큰 예산에 맞춰 오래된 턴은 요약으로 접어서 전달 (Streamlit 앱과 같은 정책)
+    window = ConversationWindow(**AgentFactory.get_history_policy(agent_type))
+    windowed_messages, history_state = window.prepare(messages, chat.get("history_state"))
+    store.update_history_state(chat["id"], history_state)
+    return agent, {"messages": windowed_messages}
+
+async def _release_lease(thread_id: str, lease: str):
+    """
+    답변 생성 임대를 반납합니다.
+
+    SSE 클라이언트가 연결을 끊으면 Starlette가 응답 태스크를 취소하므로, 반납이 같이 취소되지 않도록 취소를 막습니다.
+    (반납하지 못하면 임대가 만료될 때까지 그 스레드에 보내는 메시지가 모두 409)
+    """
+    with anyio.CancelScope(shield=True):
+        await run_in_threadpool(get_chat_store().release_generation, thread_id, lease)
+
+def _save_reply(thread_id: str, final_messages: List[BaseMessage], lease: str) -> AIMessage:
+    last_message = final_messages[-1]
+    reply = AIMessage(content=content_to_text(last_message.content) or str(last_message.content))
+    get_chat_store().append_messages(thread_id, [reply], lease=lease)
+    return reply
+
+@app.post("/threads/{thread_id}/messages")
+async def post_message(thread_id: str, request: PostMessageRequest):
+    """
+    스레드에 메시지를 보내고 에이전트의 답변을 받습니다.
+
+    stream=false이면 답변 전체를 JSON으로 반환하고,
+    stream=true이면 SSE로 token / tool_start / tool_end 이벤트를 보낸 뒤 done(또는 error) 이벤트로 끝납니다.
+    같은 스레드에 답변 생성 중인 요청이 있으면 (다른 워커 프로세스 포함) 409를 반환합니다.
+    """
+    chat = await run_in_threadpool(_get_thread, thread_id)
+    store = get_chat_store()
+    lease = await run_in_threadpool(store.acquire_generation, thread_id)
+    if lease is None:
+        raise HTTPException(status_code=409, detail=BUSY_DETAIL)
+
+    try:
+        agent, inputs = await run_in_threadpool(_prepare_turn, chat, request.content, lease)
+    except ChatBusyError:
+        raise HTTPException(status_code=409, detail=BUSY_DETAIL)
+    except BaseException:
+        await _release_lease(thread_id, lease)
+        raise
+    metadata = {"chat_id": thread_id, "source": "service"}
+
+    if not request.stream:
+        try:
+            with tracer.trace_turn(chat["agent_type"], metadata) as turn:
+                final_state = await agent.app.ainvoke(inputs, config={"callbacks": [turn.handler]})
+            reply = await run_in_threadpool(_save_reply, thread_id, final_state["messages"], lease)
+            return {"thread_id": thread_id, "message": _message_to_dict(reply)}
+        except ChatBusyError:
+            raise HTTPException(status_code=409, detail=BUSY_DETAIL)
+        finally:
+            await _release_lease(thread_id, lease)
+
+    async def events():
+        try:
+            with tracer.trace_turn(chat["agent_type"], metadata) as turn:
+                async for event in astream_agent_events(agent, inputs, config={"callbacks": [turn.handler]}):
+                    if event["type"] == "token":
+                        yield _sse("token", {"text": event["text"]})
+                    elif event["type"] == "tool_start":
+                        yield _sse("tool_start", {"name": event["name"], "args": event["args"]})
+                    elif event["type"] == "tool_end":
+                        yield _sse("tool_end", {"name": event["name"], "preview": event["content"][:TOOL_PREVIEW_CHARS]})
+                    elif event["type"] == "final":
+                        reply = await run_in_threadpool(_save_reply, thread_id, event["messages"], lease)
+                        yield _sse("done", {"thread_id": thread_id, "message": _message_to_dict(reply)})
+        except Exception as e:
+            yield _sse("error", {"detail": f"{type(e).__name__}: {e}"})
+        finally:
+            await _release_lease(thread_id, lease)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "service:app",
+        host=os.getenv("SERVICE_HOST", "0.0.0.0"),
+        port=int(os.getenv("SERVICE_PORT", "8000")),
+        workers=int(os.getenv("SERVICE_WORKERS", "1")),
+    )
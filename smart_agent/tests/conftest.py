@@ -0,0 +1,12 @@
+"""
+테스트 공통 설정
+smart_agent 디렉토리를 import 경로에 추가하고(core 패키지), 원격 클라이언트 생성에 필요한 키 자리를 채웁니다.
+테스트는 모두 오프라인으로 동작하며 실제 API를 호출하지 않습니다.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
@@ -0,0 +1,89 @@
+"""
+테스트용 로컬 가짜 Gemini 엔드포인트
+127.0.0.1의 임의 포트에서 HTTP 서버를 띄워, 앞쪽 요청 몇 개는 정해진 오류 상태(429 등)로 응답하고
+이후에는 사용 토큰 수가 담긴 JSON으로 응답합니다. 동시에 처리 중인 요청 수의 최대값을 기록합니다.
+"""
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGeminiEndpoint:
+    """
+    예:
+        with FakeGeminiEndpoint(fail_first=2) as endpoint:
+            endpoint.generate("안녕")  # 처음 두 번은 urllib.error.HTTPError(429)
+    """
+
+    def __init__(self, fail_first: int = 0, fail_status: int = 429, latency: float = 0.0, total_tokens: int = 10):
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.latency = latency
+        self.total_tokens = total_tokens
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1beta/models/fake:generateContent"
+
+    def _handler(self):
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with endpoint._lock:
+                    endpoint.requests += 1
+                    number = endpoint.requests
+                    endpoint.active += 1
+                    endpoint.max_active = max(endpoint.max_active, endpoint.active)
+                try:
+                    if endpoint.latency:
+                        time.sleep(endpoint.latency)
+                    if number <= endpoint.fail_first:
+                        status = endpoint.fail_status
+                        body = {"error": {"code": status, "status": "RESOURCE_EXHAUSTED" if status == 429 else "ERROR"}}
+                    else:
+                        status = 200
+                        body = {"text": "ok", "usage_metadata": {"total_tokens": endpoint.total_tokens}}
+                finally:
+                    with endpoint._lock:
+                        endpoint.active -= 1
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def generate(self, prompt: str) -> dict:
+        """엔드포인트를 호출합니다. 오류 상태면 urllib.error.HTTPError(code=상태 코드)를 발생시킵니다."""
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"contents": prompt}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return json.loads(response.read())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,41 @@
+"""
+테스트용 로컬 대체 검색 클라이언트
+Tavily 클라이언트 대신 core.tools.set_search_client로 바꿔 끼워 네트워크 없이 검색 도구를 실행합니다.
+"""
+import hashlib
+import threading
+import time
+
+from core.tools import SEARCH_K
+
+
+class OfflineSearchClient:
+    """
+    네트워크 없이 동작하는 로컬 대체 검색 클라이언트
+
+    Tavily 클라이언트와 같은 invoke({"query": ...}) 형식으로, 검색어에서 결정되는 고정된 결과를 반환합니다.
+    호출 횟수(calls)를 세므로 캐시 적중·중복 제거 여부를 확인할 수 있습니다.
+    """
+
+    def __init__(self, k: int = SEARCH_K, latency: float = 0.0):
+        """
+        Args:
+            k: 반환할 결과 수
+            latency: 호출마다 기다릴 시간(초) (원격 검색 지연 흉내)
+        """
+        self.k = k
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, inputs: dict) -> list:
+        query = inputs["query"]
+        with self._lock:
+            self.calls += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+        digest = hashlib.sha256(query.encode("utf-8")).hexdigest()[:12]
+        return [
+            {"url": f"https://offline.local/{digest}/{i}", "content": f"{query}에 대한 로컬 검색 결과 {i + 1}"}
+            for i in range(self.k)
+        ]
@@ -0,0 +1,83 @@
+"""채팅 저장소(core.chat_store) 테스트: 다중 프로세스 동시 추가와 답변 생성 임대"""
+import multiprocessing
+import sqlite3
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from core.chat_store import ChatBusyError, ChatStore
+
+def _append_worker(db_path: str, chat_id: str, worker: int, count: int):
+    store = ChatStore(db_path)
+    for i in range(count):
+        store.append_messages(chat_id, [HumanMessage(content=f"{worker}-{i}"), AIMessage(content="ok")])
+
+def test_concurrent_appends_from_processes_keep_seq_unique(tmp_path):
+    db_path = str(tmp_path / "chats.sqlite3")
+    chat_id = ChatStore(db_path).create_chat("web_search")["id"]
+
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_append_worker, args=(db_path, chat_id, w, 15)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+    assert all(worker.exitcode == 0 for worker in workers)
+
+    store = ChatStore(db_path)
+    messages = store.load_messages(chat_id)
+    assert len(messages) == 4 * 15 * 2
+    assert store.get_chat(chat_id)["message_count"] == len(messages)
+    # 한 번에 추가한 사용자·AI 메시지 쌍이 다른 프로세스의 메시지와 섞이지 않음
+    assert all(isinstance(messages[i], HumanMessage) and isinstance(messages[i + 1], AIMessage)
+               for i in range(0, len(messages), 2))
+
+def test_generation_lease_is_exclusive_across_store_instances(tmp_path):
+    db_path = str(tmp_path / "chats.sqlite3")
+    worker_a, worker_b = ChatStore(db_path), ChatStore(db_path)
+    chat_id = worker_a.create_chat("web_search")["id"]
+
+    lease = worker_a.acquire_generation(chat_id)
+    assert lease
+    assert worker_b.acquire_generation(chat_id) is None
+
+    worker_a.append_messages(chat_id, [HumanMessage(content="질문")], lease=lease)
+    worker_a.release_generation(chat_id, lease)
+    assert worker_b.acquire_generation(chat_id)
+    assert "generating_lease" not in worker_a.get_chat(chat_id)
+
+def test_expired_lease_can_be_taken_over(tmp_path):
+    store = ChatStore(str(tmp_path / "chats.sqlite3"))
+    chat_id = store.create_chat("web_search")["id"]
+
+    stale = store.acquire_generation(chat_id, ttl=-1)  # 이미 만료된 임대 (죽은 워커)
+    fresh = store.acquire_generation(chat_id)
+    assert fresh and fresh != stale
+
+    # 임대를 빼앗긴 요청은 메시지를 추가할 수 없고, 반납해도 새 임대에 영향이 없음
+    with pytest.raises(ChatBusyError):
+        store.append_messages(chat_id, [AIMessage(content="늦은 답변")], lease=stale)
+    store.release_generation(chat_id, stale)
+    assert store.acquire_generation(chat_id) is None
+    assert store.load_messages(chat_id) == []
+
+def test_missing_chat_raises_key_error(tmp_path):
+    store = ChatStore(str(tmp_path / "chats.sqlite3"))
+    with pytest.raises(KeyError):
+        store.acquire_generation("missing")
+    with pytest.raises(KeyError):
+        store.append_messages("missing", [HumanMessage(content="질문")])
+
+def test_existing_database_gets_lease_columns(tmp_path):
+    db_path = str(tmp_path / "chats.sqlite3")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE chats (id TEXT PRIMARY KEY, owner TEXT NOT NULL, title TEXT NOT NULL, agent_type TEXT, "
+        "created_at TEXT NOT NULL, created_ts REAL NOT NULL, message_count INTEGER NOT NULL DEFAULT 0, history_state TEXT)"
+    )
+    conn.execute("INSERT INTO chats (id, owner, title, created_at, created_ts) VALUES ('old', 'default', '새 채팅', '', 0)")
+    conn.commit()
+    conn.close()
+
+    store = ChatStore(db_path)
+    assert store.acquire_generation("old")
@@ -0,0 +1,131 @@
+"""영상 다운로드 관리자(core.video_tools.DownloadManager) 테스트 (로컬 대체 다운로더 사용)"""
+import os
+import threading
+import time
+
+import pytest
+
+from core import video_tools
+from core.video_tools import DownloadManager, OfflineDownloader
+
+URL = "https://www.youtube.com/watch?v={}"
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def video_dir(tmp_path, monkeypatch):
+    # 경로 함수(find_video_file, info_path 등)가 테스트 디렉토리를 보도록 교체
+    monkeypatch.setattr(video_tools, "VIDEO_DIR", tmp_path)
+    return tmp_path
+
+
+def make_manager(video_dir, max_bytes=10 * MB, **downloader_kwargs):
+    downloader = OfflineDownloader(size_bytes=MB, **downloader_kwargs)
+    return DownloadManager(video_dir, max_bytes=max_bytes, downloader=downloader), downloader
+
+
+def age(video_dir, video_id, seconds_ago):
+    past = time.time() - seconds_ago
+    os.utime(video_dir / f"{video_id}.mp4", (past, past))
+
+
+def test_download_writes_video_and_info(video_dir):
+    manager, downloader = make_manager(video_dir)
+    path, info = manager.ensure(URL.format("aaaaaaaaaaa"), "aaaaaaaaaaa")
+
+    assert path == video_dir / "aaaaaaaaaaa.mp4"
+    assert path.stat().st_size == MB
+    assert video_tools.load_video_info("aaaaaaaaaaa")["title"] == info["title"]
+    assert not any((video_dir / ".tmp").iterdir())
+
+    manager.ensure(URL.format("aaaaaaaaaaa"), "aaaaaaaaaaa")
+    assert downloader.calls == 1
+    assert manager.stats["reused"] == 1
+
+
+def test_concurrent_requests_share_one_download(video_dir):
+    manager, downloader = make_manager(video_dir, latency=0.2)
+    barrier = threading.Barrier(6)
+    paths = []
+
+    def worker():
+        barrier.wait()
+        paths.append(manager.ensure(URL.format("bbbbbbbbbbb"), "bbbbbbbbbbb")[0])
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert downloader.calls == 1
+    assert len(set(paths)) == 1 and len(paths) == 6
+    assert manager.stats["shared_inflight"] == 5
+
+
+def test_failed_download_is_shared_and_cleaned_up(video_dir):
+    class FailingDownloader(OfflineDownloader):
+        def download(self, *args):
+            super().download(*args)
+            raise RuntimeError("download failed")
+
+    manager = DownloadManager(video_dir, max_bytes=10 * MB, downloader=FailingDownloader(size_bytes=MB, latency=0.1))
+    errors = []
+
+    def worker():
+        try:
+            manager.ensure(URL.format("ccccccccccc"), "ccccccccccc")
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 3
+    assert manager.downloader.calls == 1
+    assert video_tools.find_video_file("ccccccccccc") is None
+    assert not any((video_dir / ".tmp").iterdir())
+
+
+def test_lru_eviction_removes_least_recently_used_video_and_its_info(video_dir):
+    manager, downloader = make_manager(video_dir, max_bytes=int(2.5 * MB))
+    for video_id in ("old00000000", "used0000000"):
+        manager.ensure(URL.format(video_id), video_id)
+    age(video_dir, "old00000000", 200)
+    age(video_dir, "used0000000", 100)
+    manager.ensure(URL.format("used0000000"), "used0000000")  # 다시 사용하면 최근 사용으로 갱신
+
+    manager.ensure(URL.format("new00000000"), "new00000000")
+
+    assert video_tools.find_video_file("old00000000") is None
+    assert not video_tools.info_path("old00000000").exists()
+    assert video_tools.find_video_file("used0000000") is not None
+    assert video_tools.find_video_file("new00000000") is not None
+    assert manager.stats["evictions"] == 1
+
+
+def test_eviction_keeps_info_needed_by_cached_transcript(video_dir):
+    manager, _ = make_manager(video_dir, max_bytes=int(1.5 * MB))
+    manager.ensure(URL.format("subtitled00"), "subtitled00")
+    video_tools.transcript_path("subtitled00").write_text('{"cues": []}', encoding="utf-8")
+    age(video_dir, "subtitled00", 100)
+
+    manager.ensure(URL.format("other000000"), "other000000")
+
+    assert video_tools.find_video_file("subtitled00") is None
+    assert video_tools.info_path("subtitled00").exists()
+
+
+def test_pinned_video_is_not_evicted_while_in_use(video_dir):
+    manager, _ = make_manager(video_dir, max_bytes=int(1.5 * MB))
+    with manager.pinned(URL.format("pinned00000"), "pinned00000") as (path, _):
+        age(video_dir, "pinned00000", 100)
+        manager.ensure(URL.format("other000000"), "other000000")
+        assert path.exists()
+
+    # 사용이 끝나면 다시 정리 대상
+    manager.ensure(URL.format("third000000"), "third000000")
+    assert not path.exists()
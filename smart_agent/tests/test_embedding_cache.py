@@ -0,0 +1,61 @@
+"""임베딩 캐시(core.embedding_cache) 테스트"""
+import urllib.error
+
+import pytest
+
+from core import embedding_cache
+from core.embedding_cache import CachedEmbeddings
+from core.gemini_governor import GeminiGovernor
+
+
+class CountingEmbeddings:
+    """호출 횟수를 세는 로컬 임베딩 (fail_first번은 429로 실패)"""
+
+    model = "counting"
+
+    def __init__(self, fail_first: int = 0):
+        self.fail_first = fail_first
+        self.calls = 0
+
+    def _maybe_fail(self):
+        self.calls += 1
+        if self.calls <= self.fail_first:
+            raise urllib.error.HTTPError("http://fake", 429, "quota", {}, None)
+
+    def embed_documents(self, texts):
+        self._maybe_fail()
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        self._maybe_fail()
+        return [float(len(text)), 2.0]
+
+
+@pytest.fixture
+def governor(monkeypatch):
+    governor = GeminiGovernor(requests_per_minute=100_000, tokens_per_minute=10_000_000, base_delay=0.01, max_delay=0.02)
+    monkeypatch.setattr(embedding_cache, "embedding_governor", governor)
+    return governor
+
+
+def test_only_cache_misses_go_through_the_governor(tmp_path, governor):
+    remote = CountingEmbeddings()
+    cached = CachedEmbeddings(remote, db_path=str(tmp_path / "emb.sqlite3"), batch_size=2)
+
+    first = cached.embed_documents(["a", "bb", "a", "ccc"])
+    assert first == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0], [3.0, 1.0]]
+    assert remote.calls == 2 and governor.stats()["calls"] == 2  # 중복 제외 3개를 2개씩
+
+    assert cached.embed_documents(["ccc", "a"]) == [[3.0, 1.0], [1.0, 1.0]]
+    cached.embed_query("질문")
+    cached.embed_query("질문")
+    assert remote.calls == 3 and governor.stats()["calls"] == 3
+    assert cached.stats == {"hits": 3, "misses": 4, "remote_calls": 3}
+
+
+def test_rate_limited_embedding_is_retried(tmp_path, governor):
+    remote = CountingEmbeddings(fail_first=2)
+    cached = CachedEmbeddings(remote, db_path=str(tmp_path / "emb.sqlite3"))
+
+    assert cached.embed_query("질문") == [2.0, 2.0]
+    assert governor.stats()["retries"] == 2
@@ -0,0 +1,112 @@
+"""메모리 맵 평면 인덱스(core.flat_index) 테스트"""
+import json
+
+import numpy as np
+
+from core.flat_index import _HEADER_SIZE, FlatVectorStore, _read_header
+
+
+class KeywordEmbeddings:
+    """단어마다 고정된 축을 갖는 로컬 임베딩"""
+
+    axes = {"quantum": 0, "physics": 0, "zebra": 1, "stripes": 1, "cats": 2, "dogs": 3}
+
+    def _embed(self, text):
+        vector = np.full(4, 0.01)
+        for word in text.lower().split():
+            if word in self.axes:
+                vector[self.axes[word]] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def interrupted_append(store, doc_id, text):
+    """벡터와 메타데이터 줄은 썼지만 헤더를 갱신하기 전에 중단된 추가를 흉내 냅니다."""
+    rows, dim = _read_header(store._vectors_path)
+    with open(store._vectors_path, "r+b") as f:
+        f.seek(_HEADER_SIZE + rows * dim * 4)
+        f.write(np.asarray([KeywordEmbeddings().embed_query(text)], dtype="<f4").tobytes())
+    with open(store._metadata_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"row": rows, "id": doc_id, "text": text, "metadata": {}}) + "\n")
+
+
+def test_interrupted_append_is_invisible_and_overwritten(tmp_path):
+    store = FlatVectorStore(str(tmp_path), KeywordEmbeddings())
+    store.add_texts(["cats", "dogs"], ids=["a", "b"])
+    interrupted_append(store, "z", "zebra stripes")
+
+    reopened = FlatVectorStore(str(tmp_path), KeywordEmbeddings())
+    assert reopened.count() == 2
+    assert reopened.get_by_ids(["z"]) == []
+
+    reopened.add_texts(["quantum physics"], ids=["q"])
+    for reader in (store, FlatVectorStore(str(tmp_path), KeywordEmbeddings())):
+        top = reader.similarity_search("quantum physics", k=1)[0]
+        assert (top.id, top.page_content) == ("q", "quantum physics")
+        assert sorted(doc.id for doc in reader.get_documents()) == ["a", "b", "q"]
+
+
+def test_upsert_delete_and_compact_are_seen_by_other_readers(tmp_path):
+    writer = FlatVectorStore(str(tmp_path), KeywordEmbeddings())
+    reader = FlatVectorStore(str(tmp_path), KeywordEmbeddings())
+    writer.add_texts(["cats", "dogs"], ids=["a", "b"])
+    writer.add_texts(["cats"], ids=["a"], metadatas=[{"version": 2}])
+    writer.delete(["b"])
+
+    assert reader.count() == 1
+    assert reader.similarity_search("cats", k=1)[0].metadata == {"version": 2}
+
+    assert writer.compact() == 2
+    assert reader.count() == 1
+    assert reader.similarity_search("cats", k=1)[0].id == "a"
+
+
+def test_torn_final_line_is_truncated_before_next_append(tmp_path):
+    store = FlatVectorStore(str(tmp_path), KeywordEmbeddings())
+    store.add_texts(["cats", "dogs"], ids=["a", "b"])
+    # 메타데이터 줄을 쓰다가 줄바꿈 전에 중단됨
+    with open(store._metadata_path, "a", encoding="utf-8") as f:
+        f.write('{"row": 2, "id": "z", "text": "zeb')
+
+    reopened = FlatVectorStore(str(tmp_path), KeywordEmbeddings())
+    assert reopened.count() == 2
+    reopened.add_texts(["quantum physics"], ids=["q"])
+
+    for reader in (store, reopened, FlatVectorStore(str(tmp_path), KeywordEmbeddings())):
+        assert reader.similarity_search("quantum physics", k=1)[0].id == "q"
+        assert sorted(doc.id for doc in reader.get_documents()) == ["a", "b", "q"]
+
+
+def test_unparseable_line_is_skipped(tmp_path):
+    store = FlatVectorStore(str(tmp_path), KeywordEmbeddings())
+    store.add_texts(["cats"], ids=["a"])
+    with open(store._metadata_path, "a", encoding="utf-8") as f:
+        f.write("{not json}\n")
+    store.add_texts(["dogs"], ids=["b"])
+
+    reader = FlatVectorStore(str(tmp_path), KeywordEmbeddings())
+    assert reader.similarity_search("dogs", k=1)[0].id == "b"
+    assert reader.count() == 2
+
+
+def test_records_are_read_lazily_by_offset(tmp_path):
+    writer = FlatVectorStore(str(tmp_path), KeywordEmbeddings())
+    odd_id = 'doc "1" \\ 한글'
+    writer.add_texts(["zebra stripes 줄무늬", "cats"], ids=[odd_id, "c"], metadatas=[{"lang": "ko"}, {}])
+
+    reader = FlatVectorStore(str(tmp_path), KeywordEmbeddings())
+    assert not hasattr(reader, "_records")
+    top = reader.similarity_search("zebra", k=1)[0]
+    assert (top.id, top.page_content, top.metadata) == (odd_id, "zebra stripes 줄무늬", {"lang": "ko"})
+
+    # 다른 프로세스가 파일을 교체해도 이미 구한 스냅숏의 행은 이전 파일에서 읽음
+    _, snapshot, results = reader._top_k(np.asarray([KeywordEmbeddings().embed_query("cats")], dtype=np.float32), 1)
+    writer.delete([odd_id])
+    writer.compact()
+    assert snapshot.document(results[0][0][0]).id == "c"
+    assert [doc.id for doc in reader.get_documents()] == ["c"]
@@ -0,0 +1,205 @@
+"""Gemini 호출 관문(core.gemini_governor) 테스트 (로컬 가짜 엔드포인트 사용)"""
+import asyncio
+import threading
+import time
+import urllib.error
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from core import gemini_governor
+from core.gemini_governor import GeminiGovernor, TokenBucket, govern_chat_model, is_retryable
+from core.llm_cache import LLMResponseCache
+from fake_gemini import FakeGeminiEndpoint
+
+
+def make_governor(**kwargs):
+    options = dict(
+        requests_per_minute=100_000,
+        tokens_per_minute=10_000_000,
+        max_concurrency=4,
+        max_retries=4,
+        base_delay=0.01,
+        max_delay=0.05,
+    )
+    options.update(kwargs)
+    return GeminiGovernor(**options)
+
+
+def http_error(status: int) -> urllib.error.HTTPError:
+    return urllib.error.HTTPError("http://fake", status, "error", {}, None)
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (http_error(429), True),
+        (http_error(503), True),
+        (http_error(400), False),
+        (http_error(404), False),
+        (TimeoutError(), True),
+        (ConnectionResetError(), True),
+        (Exception("429 RESOURCE_EXHAUSTED: quota exceeded"), True),
+        (Exception("503 UNAVAILABLE"), True),
+        (ValueError("model returned 500 tokens"), False),
+        (ValueError("quota of 3 items per page"), False),
+        (ValueError("rate limit must be positive"), False),
+    ],
+)
+def test_is_retryable(error, expected):
+    assert is_retryable(error) is expected
+
+
+def test_is_retryable_follows_wrapped_cause():
+    try:
+        try:
+            raise http_error(429)
+        except urllib.error.HTTPError as e:
+            raise RuntimeError("Error calling model") from e
+    except RuntimeError as wrapped:
+        assert is_retryable(wrapped)
+
+
+def test_retries_rate_limited_calls_until_success():
+    governor = make_governor()
+    with FakeGeminiEndpoint(fail_first=2, fail_status=429) as endpoint:
+        result = governor.call(endpoint.generate, "안녕하세요")
+
+    assert result["text"] == "ok"
+    assert endpoint.requests == 3
+    stats = governor.stats()
+    assert stats["retries"] == 2 and stats["succeeded"] == 1 and stats["failed"] == 0
+
+
+def test_does_not_retry_client_errors():
+    governor = make_governor()
+    with FakeGeminiEndpoint(fail_first=1, fail_status=400) as endpoint:
+        with pytest.raises(urllib.error.HTTPError):
+            governor.call(endpoint.generate, "안녕하세요")
+
+    assert endpoint.requests == 1
+    assert governor.stats()["retries"] == 0
+
+
+def test_gives_up_after_max_retries():
+    governor = make_governor(max_retries=2)
+    with FakeGeminiEndpoint(fail_first=10, fail_status=503) as endpoint:
+        with pytest.raises(urllib.error.HTTPError):
+            governor.call(endpoint.generate, "안녕하세요")
+
+    assert endpoint.requests == 3
+    assert governor.stats()["failed"] == 1
+
+
+def test_backoff_respects_server_retry_hint():
+    governor = make_governor(max_delay=30)
+    assert governor._backoff(0, Exception("429 RESOURCE_EXHAUSTED. Please retry in 12.5s")) >= 12.5
+
+
+def test_concurrency_cap_is_shared_by_sync_and_async_callers():
+    governor = make_governor(max_concurrency=2)
+    with FakeGeminiEndpoint(latency=0.1) as endpoint:
+        threads = [threading.Thread(target=governor.call, args=(endpoint.generate, "sync")) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+
+        async def async_calls():
+            await asyncio.gather(*[
+                governor.acall(asyncio.to_thread, endpoint.generate, "async", tokens=1) for _ in range(4)
+            ])
+
+        asyncio.run(async_calls())
+        for thread in threads:
+            thread.join()
+
+    assert endpoint.requests == 8
+    assert endpoint.max_active == 2
+    stats = governor.stats()
+    assert stats["in_flight"] == 0 and stats["queued"] == 0 and stats["max_queued"] >= 1
+
+
+def test_token_bucket_reserve_returns_wait_time():
+    bucket = TokenBucket(rate_per_minute=600)  # 초당 10, 최대 600
+    assert bucket.reserve(600) == 0.0
+    assert bucket.reserve(5) == pytest.approx(0.5, abs=0.05)
+
+
+def test_token_budget_delays_calls():
+    # 분당 6000 토큰 = 초당 100 토큰
+    governor = make_governor(tokens_per_minute=6000)
+    with FakeGeminiEndpoint(total_tokens=0) as endpoint:
+        governor.call(endpoint.generate, "첫 호출", tokens=6000)
+        started = time.monotonic()
+        governor.call(endpoint.generate, "두 번째 호출", tokens=50)
+        waited = time.monotonic() - started
+
+    assert waited >= 0.4
+    assert governor.stats()["wait_seconds"] >= 0.4
+
+
+def test_request_rate_limit_delays_calls():
+    governor = make_governor(requests_per_minute=600)  # 초당 10건, 최대 600건
+    governor.requests.reserve(600)
+    with FakeGeminiEndpoint() as endpoint:
+        started = time.monotonic()
+        governor.call(endpoint.generate, "호출")
+        assert time.monotonic() - started >= 0.08
+
+
+class UsageChatModel(BaseChatModel):
+    """호출 횟수를 세고 사용 토큰 1000개를 보고하는 로컬 채팅 모델 (_stream은 구현하지 않음)"""
+
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "usage-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        usage = {"input_tokens": 900, "output_tokens": 100, "total_tokens": 1000}
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="답변", usage_metadata=usage))])
+
+
+@pytest.fixture
+def isolated_governor(monkeypatch):
+    governor = make_governor(tokens_per_minute=6000)
+    monkeypatch.setattr(gemini_governor, "governor", governor)
+    return governor
+
+
+def test_cache_hits_do_not_use_the_governor(tmp_path, isolated_governor):
+    cache = LLMResponseCache(db_path=str(tmp_path / "llm.sqlite3"))
+    model = govern_chat_model(UsageChatModel(cache=cache))
+    for _ in range(5):
+        assert model.invoke("같은 질문").content == "답변"
+
+    assert model.calls == 1
+    assert isolated_governor.stats()["calls"] == 1
+    # 실제 호출 한 번의 사용량(1000)만 토큰 버킷에서 차감됨
+    assert isolated_governor.tokens._tokens == pytest.approx(5000, abs=50)
+
+
+def test_governed_model_keeps_class_identity_and_streaming_support(isolated_governor):
+    plain = UsageChatModel()
+    llm_string = plain._get_llm_string()
+    model = govern_chat_model(plain)
+
+    assert model is plain and type(model).__name__ == "UsageChatModel"
+    assert model._get_llm_string() == llm_string  # 응답 캐시 키가 바뀌지 않음
+    assert type(model)._stream is BaseChatModel._stream  # 구현하지 않은 스트리밍을 지원한다고 보지 않음
+
+    asyncio.run(model.ainvoke("질문"))  # 기본 _agenerate → _generate, 한 번만 예약
+    assert isolated_governor.stats()["calls"] == 1
+
+
+def test_streaming_model_holds_one_slot_per_call(isolated_governor):
+    model = govern_chat_model(GenericFakeChatModel(messages=iter(["하나 둘 셋"])))
+    chunks = list(model.stream("질문"))
+
+    assert "".join(chunk.content for chunk in chunks) == "하나 둘 셋"
+    stats = isolated_governor.stats()
+    assert stats["calls"] == 1 and stats["succeeded"] == 1 and stats["in_flight"] == 0
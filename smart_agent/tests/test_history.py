@@ -0,0 +1,107 @@
+"""대화 윈도우(core.history.ConversationWindow) 테스트 (로컬 요약 함수 사용)"""
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from core.history import SUMMARY_PREFIX, ConversationWindow, count_messages_tokens
+
+
+class RecordingSummarizer:
+    """접힌 메시지를 기록하고, 정해진 길이의 요약을 돌려주는 요약 함수"""
+
+    def __init__(self, summary_words: int = 3):
+        self.summary_words = summary_words
+        self.calls = []
+
+    def __call__(self, previous_summary, messages):
+        self.calls.append((previous_summary, [m.content for m in messages]))
+        return " ".join(f"요약{len(self.calls)}" for _ in range(self.summary_words))
+
+
+def conversation(turns: int, words: int = 5):
+    messages = []
+    for i in range(turns):
+        messages.append(HumanMessage(content=f"질문{i} " + "단어 " * words))
+        messages.append(AIMessage(content=f"답변{i} " + "단어 " * words))
+    return messages
+
+
+def test_old_turns_are_folded_into_the_summary():
+    summarizer = RecordingSummarizer()
+    window = ConversationWindow(max_tokens=10_000, keep_turns=2, summarizer=summarizer)
+    messages = conversation(4)
+
+    prepared, state = window.prepare(messages)
+
+    assert state == {"summary": "요약1 요약1 요약1", "summarized_count": 4}
+    assert isinstance(prepared[0], SystemMessage) and prepared[0].content.startswith(SUMMARY_PREFIX)
+    assert prepared[1:] == messages[4:]
+    assert summarizer.calls[0][1] == [m.content for m in messages[:4]]
+
+    # 다음 호출에서는 새로 접히는 턴만 기존 요약과 함께 요약함
+    messages += conversation(1)
+    prepared, state = window.prepare(messages, state)
+    assert summarizer.calls[1] == ("요약1 요약1 요약1", [m.content for m in messages[4:6]])
+    assert state["summarized_count"] == 6
+
+
+def test_last_turn_is_kept_even_over_budget():
+    summarizer = RecordingSummarizer()
+    window = ConversationWindow(max_tokens=10, keep_turns=6, summarizer=summarizer)
+    messages = conversation(2, words=50)
+    messages.insert(3, ToolMessage(content="도구 결과", tool_call_id="call-1"))
+
+    prepared, state = window.prepare(messages)
+
+    assert prepared[-3:] == messages[2:]
+    assert state["summarized_count"] == 2
+
+
+def test_window_is_rechecked_after_the_summary_grows():
+    summarizer = RecordingSummarizer(summary_words=40)
+    messages = conversation(4)
+    turn_tokens = count_messages_tokens(messages[:2])
+    window = ConversationWindow(max_tokens=turn_tokens * 3 + 20, keep_turns=6, summarizer=summarizer)
+
+    prepared, state = window.prepare(messages)
+
+    # 처음에는 빈 요약 기준으로 1턴만 접지만, 길어진 요약 때문에 예산을 넘으므로 턴을 더 접음
+    assert count_messages_tokens(prepared) <= window.max_tokens
+    assert state["summarized_count"] > 2
+    assert len(summarizer.calls) > 1
+
+
+def test_summary_is_truncated_when_only_the_last_turn_fits():
+    messages = conversation(2)
+    budget = count_messages_tokens(messages[2:]) + 20
+    window = ConversationWindow(max_tokens=budget, keep_turns=6, summarizer=RecordingSummarizer(summary_words=200))
+
+    prepared, state = window.prepare(messages)
+
+    assert count_messages_tokens(prepared) <= budget
+    assert prepared[1:] == messages[2:]
+    # 상태에는 잘리지 않은 요약을 저장해 다음 요약에 사용
+    assert len(state["summary"].split()) == 200
+
+
+def test_state_is_reset_when_messages_were_removed():
+    summarizer = RecordingSummarizer()
+    window = ConversationWindow(max_tokens=10_000, keep_turns=1, summarizer=summarizer)
+    _, state = window.prepare(conversation(4))
+    assert state["summarized_count"] == 6
+
+    messages = conversation(2)
+    prepared, state = window.prepare(messages, state)
+
+    assert summarizer.calls[-1] == ("", [m.content for m in messages[:2]])
+    assert state["summarized_count"] == 2
+    assert prepared[1:] == messages[2:]
+
+
+def test_failed_summarizer_falls_back_to_excerpts():
+    def failing(previous_summary, messages):
+        raise RuntimeError("quota exceeded")
+
+    window = ConversationWindow(max_tokens=10_000, keep_turns=1, summarizer=failing)
+    prepared, state = window.prepare(conversation(2))
+
+    assert state["summary"].startswith("- 사용자: 질문0")
+    assert len(prepared) == 3
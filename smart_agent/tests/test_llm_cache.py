@@ -0,0 +1,109 @@
+"""LLM 응답 캐시(core.llm_cache) 테스트 (로컬 가짜 채팅 모델 사용)"""
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration
+
+from core.llm_cache import LLMResponseCache
+
+TOOL_CALL_REPLY = AIMessage(
+    content="",
+    tool_calls=[{"name": "search_web", "args": {"query": "삼성전자 주가"}, "id": "call-1", "type": "tool_call"}],
+)
+
+
+def fake_model(cache, *responses):
+    return FakeMessagesListChatModel(responses=list(responses) or [AIMessage(content="답변")], cache=cache)
+
+
+def test_database_is_opened_lazily(tmp_path):
+    db_path = tmp_path / "cache" / "llm.sqlite3"
+    cache = LLMResponseCache(db_path=str(db_path))
+    assert not db_path.parent.exists()
+
+    cache.lookup("prompt", "llm")
+    assert db_path.exists()
+
+
+def test_repeated_request_is_served_from_cache(tmp_path):
+    cache = LLMResponseCache(db_path=str(tmp_path / "llm.sqlite3"))
+    model = fake_model(cache, AIMessage(content="첫 답변"), AIMessage(content="두 번째 답변"))
+
+    first = model.invoke([HumanMessage(content="안녕")])
+    second = model.invoke([HumanMessage(content="안녕")])
+    other = model.invoke([HumanMessage(content="다른 질문")])
+
+    assert first.content == second.content == "첫 답변"
+    assert other.content == "두 번째 답변"
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1 and stats["misses"] == 2
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    db_path = str(tmp_path / "llm.sqlite3")
+    fake_model(LLMResponseCache(db_path=db_path)).invoke("안녕")
+
+    cache = LLMResponseCache(db_path=db_path)
+    reply = fake_model(cache, AIMessage(content="원격 호출 결과")).invoke("안녕")
+
+    assert reply.content == "답변"
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_namespaces_sharing_a_file_are_separate(tmp_path):
+    db_path = str(tmp_path / "llm.sqlite3")
+    fake_model(LLMResponseCache(db_path=db_path, namespace="general_chat")).invoke("안녕")
+
+    cache = LLMResponseCache(db_path=db_path, namespace="code_generator")
+    assert fake_model(cache, AIMessage(content="코드 답변")).invoke("안녕").content == "코드 답변"
+
+
+def test_expired_entries_are_fetched_again(tmp_path):
+    cache = LLMResponseCache(db_path=str(tmp_path / "llm.sqlite3"), ttl_seconds=0.05)
+    model = fake_model(cache, AIMessage(content="첫 답변"), AIMessage(content="새 답변"))
+    model.invoke("안녕")
+    time.sleep(0.1)
+
+    assert model.invoke("안녕").content == "새 답변"
+    assert cache.stats()["expired"] >= 1
+
+
+def test_expired_disk_entries_are_not_used(tmp_path):
+    db_path = str(tmp_path / "llm.sqlite3")
+    LLMResponseCache(db_path=db_path, ttl_seconds=0.05).update(
+        "prompt", "llm", [ChatGeneration(message=AIMessage(content="답변"))]
+    )
+    cache = LLMResponseCache(db_path=db_path)
+    assert cache.lookup("prompt", "llm") is not None
+
+    time.sleep(0.1)
+    reopened = LLMResponseCache(db_path=db_path)
+    assert reopened.lookup("prompt", "llm") is None
+    assert reopened.stats()["expired"] == 1
+
+
+def test_tool_calls_survive_the_round_trip(tmp_path):
+    db_path = str(tmp_path / "llm.sqlite3")
+    cache = LLMResponseCache(db_path=db_path)
+    cache.update("prompt", "llm", [ChatGeneration(message=TOOL_CALL_REPLY)])
+
+    for source in (cache, LLMResponseCache(db_path=db_path)):  # 메모리 계층, 디스크 계층
+        (generation,) = source.lookup("prompt", "llm")
+        assert isinstance(generation.message, AIMessage)
+        assert generation.message.tool_calls == TOOL_CALL_REPLY.tool_calls
+
+    # 반환된 객체를 수정해도 캐시된 응답은 바뀌지 않음
+    cache.lookup("prompt", "llm")[0].message.tool_calls.clear()
+    assert cache.lookup("prompt", "llm")[0].message.tool_calls == TOOL_CALL_REPLY.tool_calls
+
+
+def test_tool_call_reply_from_model_is_replayed_from_cache(tmp_path):
+    cache = LLMResponseCache(db_path=str(tmp_path / "llm.sqlite3"))
+    model = fake_model(cache, TOOL_CALL_REPLY, AIMessage(content="캐시를 쓰지 않으면 이 답변"))
+
+    first = model.invoke("삼성전자 주가 알려줘")
+    second = model.invoke("삼성전자 주가 알려줘")
+
+    assert first.tool_calls == second.tool_calls == TOOL_CALL_REPLY.tool_calls
+    assert cache.stats()["memory_hits"] == 1
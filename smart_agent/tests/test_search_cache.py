@@ -0,0 +1,161 @@
+"""검색 결과 캐시(core.search_cache)와 search_web 도구 테스트 (로컬 대체 검색 클라이언트 사용)"""
+import threading
+import time
+
+import pytest
+
+from core import tools
+from core.search_cache import SearchCache
+from core.tools import search_web
+from offline_search import OfflineSearchClient
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SearchCache(db_path=str(tmp_path / "search.sqlite3"), max_memory_entries=2, ttl_seconds=60)
+
+
+def fetcher(client, query):
+    return lambda: client.invoke({"query": query})
+
+
+def test_database_is_opened_lazily(tmp_path):
+    db_path = tmp_path / "cache" / "search.sqlite3"
+    cache = SearchCache(db_path=str(db_path))
+    assert not db_path.parent.exists()
+
+    cache.get_or_fetch("query", fetcher(OfflineSearchClient(), "query"))
+    assert db_path.exists()
+
+
+def test_repeated_query_is_served_from_memory(cache):
+    client = OfflineSearchClient()
+    first = cache.get_or_fetch("  Python   Asyncio ", fetcher(client, "python asyncio"), k=3)
+    second = cache.get_or_fetch("python asyncio", fetcher(client, "python asyncio"), k=3)
+
+    assert first == second
+    assert client.calls == 1
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_search_params_are_part_of_the_key(cache):
+    client = OfflineSearchClient()
+    cache.get_or_fetch("query", fetcher(client, "query"), k=3)
+    cache.get_or_fetch("query", fetcher(client, "query"), k=5)
+    assert client.calls == 2
+
+
+def test_memory_tier_evicts_least_recently_used(cache):
+    client = OfflineSearchClient()
+    for query in ("a", "b"):
+        cache.get_or_fetch(query, fetcher(client, query))
+    cache.get_or_fetch("a", fetcher(client, "a"))  # a를 최근 사용으로
+    cache.get_or_fetch("c", fetcher(client, "c"))  # 가장 오래 사용하지 않은 b가 메모리에서 제거됨
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["memory_entries"] == 2
+
+    # 메모리에서 빠진 항목은 디스크 계층에서 다시 가져옴 (원격 검색 없음)
+    cache.get_or_fetch("b", fetcher(client, "b"))
+    assert cache.stats()["disk_hits"] == 1
+    assert client.calls == 3
+
+
+def test_expired_entries_are_fetched_again(tmp_path):
+    cache = SearchCache(db_path=str(tmp_path / "search.sqlite3"), ttl_seconds=0.05)
+    client = OfflineSearchClient()
+    cache.get_or_fetch("query", fetcher(client, "query"))
+    time.sleep(0.1)
+    cache.get_or_fetch("query", fetcher(client, "query"))
+
+    assert client.calls == 2
+    assert cache.stats()["expired"] >= 1
+
+
+def test_empty_results_are_not_cached(cache):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return []
+
+    cache.get_or_fetch("nothing", fetch)
+    cache.get_or_fetch("nothing", fetch)
+    assert len(calls) == 2
+
+
+def test_concurrent_identical_queries_share_one_fetch(cache):
+    client = OfflineSearchClient(latency=0.2)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(cache.get_or_fetch("same query", fetcher(client, "same query")))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.calls == 1
+    assert len(results) == 8 and all(result == results[0] for result in results)
+    assert cache.stats()["shared_inflight"] == 7
+
+
+def test_result_stored_after_the_first_lookup_is_not_fetched_again(cache, monkeypatch):
+    client = OfflineSearchClient()
+    cache.get_or_fetch("query", fetcher(client, "query"))
+    # 잠금 밖의 첫 조회와 진행 중 검색 확인 사이에 다른 요청이 검색을 끝내고 저장한 상황
+    monkeypatch.setattr(cache, "_lookup", lambda key: None)
+
+    assert cache.get_or_fetch("query", fetcher(client, "query"))
+    assert client.calls == 1
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_inflight_error_is_shared_and_not_cached(cache):
+    started = threading.Event()
+    calls = []
+
+    def failing_fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("search failed")
+
+    errors = []
+
+    def follower():
+        started.wait()
+        try:
+            cache.get_or_fetch("query", failing_fetch)
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=follower)
+    thread.start()
+    with pytest.raises(RuntimeError):
+        cache.get_or_fetch("query", failing_fetch)
+    thread.join()
+
+    assert len(calls) == 1 and len(errors) == 1
+    client = OfflineSearchClient()
+    assert cache.get_or_fetch("query", fetcher(client, "query"))
+    assert client.calls == 1
+
+
+def test_search_web_uses_pluggable_client(cache, monkeypatch):
+    client = OfflineSearchClient()
+    monkeypatch.setattr(tools, "search_cache", cache)
+    monkeypatch.setattr(tools, "_search_client", tools._search_client)
+    tools.set_search_client(client)
+
+    first = search_web.invoke({"query": "langgraph"})
+    second = search_web.invoke({"query": "LangGraph"})
+
+    assert first == second
+    assert "https://offline.local/" in first
+    assert client.calls == 1
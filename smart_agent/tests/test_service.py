@@ -0,0 +1,133 @@
+"""HTTP 서비스(service) 테스트: 같은 스레드에 대한 동시 메시지 거절"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+import service
+from core.agent_factory import AgentFactory
+from core.chat_store import ChatStore
+from core.streaming import AGENT_NODE
+
+class BlockingApp:
+    """release가 설정될 때까지 답변을 미루는 가짜 그래프"""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def ainvoke(self, inputs, config=None):
+        self.started.set()
+        await self.release.wait()
+        return {"messages": inputs["messages"] + [AIMessage(content="답변")]}
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ChatStore(str(tmp_path / "chats.sqlite3"))
+    monkeypatch.setattr(service, "get_chat_store", lambda: store)
+    return store
+
+def test_second_message_while_generating_returns_409(store, monkeypatch):
+    app = BlockingApp()
+    monkeypatch.setattr(AgentFactory, "create_agent", staticmethod(lambda agent_type: SimpleNamespace(app=app)))
+    chat_id = store.create_chat("persona_chatbot")["id"]
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=service.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.post(f"/threads/{chat_id}/messages", json={"content": "첫 질문"}))
+            await asyncio.wait_for(app.started.wait(), 10)
+
+            second = await client.post(f"/threads/{chat_id}/messages", json={"content": "두 번째 질문"})
+            # 다른 워커 프로세스도 같은 DB의 임대를 보므로 잡을 수 없음
+            other_worker = ChatStore(store.db_path).acquire_generation(chat_id)
+
+            app.release.set()
+            first = await first
+            third = await client.post(f"/threads/{chat_id}/messages", json={"content": "세 번째 질문"})
+            return first, second, other_worker, third
+
+    first, second, other_worker, third = asyncio.run(scenario())
+    assert second.status_code == 409
+    assert other_worker is None
+    assert first.status_code == 200 and first.json()["message"]["content"] == "답변"
+    assert third.status_code == 200
+    assert [m.content for m in store.load_messages(chat_id)] == ["첫 질문", "답변", "세 번째 질문", "답변"]
+
+def test_lease_is_released_when_agent_fails(store, monkeypatch):
+    class FailingApp:
+        async def ainvoke(self, inputs, config=None):
+            raise RuntimeError("model error")
+
+    monkeypatch.setattr(AgentFactory, "create_agent", staticmethod(lambda agent_type: SimpleNamespace(app=FailingApp())))
+    chat_id = store.create_chat("persona_chatbot")["id"]
+
+    async def post():
+        transport = httpx.ASGITransport(app=service.app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(f"/threads/{chat_id}/messages", json={"content": "질문"})
+
+    assert asyncio.run(post()).status_code == 500
+    assert store.acquire_generation(chat_id)
+
+class HangingStreamApp:
+    """토큰 하나를 보낸 뒤 끝나지 않는 가짜 스트리밍 그래프"""
+
+    async def astream(self, inputs, config=None, stream_mode=None):
+        yield "messages", (AIMessageChunk(content="생각 중"), {"langgraph_node": AGENT_NODE})
+        await asyncio.Event().wait()
+
+async def _abort_stream_after_first_token(chat_id: str):
+    """SSE 요청을 보내고 첫 토큰을 받은 뒤 클라이언트 연결을 끊습니다. (uvicorn과 같은 ASGI spec 2.3)"""
+    first_token = asyncio.Event()
+    body = json.dumps({"content": "질문", "stream": True}).encode("utf-8")
+    requests = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        await first_token.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and b"event: token" in message.get("body", b""):
+            first_token.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": f"/threads/{chat_id}/messages",
+        "raw_path": f"/threads/{chat_id}/messages".encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "server": ("test", 80),
+        "client": ("client", 1234),
+    }
+    await asyncio.wait_for(service.app(scope, receive, send), 10)
+    assert first_token.is_set()
+
+def test_lease_is_released_when_stream_client_disconnects(store, monkeypatch):
+    agent = SimpleNamespace(app=HangingStreamApp())
+    monkeypatch.setattr(AgentFactory, "create_agent", staticmethod(lambda agent_type: agent))
+    chat_id = store.create_chat("persona_chatbot")["id"]
+
+    asyncio.run(_abort_stream_after_first_token(chat_id))
+
+    agent.app = BlockingApp()
+    agent.app.release.set()
+
+    async def post_again():
+        transport = httpx.ASGITransport(app=service.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(f"/threads/{chat_id}/messages", json={"content": "다시 질문"})
+
+    response = asyncio.run(post_again())
+    assert response.status_code == 200
+    assert [m.content for m in store.load_messages(chat_id)] == ["질문", "다시 질문", "답변"]
@@ -0,0 +1,93 @@
+"""실행 추적(core.tracing) 테스트"""
+import json
+import threading
+import time
+
+from core.tracing import Tracer, _tail_lines, load_turns, span
+
+
+def write_turns(path, names):
+    with open(path, "a", encoding="utf-8") as f:
+        for name in names:
+            f.write(json.dumps({"name": name, "duration_ms": 1.0, "spans": []}) + "\n")
+
+
+def test_turn_is_written_by_the_background_writer(tmp_path):
+    path = tmp_path / "traces" / "traces.jsonl"
+    tracer = Tracer(sink_path=str(path))
+    with tracer.trace_turn("general_chat", {"chat_id": "c1"}):
+        with span("tavily.search", query_chars=5):
+            pass
+
+    assert tracer.flush()
+    (turn,) = load_turns(str(path))
+    assert turn["metadata"] == {"chat_id": "c1"}
+    assert [s["name"] for s in turn["spans"]] == ["tavily.search"]
+    assert tracer.histograms()[0]["count"] == 1
+
+
+def test_slow_disk_does_not_block_the_turn(tmp_path):
+    tracer = Tracer(sink_path=str(tmp_path / "traces.jsonl"))
+    release = threading.Event()
+    write = tracer._writer._write
+    tracer._writer._write = lambda text: (release.wait(timeout=5), write(text))
+
+    started = time.perf_counter()
+    for _ in range(3):
+        with tracer.trace_turn("general_chat"):
+            pass
+    assert time.perf_counter() - started < 1.0
+    assert not tracer.flush(timeout=0.05)
+
+    release.set()
+    assert tracer.flush()
+    assert len(load_turns(tracer.sink_path)) == 3
+
+
+def test_full_queue_drops_new_records(tmp_path):
+    tracer = Tracer(sink_path=str(tmp_path / "traces.jsonl"))
+    release = threading.Event()
+    tracer._writer._write = lambda text: release.wait(timeout=5)
+    tracer._writer._queue.maxsize = 2
+
+    for _ in range(10):
+        with tracer.trace_turn("general_chat"):
+            pass
+    release.set()
+    tracer.flush()
+
+    assert tracer._writer.dropped > 0
+    assert len(tracer.recent_turns()) == 10  # 메모리 집계는 버리지 않음
+
+
+def test_sink_is_rotated_and_both_files_are_read(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(sink_path=str(path), max_bytes=600)
+    for i in range(8):
+        with tracer.trace_turn(f"turn-{i}"):
+            pass
+        tracer.flush()
+
+    assert (tmp_path / "traces.jsonl.1").exists()
+    assert path.stat().st_size <= 600
+    names = [turn["name"] for turn in load_turns(str(path), limit=100)]
+    assert names == sorted(names) and names[-1] == "turn-7"
+    assert [turn["name"] for turn in load_turns(str(path), limit=2)] == ["turn-6", "turn-7"]
+
+
+def test_load_turns_reads_only_the_tail(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    write_turns(path, [f"turn-{i}" for i in range(500)])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"name": "기록 중')  # 쓰는 중이던 마지막 줄
+
+    turns = load_turns(str(path), limit=3)
+    assert [turn["name"] for turn in turns] == ["turn-497", "turn-498", "turn-499"]
+
+    # 블록 경계에서 잘린 줄은 버리고, 필요한 만큼만 앞쪽 블록을 더 읽음
+    lines = _tail_lines(str(path), 5, block_size=64)
+    assert [json.loads(line)["name"] for line in lines] == [f"turn-{i}" for i in range(495, 500)]
+
+
+def test_missing_sink_has_no_turns(tmp_path):
+    assert load_turns(str(tmp_path / "missing.jsonl")) == []
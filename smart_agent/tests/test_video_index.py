@@ -0,0 +1,81 @@
+"""영상 구간 인덱스(core.video_index) 테스트"""
+import os
+import threading
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from core.video_index import VideoIndex, chunks_from_segments
+
+
+class BlockingEmbeddings:
+    """문서 임베딩을 release가 설정될 때까지 멈추는 임베딩 (느린 인덱스 생성 흉내)"""
+
+    def __init__(self):
+        self.inner = DeterministicFakeEmbedding(size=8)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def embed_documents(self, texts):
+        self.started.set()
+        self.release.wait(timeout=5)
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.inner.embed_query(text)
+
+
+def segments(video_id, count=3):
+    return chunks_from_segments(
+        video_id, [{"start": i * 60, "end": (i + 1) * 60, "text": f"{video_id} 구간 {i}"} for i in range(count)]
+    )
+
+
+def test_building_one_video_does_not_block_another(tmp_path):
+    embeddings = BlockingEmbeddings()
+    index = VideoIndex(tmp_path, embeddings)
+    embeddings.release.set()
+    index.ensure("ready", segments("ready"))
+    embeddings.release.clear()
+    embeddings.started.clear()
+
+    builder = threading.Thread(target=index.ensure, args=("slow", segments("slow")))
+    builder.start()
+    try:
+        assert embeddings.started.wait(timeout=5)
+        # 다른 영상의 인덱스 생성이 임베딩을 기다리는 동안에도 검색은 바로 끝남
+        searcher = threading.Thread(target=index.search, args=("ready", "질문"))
+        searcher.start()
+        searcher.join(timeout=2)
+        assert not searcher.is_alive()
+    finally:
+        embeddings.release.set()
+        builder.join(timeout=5)
+    assert index.has_index("slow")
+
+
+def test_least_recently_used_indexes_are_evicted_over_quota(tmp_path):
+    index = VideoIndex(tmp_path, DeterministicFakeEmbedding(size=8))
+    for i, video_id in enumerate(["old", "used", "new"]):
+        index.ensure(video_id, segments(video_id))
+        os.utime(index._meta_path(video_id), (1000 + i, 1000 + i))
+    # 오래전에 만든 인덱스라도 다시 쓰면 최근 사용으로 갱신됨
+    index.ensure("used", segments("used"))
+
+    index.max_bytes = 1
+    index.evict(keep={"new"})
+
+    assert not (tmp_path / "old").exists()
+    assert not (tmp_path / "used").exists()
+    assert index.has_index("new")
+    assert index.stats["evictions"] == 2
+
+
+def test_evicted_index_is_rebuilt_on_next_question(tmp_path):
+    index = VideoIndex(tmp_path, DeterministicFakeEmbedding(size=8), max_bytes=1)
+    index.ensure("a", segments("a"))
+    index.ensure("b", segments("b"))  # 한도를 넘어 "a"가 삭제됨
+
+    assert not index.has_index("a")
+    index.ensure("a", segments("a"))
+    assert [doc.metadata["start"] for doc in index.search("a", "질문", k=3)] == [0, 60, 120]
+    assert index.stats["builds"] == 3
@@ -0,0 +1,150 @@
+"""영상 도구(core.video_tools) 테스트 (로컬 대체 다운로더·자막 조회기·영상 클라이언트 사용)"""
+import pytest
+
+from core import video_tools
+from core.video_cache import AnalysisCache
+from core.video_segments import OfflineSegmenter
+from core.video_tools import (
+    DownloadManager,
+    OfflineDownloader,
+    OfflineTranscriptFetcher,
+    OfflineVideoClient,
+    summarize_youtube_video,
+)
+
+VIDEO_ID = "dQw4w9WgXcQ"
+URL = f"https://www.youtube.com/watch?v={VIDEO_ID}"
+MB = 1024 * 1024
+
+
+class FailingTranscriptFetcher:
+    """자막 다운로드가 실패하는 조회기 (yt-dlp DownloadError 흉내)"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def fetch(self, youtube_url, video_id, output_dir):
+        self.calls += 1
+        raise RuntimeError("ERROR: Unable to download video subtitles for 'ko': HTTP Error 429: Too Many Requests")
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    """영상 도구의 디렉토리·캐시·다운로드 관리자·모델 클라이언트를 테스트용으로 교체합니다."""
+    monkeypatch.setattr(video_tools, "VIDEO_DIR", tmp_path / "videos")
+    (tmp_path / "videos").mkdir()
+    monkeypatch.setattr(video_tools, "analysis_cache", AnalysisCache(tmp_path / "analysis"))
+    manager = DownloadManager(
+        tmp_path / "videos",
+        max_bytes=100 * MB,
+        downloader=OfflineDownloader(size_bytes=MB),
+        transcript_fetcher=OfflineTranscriptFetcher(),
+    )
+    monkeypatch.setattr(video_tools, "download_manager", manager)
+    monkeypatch.setattr(video_tools, "_video_model_client", OfflineVideoClient())
+    monkeypatch.setattr(video_tools, "_video_segmenter", OfflineSegmenter(video_tools.VIDEO_SEGMENT_SECONDS))
+    return manager
+
+
+def test_summary_uses_transcript_when_available(offline):
+    offline.transcript_fetcher = OfflineTranscriptFetcher(cue_count=5)
+    summary = summarize_youtube_video.invoke({"youtube_url": URL})
+
+    assert "통합 요약" in summary
+    assert offline.downloader.calls == 0
+
+
+def test_summary_falls_back_to_video_when_transcript_fetch_fails(offline):
+    offline.transcript_fetcher = FailingTranscriptFetcher()
+    summary = summarize_youtube_video.invoke({"youtube_url": URL})
+
+    assert "오류" not in summary
+    assert "로컬 테스트용 요약" in summary
+    assert offline.downloader.calls == 1
+    assert offline.stats["transcript_errors"] == 1
+    # 실패는 "자막 없음"으로 저장하지 않음
+    assert not video_tools.transcript_path(VIDEO_ID).exists()
+
+
+def test_summary_without_subtitles_analyzes_the_video(offline):
+    summary = summarize_youtube_video.invoke({"youtube_url": URL})
+
+    assert "로컬 테스트용 요약" in summary
+    assert offline.transcript_fetcher.calls == 1
+    assert offline.downloader.calls == 1
+
+
+class EchoChatModel:
+    """받은 프롬프트를 그대로 돌려주는 채팅 모델 (답변에 쓰인 컨텍스트 확인용)"""
+
+    def invoke(self, prompt):
+        from langchain_core.messages import AIMessage
+
+        return AIMessage(content=prompt)
+
+
+@pytest.fixture
+def qa(offline, tmp_path, monkeypatch):
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from core.video_index import VideoIndex
+
+    monkeypatch.setattr(video_tools, "_video_index", VideoIndex(tmp_path / "index", DeterministicFakeEmbedding(size=16)))
+    monkeypatch.setattr(video_tools, "_answer_llm", EchoChatModel)
+    return offline
+
+
+def test_first_question_on_long_video_without_subtitles_uses_segment_index(qa):
+    # 구간 2개를 넘는 긴 영상 (자막 없음, use_video=False)
+    qa.downloader = OfflineDownloader(size_bytes=MB, duration=video_tools.VIDEO_SEGMENT_SECONDS * 3)
+    answer = video_tools.answer_youtube_question.invoke({"question": "무슨 내용인가요?", "youtube_url": URL})
+
+    assert "질문과 관련된 구간들" in answer
+    assert "[00:00~10:00]" in answer or "[10:00~20:00]" in answer
+
+
+def test_short_video_without_segments_is_answered_from_summary(qa):
+    answer = video_tools.answer_youtube_question.invoke({"question": "무슨 내용인가요?", "youtube_url": URL})
+
+    assert "유튜브 영상의 요약" in answer
+    assert "로컬 테스트용 요약" in answer
+    assert qa.downloader.calls == 1
+
+
+def test_question_is_answered_when_subtitle_fetch_fails(qa):
+    qa.transcript_fetcher = FailingTranscriptFetcher()
+    answer = video_tools.answer_youtube_question.invoke({"question": "무슨 내용인가요?", "youtube_url": URL})
+    assert "오류" not in answer
+
+
+class CountingVideoClient(OfflineVideoClient):
+    """영상 분석 호출 수를 세는 로컬 대체 클라이언트"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, video_path, mime_type, prompt):
+        self.calls += 1
+        return super().generate(video_path, mime_type, prompt)
+
+
+def test_evicted_segment_summary_is_resummarized_instead_of_truncating_the_index(qa, monkeypatch):
+    client = CountingVideoClient()
+    monkeypatch.setattr(video_tools, "_video_model_client", client)
+    qa.downloader = OfflineDownloader(size_bytes=MB, duration=video_tools.VIDEO_SEGMENT_SECONDS * 3)
+    question = {"question": "무슨 내용인가요?", "youtube_url": URL}
+    video_tools.answer_youtube_question.invoke(question)
+    assert client.calls == 3
+
+    # 가운데 구간 요약만 캐시에서 빠진 상태 (LRU 정리 등)
+    video_tools.analysis_cache._path(
+        VIDEO_ID, video_tools._model_name(), video_tools.PROMPT_VERSION, video_tools._segment_kind(1)
+    ).unlink()
+    segments, missing = video_tools._cached_segment_summaries(VIDEO_ID, video_tools.VIDEO_SEGMENT_SECONDS * 3)
+    assert [segment["start"] for segment in segments] == [0, 2 * video_tools.VIDEO_SEGMENT_SECONDS]
+    assert missing == [1]
+
+    answer = video_tools.answer_youtube_question.invoke(question)
+
+    # 빠진 구간만 다시 요약하고, 인덱스에는 세 구간이 모두 들어감
+    assert client.calls == 4
+    assert "[00:00~10:00]" in answer and "[10:00~20:00]" in answer and "[20:00~30:00]" in answer